@@ -0,0 +1,60 @@
+import time
+import uuid
+import chromadb
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.vector_index import VectorIndex
+
+CORPUS_SIZES = [10, 100, 1000, 10000]
+
+
+def benchmark_retrieval(corpus_sizes: list = None, dimensions: int = 1536, top_k: int = 3, queries: int = 50) -> list:
+    """Compare session-scoped top-k latency of the in-process index against a ChromaDB query by corpus size"""
+    console = Console()
+    rng = np.random.default_rng(0)
+    chroma_client = chromadb.EphemeralClient()
+
+    table = Table(title="Session Retrieval Latency")
+    table.add_column("Turns", style="cyan", justify="right")
+    table.add_column("Hot index", style="green", justify="right")
+    table.add_column("ChromaDB", style="yellow", justify="right")
+    table.add_column("Speedup", style="blue", justify="right")
+
+    report = []
+    for size in corpus_sizes or CORPUS_SIZES:
+        vectors = rng.standard_normal((size, dimensions), dtype=np.float32)
+        ids = [f"bench_turn{i}" for i in range(size)]
+        results = [{"content": turn_id, "turn_number": i, "timestamp": ""} for i, turn_id in enumerate(ids)]
+
+        index = VectorIndex()
+        index.warm("bench", list(zip(ids, vectors, results)))
+        collection = chroma_client.create_collection(f"bench-{uuid.uuid4().hex}")
+        for start in range(0, size, 5000):
+            collection.add(ids=ids[start:start + 5000], embeddings=vectors[start:start + 5000],
+                           metadatas=[{"session_id": "bench"}] * len(ids[start:start + 5000]))
+
+        probes = rng.standard_normal((queries, dimensions), dtype=np.float32)
+        hot = _latency(lambda probe: index.search("bench", probe, top_k), probes)
+        cold = _latency(lambda probe: collection.query(query_embeddings=[probe], n_results=min(top_k, size),
+                                                       where={"session_id": "bench"}), probes)
+        chroma_client.delete_collection(collection.name)
+
+        report.append({"turns": size, "hot_ms": hot, "chroma_ms": cold})
+        table.add_row(str(size), f"{hot:.3f} ms", f"{cold:.3f} ms", f"{cold / hot:.1f}x")
+
+    console.print(table)
+    return report
+
+
+def _latency(search, probes: np.ndarray) -> float:
+    """Mean milliseconds per search"""
+    start = time.perf_counter()
+    for probe in probes:
+        search(probe)
+    return (time.perf_counter() - start) * 1000 / len(probes)
+
+
+if __name__ == "__main__":
+    benchmark_retrieval()
@@ -0,0 +1,55 @@
+import os
+import random
+from pathlib import Path
+from rich.console import Console
+from rich.table import Table
+
+from src.distilled_classifier import DistilledClassifier, VerdictLog
+
+
+def distill_classifiers(distill_dir: str = None, holdout: float = 0.2):
+    """Retrain local classifiers from logged verdicts and report agreement, call reduction and latency"""
+    console = Console()
+    distill_dir = distill_dir or os.getenv("CLASSIFIER_DISTILL_DIR", "./distill_data")
+    logs = sorted(Path(distill_dir).glob("*.jsonl"))
+    
+    if not logs:
+        console.print(f"[yellow]No verdict logs found in {distill_dir}.[/yellow]")
+        console.print("[dim]Set CLASSIFIER_DISTILL_DIR and chat to collect classifier verdicts.[/dim]")
+        return
+    
+    table = Table(title="Distilled Classifiers")
+    table.add_column("Classifier", style="cyan")
+    table.add_column("Logged", justify="right")
+    table.add_column("Held out", justify="right")
+    table.add_column("Accuracy", style="green", justify="right")
+    table.add_column("Calls avoided", style="yellow", justify="right")
+    table.add_column("Latency", style="blue", justify="right")
+    
+    for log_path in logs:
+        records = VerdictLog(str(log_path)).read()
+        random.Random(0).shuffle(records)
+        split = int(len(records) * (1 - holdout))
+        evaluation = records[split:] or records
+        
+        classifier = DistilledClassifier()
+        classifier.train(records[:split] or records)
+        report = classifier.evaluate(evaluation)
+        classifier.save(str(log_path.with_suffix(".npz")))
+        
+        table.add_row(
+            log_path.stem,
+            str(len(records)),
+            str(report["samples"]),
+            f"{report['accuracy']:.1%}",
+            f"{report['call_reduction']:.1%}",
+            f"{report['latency_ms']:.3f} ms"
+        )
+    
+    console.print(table)
+    console.print(f"\n[dim]Models saved to {distill_dir}; chat() uses them as the local fast path when "
+                  f"CLASSIFIER_FAST_PATH is on.[/dim]")
+
+
+if __name__ == "__main__":
+    distill_classifiers()
@@ -0,0 +1,178 @@
+import base64
+import hashlib
+import json
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+from rich.console import Console
+
+DEFAULT_REPLY = "This is a canned reply from the local OpenAI stand-in, streamed one word at a time."
+DEFAULT_DIMENSIONS = 1536
+
+
+class FakeOpenAI:
+    """
+    Local stand-in for the OpenAI API, for load tests without network or cost. Serves chat completions
+    (plain and streamed), the one-token intent classifiers and embeddings with a configurable latency.
+    Classifiers answer as for a safe message that continues the conversation; embeddings are stable
+    pseudo-random unit vectors derived from the text.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, reply: str = DEFAULT_REPLY,
+                 first_token_delay: float = 0.2, token_delay: float = 0.02, classifier_delay: float = 0.1,
+                 embedding_delay: float = 0.05):
+        self.reply = reply
+        self.first_token_delay = first_token_delay
+        self.token_delay = token_delay
+        self.classifier_delay = classifier_delay
+        self.embedding_delay = embedding_delay
+        self.stats = {"chat": 0, "streams": 0, "classifier": 0, "embeddings": 0}
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), _FakeOpenAIHandler)
+        self._server.daemon_threads = True
+        self._server.fake = self
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        """Value for OPENAI_BASE_URL"""
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "FakeOpenAI":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, kind: str):
+        with self._lock:
+            self.stats[kind] += 1
+
+    def completion(self, request: dict) -> dict:
+        """Non-streamed chat completion; one-token requests are answered as a classifier would"""
+        if request.get("max_tokens") == 1:
+            self.count("classifier")
+            time.sleep(self.classifier_delay)
+            content = self._verdict(request["messages"][0]["content"])
+        else:
+            self.count("chat")
+            time.sleep(self.first_token_delay + self.token_delay * len(self.reply.split()))
+            content = self.reply
+        choice = {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": content}}
+        if request.get("logprobs"):
+            choice["logprobs"] = {"content": [{"token": content, "logprob": 0.0, "bytes": None, "top_logprobs": []}]}
+        return {"id": "chatcmpl-fake", "object": "chat.completion", "created": int(time.time()),
+                "model": request["model"], "choices": [choice], "usage": self._usage(request, content)}
+
+    def stream(self, request: dict):
+        """Chunks of a streamed chat completion, ending with a usage chunk when include_usage is asked for"""
+        self.count("streams")
+        time.sleep(self.first_token_delay)
+        for index, word in enumerate(self.reply.split(" ")):
+            if index:
+                time.sleep(self.token_delay)
+            content = " " + word if index else word
+            yield self._chunk(request, [{"index": 0, "delta": {"content": content}, "finish_reason": None}])
+        yield self._chunk(request, [{"index": 0, "delta": {}, "finish_reason": "stop"}])
+        if (request.get("stream_options") or {}).get("include_usage"):
+            yield self._chunk(request, [], self._usage(request, self.reply))
+
+    def embeddings(self, request: dict) -> dict:
+        self.count("embeddings")
+        time.sleep(self.embedding_delay)
+        texts = request["input"] if isinstance(request["input"], list) else [request["input"]]
+        dimensions = request.get("dimensions") or DEFAULT_DIMENSIONS
+        data = []
+        for index, text in enumerate(texts):
+            vector = self._vector(text, dimensions)
+            embedding = (base64.b64encode(vector.tobytes()).decode() if request.get("encoding_format") == "base64"
+                         else vector.tolist())
+            data.append({"object": "embedding", "index": index, "embedding": embedding})
+        tokens = sum(len(text.split()) for text in texts)
+        return {"object": "list", "model": request["model"], "data": data,
+                "usage": {"prompt_tokens": tokens, "total_tokens": tokens}}
+
+    @staticmethod
+    def _verdict(system_prompt: str) -> str:
+        """'1' for the security prompt (safe), '0' for the exit and router prompts (continue)"""
+        return "1" if "SAFE messages" in system_prompt and "'2'" not in system_prompt else "0"
+
+    @staticmethod
+    def _vector(text: str, dimensions: int) -> np.ndarray:
+        seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+        vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+        return vector / np.linalg.norm(vector)
+
+    @staticmethod
+    def _usage(request: dict, content: str) -> dict:
+        prompt_tokens = sum(len(str(message.get("content", "")).split()) for message in request["messages"])
+        completion_tokens = len(content.split())
+        return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                "total_tokens": prompt_tokens + completion_tokens,
+                "prompt_tokens_details": {"cached_tokens": 0}}
+
+    @staticmethod
+    def _chunk(request: dict, choices: list, usage: dict = None) -> dict:
+        return {"id": "chatcmpl-fake", "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": request["model"], "choices": choices, "usage": usage}
+
+
+class _FakeOpenAIHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        fake = self.server.fake
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length") or 0)) or b"{}")
+        try:
+            if self.path.endswith("/embeddings"):
+                self._send_json(fake.embeddings(request))
+            elif self.path.endswith("/chat/completions") and request.get("stream"):
+                self._send_stream(fake.stream(request))
+            elif self.path.endswith("/chat/completions"):
+                self._send_json(fake.completion(request))
+            else:
+                self._send_json({"error": {"message": f"Unknown endpoint {self.path}"}}, 404)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send_json(self, payload: dict, status: int = 200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_stream(self, chunks):
+        """Server-sent events in chunked transfer encoding, so the connection stays in the client's pool"""
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in chunks:
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+        self._write_chunk(b"data: [DONE]\n\n")
+        self._write_chunk(b"")
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+if __name__ == "__main__":
+    server = FakeOpenAI(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8001).start()
+    Console().print(f"[green]Fake OpenAI listening; set OPENAI_BASE_URL={server.base_url}[/green]")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.stop()
@@ -0,0 +1,114 @@
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Tuple
+from rich.console import Console
+from rich.table import Table
+
+from src.api_transport import ApiTransport, BACKGROUND_EMBEDDING_CALL
+from src.chat_config import memory_store_options_from_env
+from src.memory_router import MemoryRouter
+from src.memory_store import MemoryStore
+
+
+def ingest_transcripts(path: str, persist_dir: str = None, batch_size: int = 256, memory_store: MemoryStore = None,
+                       console: Console = None) -> dict:
+    """
+    Bulk-load a JSONL transcript (one turn per line: session_id, turn_number, user_message, assistant_message
+    and an optional timestamp and user_id) into the memory store, one embeddings request and one upsert per batch.
+    The store is opened like chat()'s, so user_id picks the turn's MEMORY_PARTITION partition and embeddings
+    match MEMORY_EMBEDDING_DIMENSIONS. Progress is checkpointed to <path>.progress after every batch, so an
+    interrupted run resumes where it stopped.
+    """
+    console = console or Console()
+    progress_path = f"{path}.progress"
+    progress = _load_progress(progress_path)
+
+    transport = None
+    if memory_store is None:
+        persist_dir = persist_dir or os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+        os.makedirs(persist_dir, exist_ok=True)
+        transport = ApiTransport.from_env()
+        client = transport.client_for(BACKGROUND_EMBEDDING_CALL)
+        # Bulk loads write straight to ChromaDB, so neither the writer thread nor the hot index is needed
+        store_options = {**memory_store_options_from_env(persist_dir), "write_behind": False, "hot_index": None}
+        partition_mode = os.getenv("MEMORY_PARTITION")
+        if partition_mode:
+            memory_store = MemoryRouter(client, persist_dir, partition_mode, **store_options)
+        else:
+            memory_store = MemoryStore(client, persist_dir, **store_options)
+    try:
+        return _ingest(path, progress_path, progress, batch_size, memory_store, console)
+    finally:
+        if transport:
+            transport.close()
+
+
+def _ingest(path: str, progress_path: str, progress: dict, batch_size: int, memory_store: MemoryStore,
+            console: Console) -> dict:
+    if progress["offset"]:
+        console.print(f"[dim]Resuming {path} after {progress['turns']} turns.[/dim]")
+
+    ingested = 0
+    start = time.perf_counter()
+    for batch, offset in _read_batches(path, progress["offset"], batch_size):
+        ingested += memory_store.store_turns(batch, batch_size)
+        progress = {"offset": offset, "turns": progress["turns"] + len(batch)}
+        _save_progress(progress_path, progress)
+        elapsed = time.perf_counter() - start
+        console.print(f"[dim]{progress['turns']} turns ingested ({ingested / elapsed:.1f} turns/sec)[/dim]")
+
+    elapsed = time.perf_counter() - start
+    report = {
+        "turns": ingested,
+        "total_turns": progress["turns"],
+        "seconds": elapsed,
+        "turns_per_sec": ingested / elapsed if elapsed else 0.0
+    }
+
+    table = Table(title="Transcript Ingestion")
+    table.add_column("Ingested", style="cyan", justify="right")
+    table.add_column("Total", justify="right")
+    table.add_column("Elapsed", style="blue", justify="right")
+    table.add_column("Turns/sec", style="green", justify="right")
+    table.add_row(str(report["turns"]), str(report["total_turns"]), f"{elapsed:.2f} s",
+                  f"{report['turns_per_sec']:.1f}")
+    console.print(table)
+    return report
+
+
+def _read_batches(path: str, offset: int, batch_size: int) -> Iterator[Tuple[List[dict], int]]:
+    """Stream turns from a byte offset, yielding each batch with the offset just past it"""
+    with open(path, "rb") as transcript:
+        transcript.seek(offset)
+        batch = []
+        while True:
+            line = transcript.readline()
+            if not line:
+                break
+            if line.strip():
+                batch.append(json.loads(line))
+            if len(batch) == batch_size:
+                yield batch, transcript.tell()
+                batch = []
+        if batch:
+            yield batch, transcript.tell()
+
+
+def _load_progress(progress_path: str) -> dict:
+    if not os.path.exists(progress_path):
+        return {"offset": 0, "turns": 0}
+    with open(progress_path, encoding="utf-8") as progress:
+        return json.load(progress)
+
+
+def _save_progress(progress_path: str, progress: dict):
+    temporary_path = f"{progress_path}.tmp"
+    with open(temporary_path, "w", encoding="utf-8") as checkpoint:
+        json.dump(progress, checkpoint)
+    os.replace(temporary_path, progress_path)
+
+
+if __name__ == "__main__":
+    ingest_transcripts(sys.argv[1])
@@ -0,0 +1,110 @@
+import asyncio
+import json
+import os
+import tempfile
+import time
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.chat_server import build_server
+from fake_openai import FakeOpenAI
+
+
+def load_test_server(sessions: int = 50, turns: int = 3, use_memory: bool = False, fake: FakeOpenAI = None,
+                     console: Console = None) -> dict:
+    """
+    Run the chat server against a local FakeOpenAI and drive it with concurrent sessions, each sending
+    turns messages in a row. Reports client-side time to first token and turn latency percentiles and
+    turn throughput. Nothing leaves the machine; with memory, turns go to a temporary store.
+    """
+    console = console or Console()
+    fake = fake or FakeOpenAI()
+    fake.start()
+    os.environ["OPENAI_BASE_URL"] = fake.base_url
+    os.environ.setdefault("OPENAI_API_KEY", "fake-key")
+    os.environ.setdefault("OPENAI_MODEL", "gpt-4o-mini")
+
+    with tempfile.TemporaryDirectory() as persist_dir:
+        if use_memory:
+            os.environ["MEMORY_PERSIST_DIR"] = persist_dir
+        try:
+            report = asyncio.run(_drive(sessions, turns, use_memory))
+        finally:
+            fake.stop()
+    report["api_calls"] = dict(fake.stats)
+
+    table = Table(title=f"Chat Server Load Test ({sessions} sessions x {turns} turns)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    table.add_row("Turns answered", f"{report['turns']} ({report['errors']} failed)")
+    table.add_row("Throughput", f"{report['turns_per_second']:.1f} turns/s")
+    table.add_row("Time to first token p50 / p95", f"{report['ttft_p50'] * 1000:.0f} / {report['ttft_p95'] * 1000:.0f} ms")
+    table.add_row("Turn latency p50 / p95", f"{report['latency_p50'] * 1000:.0f} / {report['latency_p95'] * 1000:.0f} ms")
+    table.add_row("API calls (classifier / stream / embedding)",
+                  f"{fake.stats['classifier']} / {fake.stats['streams']} / {fake.stats['embeddings']}")
+    console.print(table)
+    return report
+
+
+async def _drive(sessions: int, turns: int, use_memory: bool) -> dict:
+    server = build_server(use_memory, "127.0.0.1", 0)
+    await server.start()
+    try:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(_session(server.port, index, turns) for index in range(sessions)))
+        elapsed = time.perf_counter() - start
+    finally:
+        await server.stop()
+
+    timings = [timing for session in results for timing in session]
+    answered = [timing for timing in timings if timing is not None]
+    ttfts = [ttft for ttft, _ in answered] or [0.0]
+    latencies = [latency for _, latency in answered] or [0.0]
+    return {
+        "turns": len(answered),
+        "errors": len(timings) - len(answered),
+        "turns_per_second": len(answered) / elapsed,
+        "ttft_p50": float(np.percentile(ttfts, 50)),
+        "ttft_p95": float(np.percentile(ttfts, 95)),
+        "latency_p50": float(np.percentile(latencies, 50)),
+        "latency_p95": float(np.percentile(latencies, 95)),
+        "server": dict(server.stats)
+    }
+
+
+async def _session(port: int, index: int, turns: int) -> list:
+    """(ttft, latency) per turn of one simulated user, None for a turn that failed"""
+    _, body = await _request(port, "POST", "/sessions", {})
+    session_id = json.loads(body)["session_id"]
+    timings = []
+    for turn in range(turns):
+        start = time.perf_counter()
+        first_token, body = await _request(port, "POST", f"/sessions/{session_id}/messages",
+                                           {"message": f"User {index} asks question number {turn} about the weather"})
+        answered = first_token is not None and b"event: done" in body
+        timings.append((first_token - start, time.perf_counter() - start) if answered else None)
+    return timings
+
+
+async def _request(port: int, method: str, path: str, payload: dict) -> tuple:
+    """Send one request on a fresh connection; returns when the first token event arrived, and the body"""
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    body = json.dumps(payload).encode()
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+    await writer.drain()
+    received, first_token = b"", None
+    while True:
+        data = await reader.read(65536)
+        if not data:
+            break
+        received += data
+        if first_token is None and b"event: token" in received:
+            first_token = time.perf_counter()
+    writer.close()
+    return first_token, received.split(b"\r\n\r\n", 1)[-1]
+
+
+if __name__ == "__main__":
+    load_test_server()
@@ -2,17 +2,71 @@
 Simple Chatbot Entry Point
 
 Usage:
-  python main.py              # Run without memory
-  python main.py --memory     # Run with RAG memory
-  python main.py --inspect    # Inspect memory store
+  python main.py                 # Run without memory
+  python main.py --memory        # Run with RAG memory
+  python main.py --speculative   # Start replies while input is classified
+  python main.py --router        # One classifier call per turn
+  python main.py --serve         # Serve many sessions over HTTP with streamed replies (add --memory for RAG)
+  python main.py --inspect       # Inspect memory store
+  python main.py --distill       # Retrain local classifiers from logged verdicts
+  python main.py --ingest FILE   # Bulk-load a JSONL transcript into memory
+  python main.py --benchmark     # Compare hot index and ChromaDB retrieval latency
+  python main.py --migrate       # Tag and partition stored turns by user (MEMORY_PARTITION)
+  python main.py --shrink-embeddings  # Shorten stored embeddings and report size and recall; keeps every turn
+  python main.py --prune         # Expire, deduplicate, roll up and cap stored turns (MEMORY_TTL, ...)
+  python main.py --replay-gate FILE  # Measure skipped retrievals and context recall on a transcript
 """
 import sys
+from typing import Optional
+from rich.console import Console
 from src.chatbot import chat
+from src.chat_server import serve
 from inspect_memory import inspect_memory
+from distill_classifiers import distill_classifiers
+from ingest_transcripts import ingest_transcripts
+from benchmark_retrieval import benchmark_retrieval
+from migrate_memory import migrate_memory
+from shrink_embeddings import shrink_embeddings
+from prune_memory import prune_memory
+from replay_retrieval_gate import replay_retrieval_gate
+
+
+def _argument(flag: str) -> Optional[str]:
+    """The value following flag, or None after printing the usage when it is missing"""
+    index = sys.argv.index(flag) + 1
+    if index < len(sys.argv) and not sys.argv[index].startswith("--"):
+        return sys.argv[index]
+    console = Console()
+    console.print(f"[red]{flag} needs a FILE argument.[/red]")
+    console.print(__doc__.strip(), markup=False, highlight=False)
+    return None
+
 
 if __name__ == "__main__":
     if "--inspect" in sys.argv:
         inspect_memory()
+    elif "--distill" in sys.argv:
+        distill_classifiers()
+    elif "--ingest" in sys.argv:
+        path = _argument("--ingest")
+        if path:
+            ingest_transcripts(path)
+    elif "--benchmark" in sys.argv:
+        benchmark_retrieval()
+    elif "--migrate" in sys.argv:
+        migrate_memory()
+    elif "--shrink-embeddings" in sys.argv:
+        shrink_embeddings()
+    elif "--prune" in sys.argv:
+        prune_memory()
+    elif "--replay-gate" in sys.argv:
+        path = _argument("--replay-gate")
+        if path:
+            replay_retrieval_gate(path)
+    elif "--serve" in sys.argv:
+        serve(use_memory="--memory" in sys.argv)
     else:
         use_memory = "--memory" in sys.argv
-        chat(use_memory=use_memory)
+        speculative = "--speculative" in sys.argv
+        use_router = "--router" in sys.argv
+        chat(use_memory=use_memory, speculative=speculative, use_router=use_router)
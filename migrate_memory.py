@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+from collections import Counter
+import chromadb
+from rich.console import Console
+from rich.table import Table
+
+from src.memory_router import MemoryRouter, DIRECTORY_PARTITIONS
+
+
+def migrate_memory(persist_dir: str = None, mode: str = None, session_users: dict = None,
+                   batch_size: int = 500) -> dict:
+    """
+    Tag stored turns with their user (from turn metadata or a session_id -> user_id map) and, when a partition
+    mode is given, move each user's turns into their own partition. Embeddings are copied, not regenerated.
+    """
+    console = Console()
+    persist_dir = persist_dir or os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+    mode = mode or os.getenv("MEMORY_PARTITION") or None
+    session_users = session_users or {}
+
+    try:
+        source = chromadb.PersistentClient(path=persist_dir).get_collection("conversations")
+    except Exception:
+        console.print(f"[yellow]No conversations stored in {persist_dir}.[/yellow]")
+        return {"moved": 0, "tagged": 0, "remaining": 0}
+
+    router = MemoryRouter(None, persist_dir, mode) if mode else None
+    moved, moved_ids = Counter(), []
+    tagged = 0
+    for offset in range(0, source.count(), batch_size):
+        batch = source.get(offset=offset, limit=batch_size, include=["embeddings", "documents", "metadatas"])
+        partitions, tag_ids, tag_metadatas = {}, [], []
+        for turn_id, embedding, document, metadata in zip(batch["ids"], batch["embeddings"], batch["documents"],
+                                                           batch["metadatas"]):
+            user_id = metadata.get("user_id") or session_users.get(metadata["session_id"])
+            if not user_id:
+                continue
+            if router:
+                records = partitions.setdefault(user_id, {"ids": [], "embeddings": [], "documents": [],
+                                                          "metadatas": []})
+                for key, value in zip(records, (turn_id, embedding, document, {**metadata, "user_id": user_id})):
+                    records[key].append(value)
+            elif "user_id" not in metadata:
+                tag_ids.append(turn_id)
+                tag_metadatas.append({**metadata, "user_id": user_id})
+
+        for user_id, records in partitions.items():
+            router.store_for(user_id).collection.upsert(**records)
+            moved[router.partition(user_id)] += len(records["ids"])
+            moved_ids.extend(records["ids"])
+        if tag_ids:
+            source.update(ids=tag_ids, metadatas=tag_metadatas)
+            tagged += len(tag_ids)
+
+    for start in range(0, len(moved_ids), batch_size):
+        source.delete(ids=moved_ids[start:start + batch_size])
+
+    table = Table(title="Memory Migration")
+    table.add_column("Partition", style="cyan")
+    table.add_column("Turns", style="green", justify="right")
+    for (partition_dir, collection_name), count in sorted(moved.items()):
+        table.add_row(f"{partition_dir}/{collection_name}" if mode == DIRECTORY_PARTITIONS else collection_name, str(count))
+    table.add_row("conversations (shared)", str(source.count()))
+    console.print(table)
+    if tagged:
+        console.print(f"[dim]Tagged {tagged} turns with their user in place.[/dim]")
+
+    return {"moved": sum(moved.values()), "tagged": tagged, "remaining": source.count()}
+
+
+if __name__ == "__main__":
+    users = None
+    if len(sys.argv) > 1:
+        with open(sys.argv[1], encoding="utf-8") as mapping:
+            users = json.load(mapping)
+    migrate_memory(session_users=users)
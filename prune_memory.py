@@ -0,0 +1,99 @@
+import os
+import time
+from typing import List
+import chromadb
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.api_transport import ApiTransport, BACKGROUND_CALL, BACKGROUND_EMBEDDING_CALL
+from src.memory_compactor import MemoryCompactor
+from src.memory_router import is_partition, partition_dirs
+from src.memory_store import MemoryStore
+
+STATS = ("expired", "duplicates", "rolled_up", "rollups", "capped")
+
+
+def prune_memory(persist_dir: str = None, compactors: List[MemoryCompactor] = None, probes: int = 20) -> dict:
+    """
+    Run one full compaction pass over every memory partition (the shared collection plus the per-user
+    collections and directories of MEMORY_PARTITION) and report reclaimed entries and query latency before
+    and after. API calls go through the same transport and model as chat().
+    """
+    console = Console()
+    transport = None
+    if compactors is None:
+        persist_dir = persist_dir or os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+        transport = ApiTransport.from_env()
+        model = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
+        dimensions = int(os.getenv("MEMORY_EMBEDDING_DIMENSIONS") or 0) or None
+        embedding_client = transport.client_for(BACKGROUND_EMBEDDING_CALL)
+        compactors = [
+            MemoryCompactor.from_env(MemoryStore(embedding_client, partition_dir, name, dimensions=dimensions),
+                                     model, transport.client_for(BACKGROUND_CALL))
+            for partition_dir in partition_dirs(persist_dir)
+            for name in _collections(partition_dir)
+        ]
+    try:
+        return _prune(compactors, probes, console)
+    finally:
+        if transport:
+            transport.close()
+
+
+def _prune(compactors: List[MemoryCompactor], probes: int, console: Console) -> dict:
+    collections = [compactor.memory_store.collection for compactor in compactors]
+    before = sum(collection.count() for collection in collections)
+    if not before:
+        console.print("[yellow]No entries in memory store.[/yellow]")
+        return {}
+    samples = [np.asarray(collection.get(limit=probes, include=["embeddings"])["embeddings"], dtype=np.float32)
+               for collection in collections]
+    latency_before = _query_latency(collections, samples)
+
+    for compactor in compactors:
+        compactor.run()
+
+    after = sum(collection.count() for collection in collections)
+    latency_after = _query_latency(collections, samples)
+    stats = {stat: sum(compactor.stats[stat] for compactor in compactors) for stat in compactors[0].stats}
+    reclaimed = sum(compactor.reclaimed for compactor in compactors)
+    report = {"partitions": len(compactors), "before": before, "after": after, "reclaimed": reclaimed, **stats,
+              "latency_before_ms": latency_before, "latency_after_ms": latency_after}
+
+    table = Table(title=f"Memory Pruning ({len(compactors)} partitions)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    table.add_row("Entries", f"{before} -> {after}")
+    for stat in STATS:
+        table.add_row(stat.replace("_", " ").capitalize(), str(stats[stat]))
+    table.add_row("Reclaimed", str(reclaimed))
+    table.add_row("Query latency", f"{latency_before:.2f} ms -> {latency_after:.2f} ms")
+    console.print(table)
+    return report
+
+
+def _collections(persist_dir: str) -> List[str]:
+    """Conversation partitions stored in one persist dir"""
+    names = (getattr(collection, "name", collection)
+             for collection in chromadb.PersistentClient(path=persist_dir).list_collections())
+    return sorted(name for name in names if is_partition(name))
+
+
+def _query_latency(collections: list, samples: List[np.ndarray]) -> float:
+    """Mean milliseconds per top-3 query, probing each partition with its stored embeddings"""
+    queries, elapsed = 0, 0.0
+    for collection, sample in zip(collections, samples):
+        count = collection.count()
+        if not count:
+            continue
+        start = time.perf_counter()
+        for embedding in sample:
+            collection.query(query_embeddings=[embedding], n_results=min(3, count))
+        elapsed += time.perf_counter() - start
+        queries += len(sample)
+    return elapsed * 1000 / queries if queries else 0.0
+
+
+if __name__ == "__main__":
+    prune_memory()
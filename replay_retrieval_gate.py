@@ -0,0 +1,75 @@
+import json
+import os
+import sys
+from itertools import groupby
+from openai import OpenAI
+from rich.console import Console
+from rich.table import Table
+
+from src.embedding_cache import EmbeddingCache
+from src.memory_store import MemoryStore
+from src.retrieval_gate import RetrievalGate, CHITCHAT, COVERED
+
+
+def replay_retrieval_gate(path: str, persist_dir: str = None, top_k: int = 3, recent_turns: int = 2,
+                          relevant_distance: float = 1.0, gate: RetrievalGate = None,
+                          memory_store: MemoryStore = None, console: Console = None) -> dict:
+    """
+    Replay a JSONL transcript (the --ingest format) turn by turn against stored memory, with and without the
+    retrieval gate. A retrieved memory is useful when it is within relevant_distance and not already in the
+    recent window; context recall is the share of useful memories the gated agent still sends.
+    """
+    console = console or Console()
+    gate = gate or RetrievalGate()
+    if memory_store is None:
+        persist_dir = persist_dir or os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+        cache_path = os.getenv("EMBEDDING_CACHE_PATH") or os.path.join(persist_dir, "embedding_cache.sqlite3")
+        client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        memory_store = MemoryStore(client, persist_dir, embedding_cache=EmbeddingCache(cache_path))
+
+    with open(path, encoding="utf-8") as transcript:
+        turns = [json.loads(line) for line in transcript if line.strip()]
+    turns.sort(key=lambda turn: (turn["session_id"], turn["turn_number"]))
+
+    useful = delivered = missed_turns = 0
+    for _, session_turns in groupby(turns, key=lambda turn: turn["session_id"]):
+        history = []
+        for turn in session_turns:
+            recent = history[max(len(history) - recent_turns * 2, 0):]
+            retrieve = gate.should_retrieve(turn["user_message"], recent)
+            known = {f"User: {question['content']}\nAssistant: {answer['content']}"
+                     for question, answer in zip(recent[::2], recent[1::2])}
+            known.add(f"User: {turn['user_message']}\nAssistant: {turn['assistant_message']}")
+            found = [memory for memory in memory_store.retrieve_relevant(turn["user_message"], top_k)
+                     if memory.get("distance") is not None and memory["distance"] <= relevant_distance
+                     and memory["content"] not in known]
+
+            useful += len(found)
+            delivered += len(found) if retrieve else 0
+            missed_turns += bool(found) and not retrieve
+            history += [{"role": "user", "content": turn["user_message"]},
+                        {"role": "assistant", "content": turn["assistant_message"]}]
+
+    report = {
+        "turns": len(turns),
+        "skipped": gate.stats["skipped"],
+        CHITCHAT: gate.stats[CHITCHAT],
+        COVERED: gate.stats[COVERED],
+        "missed_turns": missed_turns,
+        "context_recall": delivered / useful if useful else 1.0
+    }
+
+    table = Table(title=f"Retrieval Gate Replay ({len(turns)} turns)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Value", style="green", justify="right")
+    table.add_row("Retrievals skipped", f"{report['skipped']} ({report['skipped'] / max(len(turns), 1):.1%})")
+    table.add_row("  chit-chat", str(report[CHITCHAT]))
+    table.add_row("  covered by recent window", str(report[COVERED]))
+    table.add_row("Skipped turns that had useful memories", str(missed_turns))
+    table.add_row("Context recall vs. always retrieving", f"{report['context_recall']:.1%}")
+    console.print(table)
+    return report
+
+
+if __name__ == "__main__":
+    replay_retrieval_gate(sys.argv[1])
@@ -0,0 +1,170 @@
+import json
+import os
+from typing import List, Optional
+import chromadb
+import numpy as np
+from rich.console import Console
+from rich.table import Table
+
+from src.memory_router import is_partition, partition_dirs
+from src.vector_index import VectorIndex
+
+# Suffixes of the copy being built and of the original renamed aside while a partition is swapped
+SHRINK_SUFFIX = "__shrink"
+OLD_SUFFIX = "__old"
+
+
+def shrink_embeddings(persist_dir: str = None, dimensions: int = None, quantize: bool = None, top_k: int = 5,
+                      sample_size: int = 2000, batch_size: int = 500, drop_user_message: bool = None,
+                      collection_name: str = "conversations") -> dict:
+    """
+    Rewrite every stored partition (the shared collection plus the per-user collections and directories of
+    MEMORY_PARTITION) with shortened embeddings, then report bytes per turn and recall@k against the
+    full-precision vectors. text-embedding-3 vectors are shortened like the API's dimensions parameter:
+    truncate, then re-normalize. With drop_user_message (MEMORY_DROP_USER_MESSAGE=1) the legacy user_message
+    metadata, which the stored document already holds, is dropped as well.
+    Each rewrite is built beside the original, which is only renamed aside and deleted once the copy is in place,
+    so an interrupted run is finished or rolled back by the next one. Unlike prune_memory.py, no turn is removed.
+    """
+    console = Console()
+    persist_dir = persist_dir or os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+    dimensions = dimensions or int(os.getenv("MEMORY_EMBEDDING_DIMENSIONS") or 512)
+    quantize = os.getenv("MEMORY_QUANTIZE") == "1" if quantize is None else quantize
+    if drop_user_message is None:
+        drop_user_message = os.getenv("MEMORY_DROP_USER_MESSAGE") == "1"
+
+    totals = {"partitions": 0, "turns": 0, "before_bytes": 0, "after_bytes": 0}
+    sample_ids, sample_vectors = [], []
+    for partition_dir in partition_dirs(persist_dir):
+        chroma_client = chromadb.PersistentClient(path=partition_dir)
+        for name in _partition_collections(chroma_client, collection_name):
+            shrunk = _shrink_collection(chroma_client, name, dimensions, drop_user_message, batch_size,
+                                        sample_size - len(sample_ids))
+            if shrunk is None:
+                console.print(f"[yellow]{partition_dir}/{name} already has {dimensions} dimensions or fewer.[/yellow]")
+                continue
+            totals["partitions"] += 1
+            totals["turns"] += shrunk["turns"]
+            totals["before_bytes"] += shrunk["before_bytes"]
+            totals["after_bytes"] += shrunk["after_bytes"]
+            sample_ids.extend(shrunk["sample_ids"])
+            sample_vectors.extend(shrunk["sample_vectors"])
+
+    if not totals["partitions"]:
+        console.print(f"[yellow]No conversations to shrink in {persist_dir}.[/yellow]")
+        return {}
+
+    turns = totals["turns"]
+    full_dimensions = len(sample_vectors[0]) if sample_vectors else 0
+    report = {
+        "partitions": totals["partitions"],
+        "turns": turns,
+        "dimensions": (full_dimensions, dimensions),
+        "bytes_per_turn": (totals["before_bytes"] / max(turns, 1), totals["after_bytes"] / max(turns, 1)),
+        "index_bytes_per_turn": (full_dimensions * 4 + 4, dimensions + 8 if quantize else dimensions * 4 + 4),
+        "recall": _recall(sample_ids, np.asarray(sample_vectors), dimensions, quantize, top_k)
+    }
+
+    table = Table(title=f"Shrink Embeddings ({turns} turns in {totals['partitions']} partitions)")
+    table.add_column("Metric", style="cyan")
+    table.add_column("Before", justify="right")
+    table.add_column("After", style="green", justify="right")
+    table.add_row("Dimensions", *map(str, report["dimensions"]))
+    table.add_row("Stored bytes/turn", *(f"{value:,.0f}" for value in report["bytes_per_turn"]))
+    table.add_row("Hot index bytes/turn" + (" (int8)" if quantize else ""),
+                  *(f"{value:,}" for value in report["index_bytes_per_turn"]))
+    table.add_row(f"Recall@{top_k}", "100.0%", f"{report['recall']:.1%}")
+    console.print(table)
+    console.print(f"[dim]Set MEMORY_EMBEDDING_DIMENSIONS={dimensions} so new turns match the shrunk store.[/dim]")
+    return report
+
+
+def _shrink_collection(chroma_client, name: str, dimensions: int, drop_user_message: bool, batch_size: int,
+                       sample_size: int) -> Optional[dict]:
+    """Rewrite one collection in place; None when its embeddings are already short enough"""
+    source = chroma_client.get_collection(name)
+    copy = chroma_client.get_or_create_collection(name + SHRINK_SUFFIX)
+
+    stats = {"turns": source.count(), "before_bytes": 0, "after_bytes": 0, "sample_ids": [], "sample_vectors": []}
+    for offset in range(0, stats["turns"], batch_size):
+        batch = source.get(offset=offset, limit=batch_size, include=["embeddings", "documents", "metadatas"])
+        vectors = np.asarray(batch["embeddings"], dtype=np.float32)
+        if vectors.shape[1] <= dimensions:
+            chroma_client.delete_collection(copy.name)
+            return None
+
+        shortened = _shorten(vectors, dimensions)
+        metadatas = batch["metadatas"]
+        if drop_user_message:
+            metadatas = [{key: value for key, value in metadata.items() if key != "user_message"}
+                         for metadata in metadatas]
+        copy.upsert(ids=batch["ids"], embeddings=shortened, documents=batch["documents"], metadatas=metadatas)
+
+        stats["before_bytes"] += vectors.nbytes + _record_bytes(batch["documents"], batch["metadatas"])
+        stats["after_bytes"] += shortened.nbytes + _record_bytes(batch["documents"], metadatas)
+        if len(stats["sample_ids"]) < sample_size:
+            stats["sample_ids"].extend(batch["ids"][:sample_size - len(stats["sample_ids"])])
+            stats["sample_vectors"].extend(vectors[:sample_size - len(stats["sample_vectors"])])
+
+    # Rename the original aside before the copy takes its name and delete it last, so a crash at any point
+    # leaves either collection intact for _partition_collections to recover
+    source.modify(name=name + OLD_SUFFIX)
+    copy.modify(name=name)
+    chroma_client.delete_collection(name + OLD_SUFFIX)
+    return stats
+
+
+def _partition_collections(chroma_client, collection_name: str) -> List[str]:
+    """
+    The conversation collections in one persist dir: the shared one and, under MEMORY_PARTITION=collection,
+    each user's. Leftovers of an interrupted run are resolved first: a half-built copy is discarded and an
+    original that was renamed aside is deleted if its copy took over, or restored if it did not.
+    """
+    names = {getattr(collection, "name", collection) for collection in chroma_client.list_collections()}
+    for name in sorted(names):
+        if name.endswith(SHRINK_SUFFIX) and is_partition(name[:-len(SHRINK_SUFFIX)], collection_name):
+            chroma_client.delete_collection(name)
+            names.discard(name)
+    for name in sorted(names):
+        base = name[:-len(OLD_SUFFIX)]
+        if name.endswith(OLD_SUFFIX) and is_partition(base, collection_name):
+            if base in names:
+                chroma_client.delete_collection(name)
+            else:
+                chroma_client.get_collection(name).modify(name=base)
+                names.add(base)
+            names.discard(name)
+    return sorted(name for name in names if is_partition(name, collection_name))
+
+
+def _shorten(vectors: np.ndarray, dimensions: int) -> np.ndarray:
+    shortened = vectors[:, :dimensions]
+    return shortened / np.maximum(np.linalg.norm(shortened, axis=1, keepdims=True), 1e-12)
+
+
+def _record_bytes(documents: list, metadatas: list) -> int:
+    return sum(len(document.encode()) + len(json.dumps(metadata).encode())
+               for document, metadata in zip(documents, metadatas))
+
+
+def _recall(ids: list, vectors: np.ndarray, dimensions: int, quantize: bool, top_k: int) -> float:
+    """Share of each sampled turn's full-precision top-k neighbours that the shortened index also returns"""
+    if len(ids) <= top_k:
+        return 1.0
+    index = VectorIndex(quantize=quantize)
+    results = [{"content": turn_id, "turn_number": 0, "timestamp": ""} for turn_id in ids]
+    index.warm("sample", list(zip(ids, _shorten(vectors, dimensions), results)))
+
+    norms = (vectors ** 2).sum(axis=1)
+    found = 0
+    for row, query in enumerate(vectors):
+        distances = norms - 2 * (vectors @ query)
+        distances[row] = np.inf
+        expected = {ids[i] for i in np.argsort(distances)[:top_k]}
+        returned = index.search("sample", _shorten(query[None], dimensions)[0], top_k + 1)
+        found += len(expected & {result["content"] for result in returned if result["content"] != ids[row]})
+    return found / (len(ids) * top_k)
+
+
+if __name__ == "__main__":
+    shrink_embeddings()
@@ -0,0 +1,134 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from typing import Optional
+
+# How often an async waiter that is not at the head of the queue checks again
+ASYNC_POLL_INTERVAL = 0.005
+
+
+class ApiScheduler:
+    """
+    Client-side quota for API calls: token buckets for requests and estimated tokens per minute, drained
+    by one priority queue (lowest priority number first, FIFO within a priority). Only the head of the
+    queue may take budget, so background work never starves a classifier call that arrives behind it.
+    When max_queue calls are already waiting, new ones are turned away instead of queued.
+    """
+
+    def __init__(self, requests_per_minute: Optional[int] = None, tokens_per_minute: Optional[int] = None,
+                 max_queue: int = 256):
+        self.max_queue = max_queue
+        # Each bucket is [level, capacity, refill per second]
+        self._requests = self._bucket(requests_per_minute)
+        self._tokens = self._bucket(tokens_per_minute)
+        self._waiting = []
+        self._sequence = itertools.count()
+        self._refilled = time.monotonic()
+        self._condition = threading.Condition()
+        self.stats = {"admitted": 0, "rejected": 0, "throttled": 0, "upstream_limited": 0}
+        self.queue_wait = {}
+
+    @property
+    def queue_depth(self) -> int:
+        with self._condition:
+            return len(self._waiting)
+
+    def acquire(self, priority: int, tokens: int = 1, call_type: str = "default") -> Optional[float]:
+        """Block until the call may go; returns the seconds it waited, or None if the queue was full"""
+        with self._condition:
+            ticket = self._enqueue(priority)
+            if ticket is None:
+                return None
+            start = time.monotonic()
+            try:
+                while True:
+                    delay = self._ready_in(ticket, tokens)
+                    if delay == 0:
+                        break
+                    self._condition.wait(delay)
+            except BaseException:
+                # Interrupted while waiting (e.g. Ctrl-C): free the slot so the calls queued behind can go
+                if ticket in self._waiting:
+                    self._leave(ticket)
+                raise
+            return self._record(call_type, time.monotonic() - start)
+
+    async def acquire_async(self, priority: int, tokens: int = 1, call_type: str = "default") -> Optional[float]:
+        """acquire() for the event loop: waits by sleeping instead of blocking the thread"""
+        with self._condition:
+            ticket = self._enqueue(priority)
+            if ticket is None:
+                return None
+        start = time.monotonic()
+        try:
+            while True:
+                with self._condition:
+                    delay = self._ready_in(ticket, tokens)
+                if delay == 0:
+                    break
+                await asyncio.sleep(delay or ASYNC_POLL_INTERVAL)
+        except asyncio.CancelledError:
+            with self._condition:
+                self._leave(ticket)
+            raise
+        with self._condition:
+            return self._record(call_type, time.monotonic() - start)
+
+    def throttle(self):
+        """The server answered 429: empty the buckets so queued calls wait for them to refill"""
+        with self._condition:
+            for bucket in filter(None, (self._requests, self._tokens)):
+                bucket[0] = 0.0
+            self.stats["upstream_limited"] += 1
+
+    def _enqueue(self, priority: int) -> Optional[tuple]:
+        if len(self._waiting) >= self.max_queue:
+            self.stats["rejected"] += 1
+            return None
+        ticket = (priority, next(self._sequence))
+        heapq.heappush(self._waiting, ticket)
+        return ticket
+
+    def _ready_in(self, ticket: tuple, tokens: int) -> Optional[float]:
+        """
+        Seconds until ticket can go, None while it is not at the head of the queue, or 0 once it has taken
+        its budget and left the queue
+        """
+        if self._waiting[0] != ticket:
+            return None
+        self._refill()
+        costs = [(bucket, min(cost, bucket[1])) for bucket, cost in ((self._requests, 1), (self._tokens, tokens))
+                 if bucket]
+        delay = max([(cost - bucket[0]) / bucket[2] for bucket, cost in costs] + [0.0])
+        if delay > 0:
+            return delay
+        for bucket, cost in costs:
+            bucket[0] -= cost
+        self._leave(ticket)
+        return 0
+
+    def _leave(self, ticket: tuple):
+        self._waiting.remove(ticket)
+        heapq.heapify(self._waiting)
+        self._condition.notify_all()
+
+    def _refill(self):
+        now = time.monotonic()
+        for bucket in filter(None, (self._requests, self._tokens)):
+            bucket[0] = min(bucket[1], bucket[0] + (now - self._refilled) * bucket[2])
+        self._refilled = now
+
+    @staticmethod
+    def _bucket(per_minute: Optional[int]) -> Optional[list]:
+        return [float(per_minute), float(per_minute), per_minute / 60.0] if per_minute else None
+
+    def _record(self, call_type: str, waited: float) -> float:
+        metrics = self.queue_wait.setdefault(call_type, {"calls": 0, "total_wait": 0.0, "max_wait": 0.0})
+        metrics["calls"] += 1
+        metrics["total_wait"] += waited
+        metrics["max_wait"] = max(metrics["max_wait"], waited)
+        self.stats["admitted"] += 1
+        self.stats["throttled"] += waited > 0.001
+        return waited
@@ -0,0 +1,161 @@
+import json
+import os
+from typing import Dict, Optional, Union
+
+import httpx
+from openai import AsyncOpenAI, OpenAI
+
+from src.api_scheduler import ApiScheduler
+from src.token_counter import count_message_tokens, count_tokens
+
+CLASSIFIER_CALL = "classifier"
+STREAM_CALL = "stream"
+EMBEDDING_CALL = "embedding"
+# Embeddings no turn waits on: write-behind batches, bulk ingestion and roll-ups
+BACKGROUND_EMBEDDING_CALL = "background_embedding"
+BACKGROUND_CALL = "background"
+# Read timeouts in seconds; for streams this bounds the gap between chunks, not the whole reply
+DEFAULT_TIMEOUTS = {CLASSIFIER_CALL: 5.0, STREAM_CALL: 30.0, EMBEDDING_CALL: 15.0, BACKGROUND_EMBEDDING_CALL: 60.0,
+                    BACKGROUND_CALL: 60.0}
+# Scheduling order under a rate limit: turn-blocking calls first, stored-turn embeddings, then summaries and
+# compaction last
+CALL_PRIORITIES = {CLASSIFIER_CALL: 0, STREAM_CALL: 1, EMBEDDING_CALL: 2, BACKGROUND_EMBEDDING_CALL: 3,
+                   BACKGROUND_CALL: 4}
+# Tags each request with its call type for the scheduler; stripped before it is sent
+CALL_TYPE_HEADER = "x-call-type"
+# Completion tokens assumed for chat requests without max_tokens
+DEFAULT_COMPLETION_TOKENS = 256
+
+
+class ApiTransport:
+    """
+    One keep-alive connection pool shared by every agent. client_for() hands out views of the same client
+    with per-call-type timeouts; failed requests are retried by the SDK with jittered exponential backoff.
+    With a scheduler, every request first waits for rate-limit budget in call-type priority order.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, base_url: Optional[str] = None,
+                 timeouts: Optional[Dict[str, float]] = None, connect_timeout: float = 3.0, max_retries: int = 2,
+                 max_connections: int = 32, max_keepalive: int = 16, keepalive_expiry: float = 60.0,
+                 scheduler: Optional[ApiScheduler] = None, asynchronous: bool = False):
+        self.timeouts = {**DEFAULT_TIMEOUTS, **(timeouts or {})}
+        self.connect_timeout = connect_timeout
+        self.scheduler = scheduler
+        limits = httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_keepalive,
+                              keepalive_expiry=keepalive_expiry)
+        if asynchronous:
+            http_class, client_class = httpx.AsyncClient, AsyncOpenAI
+            transport = httpx.AsyncHTTPTransport(limits=limits)
+            transport = AsyncScheduledTransport(transport, scheduler) if scheduler else transport
+        else:
+            http_class, client_class = httpx.Client, OpenAI
+            transport = httpx.HTTPTransport(limits=limits)
+            transport = ScheduledTransport(transport, scheduler) if scheduler else transport
+        self.http_client = http_class(transport=transport, timeout=self.timeout(STREAM_CALL))
+        self.client = client_class(api_key=api_key, base_url=base_url, http_client=self.http_client,
+                                   max_retries=max_retries, timeout=self.timeout(STREAM_CALL))
+        self._clients = {}
+
+    @classmethod
+    def from_env(cls, asynchronous: bool = False) -> "ApiTransport":
+        """
+        Build a transport from OPENAI_API_KEY, OPENAI_BASE_URL, OPENAI_CLASSIFIER_TIMEOUT, OPENAI_STREAM_TIMEOUT,
+        OPENAI_EMBEDDING_TIMEOUT, OPENAI_BACKGROUND_EMBEDDING_TIMEOUT, OPENAI_BACKGROUND_TIMEOUT, OPENAI_MAX_RETRIES,
+        OPENAI_MAX_CONNECTIONS and, to schedule calls under a client-side limit, OPENAI_RPM, OPENAI_TPM and
+        OPENAI_MAX_QUEUE
+        """
+        timeouts = {call_type: float(os.getenv(f"OPENAI_{call_type.upper()}_TIMEOUT"))
+                    for call_type in DEFAULT_TIMEOUTS if os.getenv(f"OPENAI_{call_type.upper()}_TIMEOUT")}
+        max_connections = int(os.getenv("OPENAI_MAX_CONNECTIONS") or 32)
+        requests_per_minute = int(os.getenv("OPENAI_RPM") or 0)
+        tokens_per_minute = int(os.getenv("OPENAI_TPM") or 0)
+        scheduler = None
+        if requests_per_minute or tokens_per_minute:
+            scheduler = ApiScheduler(requests_per_minute or None, tokens_per_minute or None,
+                                     int(os.getenv("OPENAI_MAX_QUEUE") or 256))
+        return cls(api_key=os.getenv("OPENAI_API_KEY"), base_url=os.getenv("OPENAI_BASE_URL") or None,
+                   timeouts=timeouts, max_retries=int(os.getenv("OPENAI_MAX_RETRIES") or 2),
+                   max_connections=max_connections, max_keepalive=max_connections // 2, scheduler=scheduler,
+                   asynchronous=asynchronous)
+
+    def client_for(self, call_type: str) -> Union[OpenAI, AsyncOpenAI]:
+        """The shared client with call_type's timeout and priority; all views use the same connection pool"""
+        if call_type not in self._clients:
+            self._clients[call_type] = self.client.with_options(timeout=self.timeout(call_type),
+                                                                default_headers={CALL_TYPE_HEADER: call_type})
+        return self._clients[call_type]
+
+    def timeout(self, call_type: str) -> httpx.Timeout:
+        return httpx.Timeout(self.timeouts[call_type], connect=self.connect_timeout)
+
+    def close(self):
+        """Close the pool; await the result for an asynchronous transport"""
+        return self.client.close()
+
+
+class ScheduledTransport(httpx.BaseTransport):
+    """Waits for the scheduler before each request; a full queue is answered locally with a 429"""
+
+    def __init__(self, transport: httpx.BaseTransport, scheduler: ApiScheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        call_type = _call_type(request)
+        waited = self.scheduler.acquire(CALL_PRIORITIES[call_type], _estimate_tokens(request), call_type)
+        if waited is None:
+            return _rejected(request)
+        response = self.transport.handle_request(request)
+        if response.status_code == 429:
+            self.scheduler.throttle()
+        return response
+
+    def close(self):
+        self.transport.close()
+
+
+class AsyncScheduledTransport(httpx.AsyncBaseTransport):
+    """ScheduledTransport for the asynchronous client"""
+
+    def __init__(self, transport: httpx.AsyncBaseTransport, scheduler: ApiScheduler):
+        self.transport = transport
+        self.scheduler = scheduler
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        call_type = _call_type(request)
+        waited = await self.scheduler.acquire_async(CALL_PRIORITIES[call_type], _estimate_tokens(request), call_type)
+        if waited is None:
+            return _rejected(request)
+        response = await self.transport.handle_async_request(request)
+        if response.status_code == 429:
+            self.scheduler.throttle()
+        return response
+
+    async def aclose(self):
+        await self.transport.aclose()
+
+
+def _call_type(request: httpx.Request) -> str:
+    """The request's call type, removing the header; untagged requests are background work"""
+    call_type = request.headers.pop(CALL_TYPE_HEADER, BACKGROUND_CALL)
+    return call_type if call_type in CALL_PRIORITIES else BACKGROUND_CALL
+
+
+def _estimate_tokens(request: httpx.Request) -> int:
+    """Tokens the request counts against a TPM limit: its prompt plus the completion it may produce"""
+    try:
+        body = json.loads(request.content or b"{}")
+    except ValueError:
+        return 1
+    if "messages" in body:
+        messages = [{"content": str(message.get("content") or "")} for message in body["messages"]]
+        completion = body.get("max_tokens") or body.get("max_completion_tokens") or DEFAULT_COMPLETION_TOKENS
+        return count_message_tokens(messages) + completion
+    inputs = body.get("input", "")
+    return sum(count_tokens(str(text)) for text in (inputs if isinstance(inputs, list) else [inputs])) or 1
+
+
+def _rejected(request: httpx.Request) -> httpx.Response:
+    """Local backpressure: a 429 the SDK retries after its usual backoff"""
+    return httpx.Response(429, json={"error": {"message": "Client-side request queue is full",
+                                               "type": "rate_limit_exceeded"}}, request=request)
@@ -0,0 +1,46 @@
+from typing import Optional
+
+from src.chat_agent import ChatAgent
+
+
+class AsyncChatAgent(ChatAgent):
+    """ChatAgent twin that awaits an AsyncOpenAI client, streaming through an async generator"""
+    
+    async def respond(self, user_input: str, history: Optional[list] = None) -> str:
+        """Generate a response to user input, optionally sending a prepared history instead of our own"""
+        self._apply_summary()
+        messages = self._messages(user_input, history)
+        self.conversation_history.append({"role": "user", "content": user_input})
+        
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=messages
+        )
+        
+        self.prompt_cache.record(response.usage)
+        bot_message = response.choices[0].message.content
+        self.conversation_history.append({"role": "assistant", "content": bot_message})
+        self._compact_history()
+        
+        return bot_message
+    
+    async def open_stream(self, user_input: str, history: Optional[list] = None):
+        """Start a streaming completion for user input without recording the turn"""
+        return await self.client.chat.completions.create(**self._stream_request(user_input, history))
+    
+    async def respond_stream(self, user_input: str, stream=None):
+        """Generate a streaming response to user input, optionally consuming a stream from open_stream()"""
+        self._apply_summary()
+        if stream is None:
+            stream = await self.open_stream(user_input)
+        self.conversation_history.append({"role": "user", "content": user_input})
+        
+        parts = []
+        async for chunk in stream:
+            content = self._chunk_content(chunk)
+            if content is not None:
+                parts.append(content)
+                yield content
+        
+        self.conversation_history.append({"role": "assistant", "content": "".join(parts)})
+        self._compact_history()
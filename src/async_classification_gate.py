@@ -0,0 +1,46 @@
+import asyncio
+import time
+
+from src.async_intent_classifier import AsyncIntentClassifier
+from src.classification_gate import ClassificationGate, EXIT, UNSAFE, SAFE
+
+
+class AsyncClassificationGate(ClassificationGate):
+    """ClassificationGate twin that runs AsyncIntentClassifiers as concurrent tasks on the event loop"""
+
+    def __init__(self, exit_classifier: AsyncIntentClassifier, security_classifier: AsyncIntentClassifier):
+        # No super().__init__(): the base would start a thread pool that tasks on the event loop never use
+        self.exit_classifier = exit_classifier
+        self.security_classifier = security_classifier
+        self.executor = None
+        self.last_time_saved = 0.0
+        self.stats = {"turns": 0, "early_exits": 0, "time_saved": 0.0}
+
+    async def check(self, user_input: str) -> str:
+        """
+        Classify user input and return EXIT, UNSAFE or SAFE.
+        Exit takes precedence: once exit comes back '1' the security call is cancelled.
+        """
+        start = time.perf_counter()
+        exit_task = asyncio.create_task(self._timed(self.exit_classifier, user_input))
+        security_task = asyncio.create_task(self._timed(self.security_classifier, user_input))
+
+        try:
+            exit_verdict, exit_elapsed = await exit_task
+        except BaseException:
+            security_task.cancel()
+            raise
+        if exit_verdict:
+            security_task.cancel()
+            self._record(start, exit_elapsed)
+            self.stats["early_exits"] += 1
+            return EXIT
+
+        security_verdict, security_elapsed = await security_task
+        self._record(start, exit_elapsed + security_elapsed)
+        return SAFE if security_verdict else UNSAFE
+
+    @staticmethod
+    async def _timed(classifier: AsyncIntentClassifier, user_input: str) -> tuple:
+        start = time.perf_counter()
+        return await classifier.is_positive(user_input), time.perf_counter() - start
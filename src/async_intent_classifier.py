@@ -0,0 +1,28 @@
+from src.intent_classifier import IntentClassifier
+
+
+class AsyncIntentClassifier(IntentClassifier):
+    """IntentClassifier twin that awaits an AsyncOpenAI client"""
+    
+    async def classify(self, user_input: str) -> str:
+        """
+        Classify user input and return the binary result.
+        Returns '0' or '1' based on the classification.
+        """
+        verdict = self._cached(user_input)
+        if verdict is None and self.pre_classifier:
+            verdict = self.pre_classifier.settle(user_input)
+        if verdict is None:
+            response = await self._create(self._request(user_input))
+            self.prompt_cache.record(response.usage)
+            verdict = self._remember(user_input, response.choices[0].message.content.strip())
+        return verdict
+    
+    async def is_positive(self, user_input: str) -> bool:
+        """Classify and return True if result is '1' (positive case)"""
+        return await self.classify(user_input) == "1"
+    
+    async def _create(self, request: dict):
+        if self.hedger:
+            return await self.hedger.call_async(self.client.chat.completions.create, **request)
+        return await self.client.chat.completions.create(**request)
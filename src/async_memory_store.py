@@ -0,0 +1,108 @@
+import asyncio
+from typing import Iterable, List, Dict, Optional
+
+from openai import AsyncOpenAI
+
+from src.memory_store import MemoryStore
+
+
+class AsyncMemoryStore(MemoryStore):
+    """
+    MemoryStore twin that awaits AsyncOpenAI embeddings and runs ChromaDB calls off the event loop. Every method
+    that reaches the API is a coroutine here; the store can't be handed to a threaded MemoryCompactor.
+    """
+    
+    async def store_turn(self, session_id: str, turn_number: int, user_message: str, assistant_message: str,
+                         embedding: Optional[List[float]] = None, user_id: Optional[str] = None):
+        """
+        Store a conversation turn (user + assistant pair), reusing the user message embedding if given.
+        With write-behind the turn is queued and written in a background batch.
+        """
+        if embedding is None:
+            embedding = await self.embed(user_message, background=True)
+        turn = self._turn(session_id, turn_number, user_message, assistant_message, embedding, user_id)
+        self._index_turn(turn)
+        if self.writer:
+            self.writer.enqueue(turn)
+        else:
+            await asyncio.to_thread(self._write_turns, [turn])
+    
+    async def store_turns(self, turns: Iterable[dict], batch_size: int = 256) -> int:
+        """Bulk-load turns like MemoryStore.store_turns, awaiting each batch's embeddings"""
+        stored = 0
+        for batch in self._batched(turns, batch_size):
+            records = self._bulk_records(batch)
+            missing = [record for record in records if record["embedding"] is None]
+            embeddings = await self.embed_many([record["user_message"] for record in missing], background=True)
+            for record, embedding in zip(missing, embeddings):
+                record["embedding"] = embedding
+            await asyncio.to_thread(self.collection.upsert, **self._turn_records(records))
+            for record in records:
+                self._index_turn(record)
+            stored += len(records)
+        await asyncio.to_thread(self.refresh_corpus_size)
+        return stored
+    
+    async def retrieve_relevant(self, query: str, top_k: int = 3, session_id: str = None,
+                                query_embedding: Optional[List[float]] = None,
+                                user_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve top-k most relevant conversation turns (optionally filtered by session or user).
+        Session queries are served from the hot in-process index when one is configured.
+        """
+        if session_id and self.hot_index is not None:
+            if session_id not in self.hot_index:
+                await asyncio.to_thread(self._warm_session, session_id)
+            if query_embedding is None:
+                query_embedding = await self.embed(query)
+            return self.hot_index.search(session_id, query_embedding, top_k) or []
+        
+        pending = self._pending_turns(session_id, user_id)
+        count = self.corpus_size
+        if count == 0 and not pending:
+            return []
+        
+        if query_embedding is None:
+            query_embedding = await self.embed(query)
+        
+        relevant_turns = []
+        if count:
+            query_params = self._query_params(query_embedding, top_k, session_id, count, user_id)
+            results = await asyncio.to_thread(self.collection.query, **query_params)
+            relevant_turns = self._parse_results(results)
+        return self._merge_pending(relevant_turns, pending, query_embedding, top_k)
+    
+    async def embed(self, text: str, background: bool = False) -> List[float]:
+        """Embed text, reusing cached vectors for text embedded before"""
+        return (await self.embed_many([text], background))[0]
+    
+    async def embed_many(self, texts: List[str], background: bool = False) -> List[List[float]]:
+        """
+        Embed texts with one batched API request for those not already cached; the cache's SQLite I/O runs off
+        the loop
+        """
+        keys = ([self.embedding_cache.key(self._embedding_model, text) for text in texts]
+                if self.embedding_cache else None)
+        embeddings = await asyncio.to_thread(self._cached, keys) if keys else [None] * len(texts)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            generated = await self._generate_embeddings([texts[i] for i in missing],
+                                                        self.background_client if background else None)
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+            if keys:
+                await asyncio.to_thread(self.embedding_cache.put_many, [keys[i] for i in missing], generated)
+        return embeddings
+    
+    async def _generate_embedding(self, text: str) -> List[float]:
+        """Generate embedding using OpenAI API"""
+        return (await self._generate_embeddings([text]))[0]
+    
+    async def _generate_embeddings(self, texts: List[str], client: Optional[AsyncOpenAI] = None) -> List[List[float]]:
+        response = await (client or self.client).embeddings.create(
+            **self._embedding_request(texts if len(texts) > 1 else texts[0]))
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
+    
+    def _cached(self, keys: List[str]) -> list:
+        return [self.embedding_cache.get(key) for key in keys]
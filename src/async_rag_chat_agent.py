@@ -0,0 +1,103 @@
+from openai import AsyncOpenAI
+from typing import List, Optional
+
+from src.async_chat_agent import AsyncChatAgent
+from src.async_memory_store import AsyncMemoryStore
+from src.context_builder import ContextBuilder
+from src.history_manager import HistoryManager
+from src.rag_chat_agent import RAGChatAgent, GLOBAL_SCOPE
+from src.response_cache import ResponseCache
+from src.retrieval_gate import RetrievalGate
+
+
+class AsyncRAGChatAgent(RAGChatAgent):
+    """RAGChatAgent twin built on AsyncChatAgent and AsyncMemoryStore"""
+    
+    def __init__(self, client: AsyncOpenAI, model: str, session_id: str,
+                 memory_store: Optional[AsyncMemoryStore] = None,
+                 top_k: int = 3, recent_turns: int = 2,
+                 scope: str = GLOBAL_SCOPE, user_id: Optional[str] = None,
+                 context_builder: Optional[ContextBuilder] = None,
+                 history_manager: Optional[HistoryManager] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 retrieval_gate: Optional[RetrievalGate] = None):
+        super().__init__(client, model, session_id, memory_store or AsyncMemoryStore(client), top_k, recent_turns,
+                         scope, user_id, context_builder, history_manager, response_cache, retrieval_gate)
+        self.chat_agent = AsyncChatAgent(client, model, history_manager)
+    
+    async def respond(self, user_input: str) -> str:
+        """Generate response with memory-augmented context"""
+        query_embedding = (await self._prepare(user_input))["embedding"]
+        cached = self._cached_reply(user_input, query_embedding)
+        if cached is not None:
+            replay = self.chat_agent.respond_stream(user_input, self._replay(cached))
+            response = "".join([chunk async for chunk in replay])
+        else:
+            relevant_memories = await self.retrieve(user_input)
+            response = await self.chat_agent.respond(user_input, self._build_context(relevant_memories, user_input))
+            self._cache_reply(user_input, response)
+        
+        self.turn_counter += 1
+        await self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, response,
+                                           embedding=query_embedding, user_id=self.user_id)
+        self._prepared = None
+        
+        return response
+    
+    async def embed_query(self, user_input: str) -> Optional[List[float]]:
+        """Gate the turn and embed user_input if retrieval or the response cache will use it"""
+        retrieve = self._should_retrieve(user_input)
+        query_embedding = await self.memory_store.embed(user_input) if retrieve or self._cacheable() else None
+        self._prepared = {"input": user_input, "retrieve": retrieve, "embedding": query_embedding, "memories": None}
+        return query_embedding
+    
+    async def retrieve(self, user_input: str) -> list:
+        """Memories for user_input (none when the gate skipped it), reusing any earlier lookup for the same input"""
+        prepared = await self._prepare(user_input)
+        if prepared["memories"] is None:
+            memories = []
+            if prepared["retrieve"]:
+                memories = await self.memory_store.retrieve_relevant(
+                    user_input,
+                    self.top_k,
+                    query_embedding=prepared["embedding"],
+                    **self._scope_filter()
+                )
+            prepared["memories"] = memories
+        return prepared["memories"]
+    
+    async def open_stream(self, user_input: str):
+        """Start a memory-augmented completion stream without recording the turn, or replay a cached answer"""
+        query_embedding = (await self._prepare(user_input))["embedding"]
+        cached = self._cached_reply(user_input, query_embedding)
+        if cached is not None:
+            return self._replay(cached)
+        relevant_memories = await self.retrieve(user_input)
+        return await self.chat_agent.open_stream(user_input, self._build_context(relevant_memories, user_input))
+    
+    async def respond_stream(self, user_input: str, stream=None):
+        """Generate streaming response with memory-augmented context, optionally from open_stream()"""
+        if stream is None:
+            stream = await self.open_stream(user_input)
+        
+        parts = []
+        async for chunk in self.chat_agent.respond_stream(user_input, stream):
+            parts.append(chunk)
+            yield chunk
+        full_response = "".join(parts)
+        
+        self._cache_reply(user_input, full_response)
+        self.turn_counter += 1
+        await self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, full_response,
+                                           embedding=self._embedding_for(user_input), user_id=self.user_id)
+        self._prepared = None
+    
+    async def _prepare(self, user_input: str) -> dict:
+        if not self._current(user_input):
+            await self.embed_query(user_input)
+        return self._prepared
+    
+    @staticmethod
+    async def _replay(chunks: list):
+        for chunk in chunks:
+            yield chunk
@@ -1,43 +1,90 @@
 from openai import OpenAI
+from typing import Optional
+
+from src.history_manager import HistoryManager
+from src.prompt_cache_stats import PromptCacheStats
 
 
 class ChatAgent:
     """Agent responsible for conversational interactions"""
     
-    def __init__(self, client: OpenAI, model: str):
+    def __init__(self, client: OpenAI, model: str, history_manager: Optional[HistoryManager] = None):
         self.client = client
         self.model = model
+        self.history_manager = history_manager
+        self.prompt_cache = PromptCacheStats()
         self.conversation_history = []
     
-    def respond(self, user_input: str) -> str:
-        """Generate a response to user input"""
+    def respond(self, user_input: str, history: Optional[list] = None) -> str:
+        """Generate a response to user input, optionally sending a prepared history instead of our own"""
+        self._apply_summary()
+        messages = self._messages(user_input, history)
         self.conversation_history.append({"role": "user", "content": user_input})
         
         response = self.client.chat.completions.create(
             model=self.model,
-            messages=self.conversation_history
+            messages=messages
         )
         
+        self.prompt_cache.record(response.usage)
         bot_message = response.choices[0].message.content
         self.conversation_history.append({"role": "assistant", "content": bot_message})
+        self._compact_history()
         
         return bot_message
     
-    def respond_stream(self, user_input: str):
-        """Generate a streaming response to user input"""
+    def open_stream(self, user_input: str, history: Optional[list] = None):
+        """Start a streaming completion for user input without recording the turn"""
+        return self.client.chat.completions.create(**self._stream_request(user_input, history))
+    
+    def respond_stream(self, user_input: str, stream=None):
+        """Generate a streaming response to user input, optionally consuming a stream from open_stream()"""
+        self._apply_summary()
+        if stream is None:
+            stream = self.open_stream(user_input)
         self.conversation_history.append({"role": "user", "content": user_input})
         
-        stream = self.client.chat.completions.create(
-            model=self.model,
-            messages=self.conversation_history,
-            stream=True
-        )
-        
-        bot_message = ""
+        parts = []
         for chunk in stream:
-            if chunk.choices[0].delta.content is not None:
-                content = chunk.choices[0].delta.content
-                bot_message += content
+            content = self._chunk_content(chunk)
+            if content is not None:
+                parts.append(content)
                 yield content
         
-        self.conversation_history.append({"role": "assistant", "content": bot_message})
+        self.conversation_history.append({"role": "assistant", "content": "".join(parts)})
+        self._compact_history()
+    
+    def summary_messages(self) -> list:
+        """Running summary of turns that slid out of the history window"""
+        return self.history_manager.summary_messages() if self.history_manager else []
+    
+    def _messages(self, user_input: str, history: Optional[list] = None) -> list:
+        """Stable content first (summary, then history) so successive requests share a cacheable prefix"""
+        if history is None:
+            history = self.summary_messages() + self.conversation_history
+        return history + [{"role": "user", "content": user_input}]
+    
+    def _apply_summary(self):
+        """Swap in a finished summary here, on the thread that owns the history, never on the summarizer's"""
+        if self.history_manager:
+            self.conversation_history = self.history_manager.apply(self.conversation_history)
+    
+    def _compact_history(self):
+        if self.history_manager:
+            self.history_manager.compact(self.conversation_history)
+    
+    def _stream_request(self, user_input: str, history: Optional[list] = None) -> dict:
+        return {
+            "model": self.model,
+            "messages": self._messages(user_input, history),
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }
+    
+    def _chunk_content(self, chunk) -> Optional[str]:
+        """Text of a stream chunk; the closing usage chunk has no choices and is only recorded"""
+        if chunk.usage is not None:
+            self.prompt_cache.record(chunk.usage)
+        if not chunk.choices:
+            return None
+        return chunk.choices[0].delta.content
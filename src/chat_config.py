@@ -0,0 +1,67 @@
+import os
+from typing import Optional
+
+from src.classification_cache import ClassificationCache
+from src.distilled_classifier import DistilledClassifier, VerdictLog
+from src.embedding_cache import EmbeddingCache
+from src.pre_classifier import PreClassifier, KeywordPreClassifier
+from src.response_cache import ResponseCache
+from src.vector_index import VectorIndex
+
+
+def local_classifier_from_env(name: str, patterns: dict) -> Optional[PreClassifier]:
+    """
+    With the fast path enabled, the distilled model if one was trained for this classifier, else the keyword
+    patterns; None when CLASSIFIER_FAST_PATH is off
+    """
+    mode = (os.getenv("CLASSIFIER_FAST_PATH") or "").strip().lower()
+    if mode not in ("on", "1", "shadow"):
+        return None
+    distill_dir = os.getenv("CLASSIFIER_DISTILL_DIR")
+    model_path = os.path.join(distill_dir, f"{name}.npz") if distill_dir else None
+    
+    if model_path and os.path.exists(model_path):
+        return DistilledClassifier.load(model_path, shadow=mode == "shadow")
+    return KeywordPreClassifier(patterns, shadow=mode == "shadow")
+
+
+def verdict_log_from_env(name: str) -> Optional[VerdictLog]:
+    """Log model verdicts as training data for the distilled classifier"""
+    distill_dir = os.getenv("CLASSIFIER_DISTILL_DIR")
+    if not distill_dir:
+        return None
+    os.makedirs(distill_dir, exist_ok=True)
+    return VerdictLog(os.path.join(distill_dir, f"{name}.jsonl"))
+
+
+def classification_cache_from_env() -> ClassificationCache:
+    """Verdict cache shared by the exit and security classifiers"""
+    return ClassificationCache(
+        max_entries=int(os.getenv("CLASSIFIER_CACHE_SIZE", 1024)),
+        ttl=float(os.getenv("CLASSIFIER_CACHE_TTL")) if os.getenv("CLASSIFIER_CACHE_TTL") else None,
+        persist_path=os.getenv("CLASSIFIER_CACHE_PATH")
+    )
+
+
+def memory_store_options_from_env(persist_dir: str) -> dict:
+    """MemoryStore keyword arguments from the MEMORY_* and EMBEDDING_CACHE_PATH settings"""
+    embedding_cache_path = os.getenv("EMBEDDING_CACHE_PATH") or os.path.join(persist_dir, "embedding_cache.sqlite3")
+    hot_sessions = int(os.getenv("MEMORY_HOT_SESSIONS", "8"))
+    return {
+        "embedding_cache": EmbeddingCache(embedding_cache_path),
+        "write_behind": os.getenv("MEMORY_WRITE_BEHIND", "1") == "1",
+        "hot_index": VectorIndex(hot_sessions, os.getenv("MEMORY_QUANTIZE") == "1") if hot_sessions > 0 else None,
+        "dimensions": int(os.getenv("MEMORY_EMBEDDING_DIMENSIONS") or 0) or None,
+        "drop_user_message": os.getenv("MEMORY_DROP_USER_MESSAGE") == "1"
+    }
+
+
+def response_cache_from_env() -> Optional[ResponseCache]:
+    """Semantic cache for opening questions, if RESPONSE_CACHE_SIMILARITY is set"""
+    if not os.getenv("RESPONSE_CACHE_SIMILARITY"):
+        return None
+    return ResponseCache(
+        min_similarity=float(os.getenv("RESPONSE_CACHE_SIMILARITY")),
+        ttl=float(os.getenv("RESPONSE_CACHE_TTL")) if os.getenv("RESPONSE_CACHE_TTL") else None,
+        max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", 1024))
+    )
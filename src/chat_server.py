@@ -0,0 +1,431 @@
+import asyncio
+import hmac
+import json
+import os
+import time
+from typing import Dict, Optional
+from rich.console import Console
+
+from src.api_transport import ApiTransport, CLASSIFIER_CALL, STREAM_CALL, EMBEDDING_CALL, BACKGROUND_EMBEDDING_CALL
+from src.async_chat_agent import AsyncChatAgent
+from src.async_classification_gate import AsyncClassificationGate
+from src.async_intent_classifier import AsyncIntentClassifier
+from src.async_memory_store import AsyncMemoryStore
+from src.async_rag_chat_agent import AsyncRAGChatAgent
+from src.memory_router import MemoryRouter
+from src.chat_config import (classification_cache_from_env, local_classifier_from_env, memory_store_options_from_env,
+                             response_cache_from_env, verdict_log_from_env)
+from src.chatbot import EXIT_INTENT_PROMPT, SECURITY_INTENT_PROMPT, EXIT_FAST_PATTERNS, SECURITY_FAST_PATTERNS
+from src.classification_gate import EXIT, UNSAFE, SAFE
+from src.context_builder import ContextBuilder
+from src.rag_chat_agent import GLOBAL_SCOPE, USER_SCOPE
+from src.request_hedger import RequestHedger
+from src.retrieval_gate import RetrievalGate
+from src.session_registry import ChatSession, SessionRegistry
+
+GOODBYE = "Goodbye! Have a great day!"
+REFUSAL = "I'm sorry, I can only help with general questions and appropriate conversation topics."
+# Largest request body and user message accepted; anything bigger is refused before it reaches an agent
+MAX_BODY_BYTES = 64 * 1024
+MAX_MESSAGE_CHARS = 8000
+# Most header lines read per request; each line is also capped by the stream reader's limit
+MAX_HEADERS = 100
+# Hosts the server may listen on without SERVER_API_KEYS
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+REASONS = {200: "OK", 201: "Created", 204: "No Content", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+           405: "Method Not Allowed", 413: "Payload Too Large", 431: "Request Header Fields Too Large",
+           500: "Internal Server Error"}
+
+
+class ChatServer:
+    """
+    Asyncio HTTP server hosting many chat sessions at once. Every session has its own agent; all of them
+    share one classification gate, and with memory one store, so N users cost one set of caches and one
+    connection pool. Replies stream as server-sent events.
+
+    With api_keys (key -> user id) every request needs "Authorization: Bearer <key>", sessions belong to
+    the key's user and only that user can reach them. Without keys there is no notion of users: the server
+    is meant for local use only and every session is anonymous.
+
+      POST   /sessions                                -> 201 {"session_id"}
+      POST   /sessions/<id>/messages  {"message"}     -> event stream of token, message and done events
+      DELETE /sessions/<id>                           -> 204
+      GET    /stats                                   -> 200 server, session and classifier counters
+    """
+
+    def __init__(self, gate: AsyncClassificationGate, registry: SessionRegistry, host: str = "127.0.0.1",
+                 port: int = 8000, sweep_interval: float = 60.0, transport: Optional[ApiTransport] = None,
+                 memory_store=None, api_keys: Optional[Dict[str, str]] = None):
+        self.gate = gate
+        self.registry = registry
+        self.api_keys = api_keys or {}
+        self.transport = transport
+        self.memory_store = memory_store
+        self.host = host
+        self.port = port
+        self.sweep_interval = sweep_interval
+        self.stats = {"requests": 0, "turns": 0, "exits": 0, "refusals": 0, "errors": 0, "disconnects": 0,
+                      "prefetch_failures": 0, "ttft": 0.0}
+        self._server = None
+        self._sweeper = None
+
+    async def start(self):
+        """Listen on host:port (port 0 picks a free port, stored back on self.port) and start evicting idle sessions"""
+        self._server = await asyncio.start_server(self._handle_connection, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._sweeper = asyncio.create_task(self._sweep_forever())
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        """Stop listening, then flush and close the shared store and connection pool if the server owns them"""
+        if self._sweeper:
+            self._sweeper.cancel()
+        if self._server:
+            self._server.close()
+            await self._server.wait_closed()
+        if self.memory_store:
+            # Flushing the write-behind queue blocks, so it runs off the event loop
+            await asyncio.to_thread(self.memory_store.close)
+        if self.transport:
+            await self.transport.close()
+
+    @property
+    def mean_ttft(self) -> float:
+        """Seconds from a turn starting to its first streamed token, over answered turns"""
+        answered = self.stats["turns"] - self.stats["exits"] - self.stats["refusals"] - self.stats["errors"]
+        return self.stats["ttft"] / answered if answered > 0 else 0.0
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except _HttpError as error:
+                    await self._send_json(writer, error.status, {"error": error.message}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                self.stats["requests"] += 1
+                if not await self._dispatch(*request, writer):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def _dispatch(self, method: str, path: str, headers: dict, body: bytes, keep_alive: bool,
+                        writer: asyncio.StreamWriter) -> bool:
+        """Answer one request and return whether the connection can take another"""
+        parts = path.split("?", 1)[0].strip("/").split("/")
+        try:
+            user_id = self._authenticate(headers)
+            if parts == ["sessions"] and method == "POST":
+                if "user_id" in self._json(body):
+                    raise _HttpError(400, "The user is set by the API key, not the request")
+                try:
+                    session = self.registry.create(user_id)
+                except ValueError as error:
+                    raise _HttpError(400, str(error))
+                return await self._send_json(writer, 201, {"session_id": session.session_id}, keep_alive)
+            if parts == ["stats"] and method == "GET":
+                return await self._send_json(writer, 200, self._stats(), keep_alive)
+            if len(parts) == 2 and parts[0] == "sessions" and method == "DELETE":
+                self.registry.close(self._session(parts[1], user_id).session_id)
+                return await self._send(writer, 204, b"", "application/json", keep_alive)
+            if len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages" and method == "POST":
+                session = self._session(parts[1], user_id)
+                message = self._json(body).get("message")
+                if not isinstance(message, str) or not message.strip():
+                    raise _HttpError(400, "Expected a non-empty message")
+                if len(message) > MAX_MESSAGE_CHARS:
+                    raise _HttpError(413, f"Messages are limited to {MAX_MESSAGE_CHARS} characters")
+                await self._stream_turn(session, message, writer)
+                return False
+            known = parts in (["sessions"], ["stats"]) or (parts[0] == "sessions" and len(parts) == 2) or \
+                (len(parts) == 3 and parts[0] == "sessions" and parts[2] == "messages")
+            raise _HttpError(405 if known else 404, f"Cannot {method} {path}")
+        except _HttpError as error:
+            return await self._send_json(writer, error.status, {"error": error.message}, keep_alive)
+
+    async def _stream_turn(self, session: ChatSession, message: str, writer: asyncio.StreamWriter):
+        """Answer one message as an event stream; turns of the same session are answered one at a time"""
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        events = _EventStream(writer)
+        async with session.lock:
+            started = time.perf_counter()
+            history_length = len(session.history)
+            self.stats["turns"] += 1
+            try:
+                decision = await self._answer(session, message, events, started)
+            except Exception as error:
+                # Roll back the half-recorded turn so the session stays usable
+                del session.history[history_length:]
+                self.stats["errors"] += 1
+                await events.send("error", {"message": type(error).__name__})
+                return
+            session.touch()
+            await events.send("done", {"decision": decision})
+        if not events.connected:
+            self.stats["disconnects"] += 1
+
+    async def _answer(self, session: ChatSession, message: str, events: "_EventStream", started: float) -> str:
+        # A memory agent's embedding and retrieval don't depend on the verdict, so they overlap classification
+        retrieve = getattr(session.agent, "retrieve", None)
+        prefetch = asyncio.create_task(retrieve(message)) if retrieve else None
+        try:
+            decision = await self.gate.check(message)
+            if decision == EXIT:
+                self.stats["exits"] += 1
+                self.registry.close(session.session_id)
+                await events.send("message", {"content": GOODBYE})
+                return decision
+            if decision == UNSAFE:
+                self.stats["refusals"] += 1
+                await events.send("message", {"content": REFUSAL})
+                return decision
+            if prefetch:
+                try:
+                    await prefetch
+                except Exception:
+                    # A failed prefetch leaves the agent to embed and retrieve inline while it generates
+                    self.stats["prefetch_failures"] += 1
+        finally:
+            if prefetch and not prefetch.done():
+                prefetch.cancel()
+            elif prefetch and not prefetch.cancelled():
+                prefetch.exception()
+
+        first_token = None
+        # A client that hangs up mid-reply still gets its turn finished and stored, just not sent
+        async for chunk in session.agent.respond_stream(message):
+            if first_token is None:
+                first_token = time.perf_counter()
+                self.stats["ttft"] += first_token - started
+            await events.send("token", {"content": chunk})
+        session.trim()
+        return SAFE
+
+    def _authenticate(self, headers: dict) -> Optional[str]:
+        """The user id of the request's API key; None when the server runs without keys"""
+        if not self.api_keys:
+            return None
+        scheme, _, token = headers.get("authorization", "").partition(" ")
+        if scheme.lower() == "bearer":
+            for key, user_id in self.api_keys.items():
+                if hmac.compare_digest(key.encode(), token.strip().encode()):
+                    return user_id
+        raise _HttpError(401, "Missing or unknown API key")
+
+    def _session(self, session_id: str, user_id: Optional[str]) -> ChatSession:
+        """A live session owned by user_id; other users' sessions look the same as unknown ones"""
+        session = self.registry.get(session_id)
+        if session is None or session.user_id != user_id:
+            raise _HttpError(404, "Unknown or expired session")
+        return session
+
+    async def _sweep_forever(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.registry.sweep()
+
+    def _stats(self) -> dict:
+        return {
+            "sessions": len(self.registry),
+            "server": {**self.stats, "mean_ttft": self.mean_ttft},
+            "registry": self.registry.stats,
+            "gate": self.gate.stats
+        }
+
+    @staticmethod
+    async def _read_request(reader: asyncio.StreamReader) -> Optional[tuple]:
+        """
+        (method, path, headers, body, keep_alive) of the next request on the connection, or None once the client
+        closes it. HTTP/1.1 connections stay open unless the client asks to close them.
+        """
+        try:
+            request_line = await reader.readline()
+        except ValueError:
+            # StreamReader.readline reports a line past its limit as ValueError
+            raise _HttpError(400, "Request line too long")
+        if not request_line.strip():
+            return None
+        try:
+            method, path, version = request_line.decode("latin-1").split(" ", 2)
+        except ValueError:
+            raise _HttpError(400, "Malformed request line")
+        headers = {}
+        while True:
+            try:
+                line = await reader.readline()
+            except ValueError:
+                raise _HttpError(431, "Header line too long")
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise _HttpError(431, f"Requests are limited to {MAX_HEADERS} headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = headers.get("content-length") or "0"
+        if not length.isdigit():
+            raise _HttpError(400, "Content-Length must be a non-negative integer")
+        length = int(length)
+        if length > MAX_BODY_BYTES:
+            raise _HttpError(413, f"Request bodies are limited to {MAX_BODY_BYTES} bytes")
+        body = await reader.readexactly(length) if length else b""
+        keep_alive = version.strip() == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+        return method.upper(), path, headers, body, keep_alive
+
+    @staticmethod
+    def _json(body: bytes) -> dict:
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            raise _HttpError(400, "Expected a JSON body")
+        if not isinstance(payload, dict):
+            raise _HttpError(400, "Expected a JSON object")
+        return payload
+
+    @classmethod
+    async def _send_json(cls, writer: asyncio.StreamWriter, status: int, payload: dict,
+                         keep_alive: bool = True) -> bool:
+        return await cls._send(writer, status, json.dumps(payload).encode(), "application/json", keep_alive)
+
+    @staticmethod
+    async def _send(writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                    keep_alive: bool = True) -> bool:
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\nContent-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+        return keep_alive
+
+
+class _EventStream:
+    """Server-sent events on a response; once the client disconnects, events are dropped"""
+
+    def __init__(self, writer: asyncio.StreamWriter):
+        self.writer = writer
+        self.connected = True
+
+    async def send(self, event: str, data: dict):
+        if not self.connected:
+            return
+        try:
+            self.writer.write(f"event: {event}\ndata: {json.dumps(data)}\n\n".encode())
+            await self.writer.drain()
+        except ConnectionError:
+            self.connected = False
+
+
+class _HttpError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def serve(use_memory: bool = False, host: Optional[str] = None, port: Optional[int] = None):
+    """
+    Run the chat server configured like chat(), on SERVER_HOST:SERVER_PORT. Set OPENAI_BASE_URL to a
+    FakeOpenAI (python fake_openai.py) to load-test without network.
+    """
+    async def _run():
+        server = build_server(use_memory, host or os.getenv("SERVER_HOST", "127.0.0.1"),
+                              port if port is not None else int(os.getenv("SERVER_PORT", 8000)))
+        await server.start()
+        Console().print(f"[green]Chat server listening on http://{server.host}:{server.port}[/green]")
+        try:
+            await server.serve_forever()
+        finally:
+            await server.stop()
+
+    asyncio.run(_run())
+
+
+def build_server(use_memory: bool = False, host: str = "127.0.0.1", port: int = 8000) -> ChatServer:
+    """
+    A ChatServer with one async transport, gate and (with memory) store shared by all sessions, from the
+    environment. Without SERVER_API_KEYS ("key:user,key:user") it only listens on a loopback host; with them,
+    each user only retrieves their own memories.
+    """
+    api_keys = api_keys_from_env()
+    if not api_keys and host not in LOOPBACK_HOSTS:
+        raise ValueError(f"Refusing to serve on {host} without SERVER_API_KEYS; unauthenticated use is local-only")
+    transport = ApiTransport.from_env(asynchronous=True)
+    classifier_client = transport.client_for(CLASSIFIER_CALL)
+    stream_client = transport.client_for(STREAM_CALL)
+    model = os.getenv("OPENAI_MODEL")
+    hedger = RequestHedger() if os.getenv("CLASSIFIER_HEDGE") == "1" else None
+
+    cache = classification_cache_from_env()
+    gate = AsyncClassificationGate(
+        AsyncIntentClassifier(classifier_client, model, EXIT_INTENT_PROMPT, cache,
+                              local_classifier_from_env("exit", EXIT_FAST_PATTERNS),
+                              verdict_log_from_env("exit"), hedger),
+        AsyncIntentClassifier(classifier_client, model, SECURITY_INTENT_PROMPT, cache,
+                              local_classifier_from_env("security", SECURITY_FAST_PATTERNS),
+                              verdict_log_from_env("security"), hedger)
+    )
+
+    memory_store = None
+    if use_memory:
+        persist_dir = os.getenv("MEMORY_PERSIST_DIR", "./chroma_data")
+        os.makedirs(persist_dir, exist_ok=True)
+        partition_mode = os.getenv("MEMORY_PARTITION")
+        store_options = {**memory_store_options_from_env(persist_dir),
+                         "background_client": transport.client_for(BACKGROUND_EMBEDDING_CALL)}
+        if partition_mode:
+            # Same partitions as chat(); each user's store is an AsyncMemoryStore opened on first use
+            memory_store = MemoryRouter(transport.client_for(EMBEDDING_CALL), persist_dir, partition_mode,
+                                        store_class=AsyncMemoryStore, **store_options)
+        else:
+            memory_store = AsyncMemoryStore(transport.client_for(EMBEDDING_CALL), persist_dir, **store_options)
+        recent_turns = int(os.getenv("RAG_RECENT_TURNS", 2))
+        scope = os.getenv("RAG_SCOPE") or (USER_SCOPE if api_keys else GLOBAL_SCOPE)
+        if api_keys and scope == GLOBAL_SCOPE:
+            raise ValueError("RAG_SCOPE=global would let one API key's user retrieve another's memories")
+        response_cache = response_cache_from_env()
+        retrieval_gate = RetrievalGate() if os.getenv("RETRIEVAL_GATE", "1") == "1" else None
+
+        def agent_factory(session_id: str, user_id: Optional[str] = None):
+            return AsyncRAGChatAgent(
+                stream_client,
+                model,
+                session_id,
+                memory_store=memory_store,
+                top_k=int(os.getenv("RAG_TOP_K", 3)),
+                recent_turns=recent_turns,
+                scope=scope,
+                user_id=user_id,
+                context_builder=ContextBuilder(int(os.getenv("RAG_CONTEXT_TOKENS") or 0) or None, recent_turns),
+                response_cache=response_cache,
+                retrieval_gate=retrieval_gate
+            )
+    else:
+        def agent_factory(session_id: str, user_id: Optional[str] = None):
+            return AsyncChatAgent(stream_client, model)
+
+    registry = SessionRegistry(
+        agent_factory,
+        max_sessions=int(os.getenv("SERVER_MAX_SESSIONS", 1000)),
+        idle_timeout=float(os.getenv("SERVER_SESSION_IDLE_TIMEOUT", 1800)) or None,
+        max_history_turns=int(os.getenv("SERVER_MAX_HISTORY_TURNS", 20))
+    )
+    return ChatServer(gate, registry, host, port, transport=transport, memory_store=memory_store, api_keys=api_keys)
+
+
+def api_keys_from_env() -> Dict[str, str]:
+    """API key -> user id pairs from SERVER_API_KEYS, written as key:user,key:user"""
+    api_keys = {}
+    for pair in filter(None, (item.strip() for item in os.getenv("SERVER_API_KEYS", "").split(","))):
+        key, separator, user_id = pair.partition(":")
+        if not separator or not key or not user_id:
+            raise ValueError("SERVER_API_KEYS entries must look like key:user")
+        api_keys[key] = user_id
+    return api_keys
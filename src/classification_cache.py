@@ -0,0 +1,83 @@
+import hashlib
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class ClassificationCache:
+    """Thread-safe LRU cache of classifier verdicts with optional TTL and SQLite backing store"""
+
+    def __init__(self, max_entries: int = 1024, ttl: Optional[float] = None, persist_path: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS classifications (key TEXT PRIMARY KEY, verdict TEXT, stored_at REAL)"
+            )
+            if ttl:
+                self._db.execute("DELETE FROM classifications WHERE stored_at < ?", (time.time() - ttl,))
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, system_prompt: str, user_input: str) -> str:
+        """Build a cache key from the model, a hash of the system prompt and the normalized input"""
+        prompt_hash = hashlib.sha256((system_prompt or "").encode()).hexdigest()[:16]
+        normalized = " ".join(user_input.lower().split()).strip(".!?")
+        return f"{model}:{prompt_hash}:{normalized}"
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached verdict, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key) or self._load(key)
+            if entry is None or self._expired(entry[1]):
+                self._entries.pop(key, None)
+                self.stats["misses"] += 1
+                return None
+
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._evict()
+            self.stats["hits"] += 1
+            return entry[0]
+
+    def put(self, key: str, verdict: str):
+        """Store a verdict, evicting the least recently used entries beyond max_entries"""
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (verdict, stored_at)
+            self._entries.move_to_end(key)
+            self._evict()
+            if self._db:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO classifications (key, verdict, stored_at) VALUES (?, ?, ?)",
+                    (key, verdict, stored_at)
+                )
+                self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / lookups if lookups else 0.0
+
+    def _load(self, key: str) -> Optional[tuple]:
+        if not self._db:
+            return None
+        return self._db.execute(
+            "SELECT verdict, stored_at FROM classifications WHERE key = ?", (key,)
+        ).fetchone()
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl is not None and time.time() - stored_at > self.ttl
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
@@ -0,0 +1,51 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.intent_classifier import IntentClassifier
+
+EXIT = "exit"
+UNSAFE = "unsafe"
+SAFE = "safe"
+
+
+class ClassificationGate:
+    """Runs the exit and security classifiers concurrently and returns the turn decision"""
+
+    def __init__(self, exit_classifier: IntentClassifier, security_classifier: IntentClassifier,
+                 executor: Optional[ThreadPoolExecutor] = None):
+        self.exit_classifier = exit_classifier
+        self.security_classifier = security_classifier
+        self.executor = executor or ThreadPoolExecutor(max_workers=2)
+        self.last_time_saved = 0.0
+        self.stats = {"turns": 0, "early_exits": 0, "time_saved": 0.0}
+
+    def check(self, user_input: str) -> str:
+        """
+        Classify user input and return EXIT, UNSAFE or SAFE.
+        Exit takes precedence: once exit comes back '1' the security call is abandoned.
+        """
+        start = time.perf_counter()
+        exit_future = self.executor.submit(self._timed, self.exit_classifier, user_input)
+        security_future = self.executor.submit(self._timed, self.security_classifier, user_input)
+
+        exit_verdict, exit_elapsed = exit_future.result()
+        if exit_verdict:
+            security_future.cancel()
+            self._record(start, exit_elapsed)
+            self.stats["early_exits"] += 1
+            return EXIT
+
+        security_verdict, security_elapsed = security_future.result()
+        self._record(start, exit_elapsed + security_elapsed)
+        return SAFE if security_verdict else UNSAFE
+
+    def _record(self, start: float, sequential_elapsed: float):
+        self.last_time_saved = max(sequential_elapsed - (time.perf_counter() - start), 0.0)
+        self.stats["turns"] += 1
+        self.stats["time_saved"] += self.last_time_saved
+
+    @staticmethod
+    def _timed(classifier: IntentClassifier, user_input: str) -> tuple:
+        start = time.perf_counter()
+        return classifier.is_positive(user_input), time.perf_counter() - start
@@ -0,0 +1,106 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from src.token_counter import MESSAGE_OVERHEAD, count_message_tokens, count_tokens, truncate_tokens
+
+MEMORY_HEADER = "Previous relevant conversations:\n\n"
+# A memory cut below this many tokens is dropped instead
+MIN_TRUNCATED_TOKENS = 32
+
+
+class ContextBuilder:
+    """
+    Assembles retrieved memories and the recent window within a prompt-token budget. Memories already
+    in the recent window are dropped, the rest ranked by distance plus an age penalty; the user message
+    and newest turns are kept first, then memories in rank order, truncating the first that overflows.
+    """
+
+    def __init__(self, max_tokens: Optional[int] = None, recent_turns: int = 2, recency_weight: float = 0.01):
+        self.max_tokens = max_tokens
+        self.recent_turns = recent_turns
+        self.recency_weight = recency_weight
+        self.last_tokens_saved = 0
+        self.stats = {"turns": 0, "prompt_tokens": 0, "tokens_saved": 0, "duplicates": 0, "dropped": 0,
+                      "truncated": 0}
+
+    def build(self, memories: List[Dict], history: List[dict], user_input: str = "") -> List[dict]:
+        """Context messages to send ahead of user_input"""
+        recent = history[max(len(history) - self.recent_turns * 2, 0):]
+        unbudgeted_tokens = count_message_tokens(self._assemble(memories, recent))
+
+        ranked = self._rank(self._deduplicate(memories, recent))
+        if self.max_tokens is None:
+            kept_recent, kept_memories = recent, ranked
+        else:
+            budget = self.max_tokens - count_tokens(user_input) - MESSAGE_OVERHEAD
+            kept_recent, kept_memories = self._fit(ranked, recent, budget)
+
+        context = self._assemble(kept_memories, kept_recent)
+        prompt_tokens = count_message_tokens(context)
+        self.last_tokens_saved = unbudgeted_tokens - prompt_tokens
+        self.stats["turns"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["tokens_saved"] += self.last_tokens_saved
+        return context
+
+    def _deduplicate(self, memories: List[Dict], recent: List[dict]) -> List[Dict]:
+        seen = {f"User: {question['content']}\nAssistant: {answer['content']}"
+                for question, answer in zip(recent, recent[1:])
+                if question["role"] == "user" and answer["role"] == "assistant"}
+        unique = []
+        for memory in memories:
+            if memory["content"] in seen:
+                self.stats["duplicates"] += 1
+                continue
+            seen.add(memory["content"])
+            unique.append(memory)
+        return unique
+
+    def _rank(self, memories: List[Dict]) -> List[Dict]:
+        """Closest first, with older memories pushed back by recency_weight per day of age"""
+        now = datetime.now()
+
+        def score(memory):
+            distance = memory.get("distance")
+            if distance is None:
+                return True, 0.0
+            try:
+                age_days = (now - datetime.fromisoformat(memory["timestamp"])).total_seconds() / 86400
+            except (KeyError, TypeError, ValueError):
+                age_days = 0.0
+            return False, distance + self.recency_weight * max(age_days, 0.0)
+
+        return sorted(memories, key=score)
+
+    def _fit(self, memories: List[Dict], recent: List[dict], budget: int) -> tuple:
+        kept_recent = []
+        for message in reversed(recent):
+            cost = count_tokens(message["content"]) + MESSAGE_OVERHEAD
+            if cost > budget:
+                break
+            kept_recent.insert(0, message)
+            budget -= cost
+
+        kept_memories = []
+        budget -= count_tokens(MEMORY_HEADER) + MESSAGE_OVERHEAD
+        for memory in memories:
+            cost = count_tokens(memory["content"] + "\n\n")
+            if cost <= budget:
+                kept_memories.append(memory)
+                budget -= cost
+            elif budget >= MIN_TRUNCATED_TOKENS:
+                kept_memories.append({**memory, "content": truncate_tokens(memory["content"], budget - 1)})
+                self.stats["truncated"] += 1
+                budget = 0
+            else:
+                self.stats["dropped"] += 1
+        return kept_recent, kept_memories
+
+    @staticmethod
+    def _assemble(memories: List[Dict], recent: List[dict]) -> List[dict]:
+        """Recent turns first and the per-turn memories last, so the prompt prefix stays cacheable"""
+        context = list(recent)
+        if memories:
+            memory_text = MEMORY_HEADER + "".join(f"{memory['content']}\n\n" for memory in memories)
+            context.append({"role": "system", "content": memory_text})
+        return context
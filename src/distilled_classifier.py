@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+import zlib
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+from src.pre_classifier import PreClassifier
+
+
+class VerdictLog:
+    """Append-only JSONL log of (input, verdict) pairs produced by the model"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def append(self, user_input: str, verdict: str):
+        line = json.dumps({"input": user_input, "verdict": verdict})
+        with self._lock, open(self.path, "a", encoding="utf-8") as log:
+            log.write(line + "\n")
+
+    def read(self) -> List[Dict[str, str]]:
+        with open(self.path, encoding="utf-8") as log:
+            return [json.loads(line) for line in log if line.strip()]
+
+
+class DistilledClassifier(PreClassifier):
+    """Hashed n-gram logistic regression trained on logged model verdicts; defers when unsure"""
+
+    def __init__(self, n_features: int = 2 ** 14, confidence: float = 0.9, shadow: bool = False):
+        super().__init__(shadow)
+        self.n_features = n_features
+        self.confidence = confidence
+        self.weights = np.zeros(n_features, dtype=np.float32)
+        self.bias = 0.0
+
+    def predict(self, user_input: str) -> Optional[str]:
+        probability = self.probability(user_input)
+        if probability >= self.confidence:
+            return "1"
+        if probability <= 1 - self.confidence:
+            return "0"
+        return None
+
+    def probability(self, user_input: str) -> float:
+        """Probability that the model would answer '1'"""
+        features = self._features(user_input)
+        return float(1 / (1 + np.exp(-(self.weights[features].sum() + self.bias))))
+
+    def train(self, records: Iterable[Dict[str, str]], epochs: int = 30, learning_rate: float = 0.5,
+              l2: float = 1e-4):
+        """Fit weights with full-batch gradient descent over sparse hashed features"""
+        records = list(records)
+        if not records:
+            return
+        rows = [self._features(record["input"]) for record in records]
+        labels = np.array([record["verdict"] == "1" for record in records], dtype=np.float32)
+        row_index = np.repeat(np.arange(len(rows)), [len(row) for row in rows])
+        feature_index = np.concatenate(rows)
+
+        for _ in range(epochs):
+            logits = np.bincount(row_index, weights=self.weights[feature_index], minlength=len(rows)) + self.bias
+            errors = 1 / (1 + np.exp(-logits)) - labels
+            gradient = np.bincount(feature_index, weights=errors[row_index], minlength=self.n_features)
+            self.weights -= learning_rate * (gradient / len(rows) + l2 * self.weights).astype(np.float32)
+            self.bias -= learning_rate * float(errors.mean())
+
+    def evaluate(self, records: Iterable[Dict[str, str]]) -> Dict[str, float]:
+        """Report agreement with logged verdicts, share of calls avoided and local latency"""
+        records = list(records)
+        start = time.perf_counter()
+        predictions = [self.predict(record["input"]) for record in records]
+        elapsed = time.perf_counter() - start
+
+        confident = [(prediction, record["verdict"]) for prediction, record in zip(predictions, records)
+                     if prediction is not None]
+        total = max(len(records), 1)
+        return {
+            "samples": len(records),
+            "call_reduction": len(confident) / total,
+            "accuracy": sum(p == v for p, v in confident) / len(confident) if confident else 0.0,
+            "latency_ms": elapsed * 1000 / total
+        }
+
+    def save(self, path: str):
+        np.savez_compressed(path, weights=self.weights, bias=self.bias, confidence=self.confidence)
+
+    @classmethod
+    def load(cls, path: str, shadow: bool = False) -> "DistilledClassifier":
+        data = np.load(path)
+        classifier = cls(len(data["weights"]), float(data["confidence"]), shadow)
+        classifier.weights = data["weights"]
+        classifier.bias = float(data["bias"])
+        return classifier
+
+    def _features(self, user_input: str) -> np.ndarray:
+        text = " ".join(user_input.lower().split())
+        words = text.split()
+        grams = [f"w:{word}" for word in words]
+        grams += [f"b:{first} {second}" for first, second in zip(words, words[1:])]
+        padded = f" {text} "
+        grams += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+        return np.array([zlib.crc32(gram.encode()) % self.n_features for gram in grams], dtype=np.int64)
@@ -0,0 +1,86 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import List, Optional
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """Content-addressed embedding cache: in-process LRU in front of an optional SQLite float32 store"""
+
+    def __init__(self, persist_path: Optional[str] = None, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.stats = {"hits": 0, "disk_hits": 0, "misses": 0}
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db = None
+
+        if persist_path:
+            self._db = sqlite3.connect(persist_path, check_same_thread=False)
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(model TEXT, digest TEXT, vector BLOB, PRIMARY KEY (model, digest))"
+            )
+            self._db.commit()
+
+    @staticmethod
+    def key(model: str, text: str) -> tuple:
+        """Address an embedding by its model and the sha256 of its text"""
+        return model, hashlib.sha256(text.encode()).hexdigest()
+
+    def get(self, key: tuple) -> Optional[List[float]]:
+        """Return the cached embedding, or None on a miss"""
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self.stats["hits"] += 1
+            else:
+                vector = self._load(key)
+                if vector is None:
+                    self.stats["misses"] += 1
+                    return None
+                self.stats["disk_hits"] += 1
+                self._entries[key] = vector
+
+            self._entries.move_to_end(key)
+            self._evict()
+            return vector.tolist()
+
+    def put(self, key: tuple, embedding: List[float]):
+        """Store an embedding as float32 in memory and, when persistent, on disk"""
+        self.put_many([key], [embedding])
+
+    def put_many(self, keys: List[tuple], embeddings: List[List[float]]):
+        """Store a batch of embeddings; on disk they are written with one executemany and a single commit"""
+        vectors = [np.asarray(embedding, dtype=np.float32) for embedding in embeddings]
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._entries[key] = vector
+                self._entries.move_to_end(key)
+            self._evict()
+            if self._db and vectors:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO embeddings (model, digest, vector) VALUES (?, ?, ?)",
+                    [(*key, vector.tobytes()) for key, vector in zip(keys, vectors)]
+                )
+                self._db.commit()
+
+    @property
+    def hit_rate(self) -> float:
+        hits = self.stats["hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        return hits / lookups if lookups else 0.0
+
+    def _load(self, key: tuple) -> Optional[np.ndarray]:
+        if not self._db:
+            return None
+        row = self._db.execute(
+            "SELECT vector FROM embeddings WHERE model = ? AND digest = ?", key
+        ).fetchone()
+        return np.frombuffer(row[0], dtype=np.float32) if row else None
+
+    def _evict(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -0,0 +1,101 @@
+import threading
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import List, Optional
+
+from openai import OpenAI
+
+from src.token_counter import count_message_tokens
+
+SUMMARY_PROMPT = ("You maintain a running summary of a conversation. Merge the previous summary with the new "
+                  "messages into one short paragraph. Keep names, facts, preferences, decisions and open "
+                  "questions; drop greetings and filler.")
+
+
+class HistoryManager:
+    """
+    Sliding-window history: once a conversation exceeds max_tokens, everything but the last keep_last turns
+    is folded into a running summary on a worker thread. The worker only prepares the summary; apply() swaps
+    it in on the caller's thread, and until then the full history is sent, so no turn waits on it.
+    """
+
+    def __init__(self, client: OpenAI, model: str, max_tokens: int = 2000, keep_last: int = 3,
+                 executor: Optional[Executor] = None):
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.keep_last = keep_last
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self._owns_executor = executor is None
+        self.summary = None
+        self.last_error = None
+        self.stats = {"summaries": 0, "summarized_messages": 0, "errors": 0}
+        self._future = None
+        self._ready = None
+        self._lock = threading.Lock()
+
+    def summary_messages(self) -> List[dict]:
+        """The running summary as a system message, or nothing before the first roll-up"""
+        with self._lock:
+            if not self.summary:
+                return []
+            return [{"role": "system", "content": f"Summary of the earlier conversation:\n{self.summary}"}]
+
+    def compact(self, history: List[dict]):
+        """Start summarizing the overflow of history in the background, unless a summary is already running"""
+        with self._lock:
+            if self._ready or (self._future and not self._future.done()):
+                return
+            keep = self.keep_last * 2
+            if len(history) <= keep or count_message_tokens(history) <= self.max_tokens:
+                return
+            older = history[:len(history) - keep]
+            self._future = self.executor.submit(self._summarize, older, self.summary)
+    
+    def apply(self, history: List[dict]) -> List[dict]:
+        """
+        history with a finished summary swapped in for the turns it covers, as a new list; the list passed in
+        is never modified. A summary whose turns are no longer at the head of history is discarded.
+        """
+        with self._lock:
+            ready, self._ready = self._ready, None
+            if not ready:
+                return history
+            older, summary = ready
+            if history[:len(older)] != older:
+                return history
+            self.summary = summary
+            self.stats["summaries"] += 1
+            self.stats["summarized_messages"] += len(older)
+            return history[len(older):]
+
+    def wait(self):
+        """Block until the running summary, if any, is done"""
+        future = self._future
+        if future:
+            future.result()
+    
+    def close(self):
+        """Stop the summarizer thread, dropping a summary still in flight"""
+        if self._owns_executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _summarize(self, older: List[dict], previous: Optional[str]):
+        transcript = "\n".join(f"{message['role']}: {message['content']}" for message in older)
+        if previous:
+            transcript = f"Previous summary:\n{previous}\n\nNew messages:\n{transcript}"
+        try:
+            response = self.client.chat.completions.create(
+                model=self.model,
+                messages=[
+                    {"role": "system", "content": SUMMARY_PROMPT},
+                    {"role": "user", "content": transcript}
+                ]
+            )
+            summary = response.choices[0].message.content
+        except Exception as error:
+            self.last_error = error
+            self.stats["errors"] += 1
+            return
+
+        with self._lock:
+            self._ready = (older, summary)
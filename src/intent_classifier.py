@@ -1,33 +1,43 @@
 from openai import OpenAI
+from typing import Optional
+
+from src.classification_cache import ClassificationCache
+from src.pre_classifier import PreClassifier
+from src.distilled_classifier import VerdictLog
+from src.prompt_cache_stats import PromptCacheStats
+from src.request_hedger import RequestHedger
 
 
 class IntentClassifier:
     """Agent responsible for classifying user intent using binary classification"""
     
-    def __init__(self, client: OpenAI, model: str, system_prompt: str = None):
+    def __init__(self, client: OpenAI, model: str, system_prompt: str = None,
+                 cache: Optional[ClassificationCache] = None,
+                 pre_classifier: Optional[PreClassifier] = None,
+                 verdict_log: Optional[VerdictLog] = None,
+                 hedger: Optional[RequestHedger] = None):
         self.client = client
         self.model = model
         self.system_prompt = system_prompt
+        self.cache = cache
+        self.pre_classifier = pre_classifier
+        self.verdict_log = verdict_log
+        self.hedger = hedger
+        self.prompt_cache = PromptCacheStats()
     
     def classify(self, user_input: str) -> str:
         """
         Classify user input and return the binary result.
         Returns '0' or '1' based on the classification.
         """
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
-                {"role": "system", "content": self.system_prompt},
-                {"role": "user", "content": user_input}
-            ],
-            max_tokens=1,
-            temperature=0,
-            logit_bias={
-                "15": 100,  # Token for "0"
-                "16": 100   # Token for "1"
-            }
-        )
-        return response.choices[0].message.content.strip()
+        verdict = self._cached(user_input)
+        if verdict is None and self.pre_classifier:
+            verdict = self.pre_classifier.settle(user_input)
+        if verdict is None:
+            response = self._create(self._request(user_input))
+            self.prompt_cache.record(response.usage)
+            verdict = self._remember(user_input, response.choices[0].message.content.strip())
+        return verdict
     
     def is_positive(self, user_input: str) -> bool:
         """
@@ -35,3 +45,37 @@ class IntentClassifier:
         Useful for yes/no, exit/continue, positive/negative classifications.
         """
         return self.classify(user_input) == "1"
+    
+    def _request(self, user_input: str) -> dict:
+        return {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                {"role": "user", "content": user_input}
+            ],
+            "max_tokens": 1,
+            "temperature": 0,
+            "logit_bias": {
+                "15": 100,  # Token for "0"
+                "16": 100   # Token for "1"
+            }
+        }
+    
+    def _create(self, request: dict):
+        if self.hedger:
+            return self.hedger.call(self.client.chat.completions.create, **request)
+        return self.client.chat.completions.create(**request)
+    
+    def _cached(self, user_input: str) -> Optional[str]:
+        if not self.cache:
+            return None
+        return self.cache.get(self.cache.key(self.model, self.system_prompt, user_input))
+    
+    def _remember(self, user_input: str, verdict: str) -> str:
+        if self.pre_classifier:
+            self.pre_classifier.observe(user_input, verdict)
+        if self.verdict_log:
+            self.verdict_log.append(user_input, verdict)
+        if self.cache:
+            self.cache.put(self.cache.key(self.model, self.system_prompt, user_input), verdict)
+        return verdict
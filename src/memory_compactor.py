@@ -0,0 +1,216 @@
+import inspect
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+from openai import AsyncOpenAI, OpenAI
+
+from src.memory_store import MemoryStore
+
+ROLLUP_PROMPT = ("Summarize these past conversation turns into one short paragraph. Keep names, facts, "
+                 "preferences and decisions; drop greetings and filler.")
+
+
+class MemoryCompactor:
+    """
+    Keeps the conversations collection bounded. Each pass works through a few sessions at a time:
+    expire turns past the TTL, drop near-duplicates (keeping the newer turn), roll old turn ranges up
+    into a single summary document, then trim each session to its cap, oldest first. Session ids are
+    found by paging through the collection's metadata with a cursor, page_size entries per read.
+    """
+
+    def __init__(self, memory_store: MemoryStore, ttl: Optional[float] = None, max_turns: Optional[int] = None,
+                 duplicate_distance: Optional[float] = None, rollup_age: Optional[float] = None,
+                 rollup_size: int = 10, model: Optional[str] = None, sessions_per_step: int = 16,
+                 client: Optional[OpenAI] = None, page_size: int = 1000):
+        if inspect.iscoroutinefunction(memory_store.embed) or isinstance(client or memory_store.client, AsyncOpenAI):
+            raise TypeError("MemoryCompactor runs on a thread and needs a MemoryStore and OpenAI client, "
+                            "not AsyncMemoryStore or AsyncOpenAI")
+        self.memory_store = memory_store
+        self.client = client or memory_store.client
+        self.ttl = ttl
+        self.max_turns = max_turns
+        self.duplicate_distance = duplicate_distance
+        self.rollup_age = rollup_age
+        self.rollup_size = rollup_size
+        self.model = model
+        self.sessions_per_step = sessions_per_step
+        self.page_size = page_size
+        self.stats = {"passes": 0, "sessions": 0, "expired": 0, "duplicates": 0, "rolled_up": 0, "rollups": 0,
+                      "capped": 0, "errors": 0}
+        self.last_error = None
+        self._queue = []
+        self._cursor = None
+        self._seen = set()
+        self._stop = threading.Event()
+        self._worker = None
+
+    @classmethod
+    def from_env(cls, memory_store: MemoryStore, model: Optional[str] = None,
+                 client: Optional[OpenAI] = None) -> "MemoryCompactor":
+        """
+        Build a compactor from MEMORY_TTL, MEMORY_MAX_TURNS, MEMORY_DUPLICATE_DISTANCE, MEMORY_ROLLUP_AGE
+        and MEMORY_ROLLUP_SIZE; unset limits are disabled
+        """
+        def setting(name, cast=float):
+            value = os.getenv(name)
+            return cast(value) if value else None
+
+        return cls(memory_store, ttl=setting("MEMORY_TTL"), max_turns=setting("MEMORY_MAX_TURNS", int),
+                   duplicate_distance=setting("MEMORY_DUPLICATE_DISTANCE"), rollup_age=setting("MEMORY_ROLLUP_AGE"),
+                   rollup_size=setting("MEMORY_ROLLUP_SIZE", int) or 10, model=model, client=client)
+
+    @property
+    def reclaimed(self) -> int:
+        """Entries removed, net of the roll-up documents that replaced them"""
+        return (self.stats["expired"] + self.stats["duplicates"] + self.stats["capped"]
+                + self.stats["rolled_up"] - self.stats["rollups"])
+
+    def step(self) -> int:
+        """Compact the next few sessions, starting a new pass when the last one finished; returns sessions done"""
+        if not self._queue and self._cursor is None:
+            self._cursor, self._seen = 0, set()
+            self.stats["passes"] += 1
+        while len(self._queue) < self.sessions_per_step and self._cursor is not None:
+            self._queue.extend(self._next_sessions())
+        batch, self._queue = self._queue[:self.sessions_per_step], self._queue[self.sessions_per_step:]
+        for session_id in batch:
+            removed = self.compact_session(session_id)
+            if self._cursor is not None:
+                # Deleted entries shift later ones down; stepping back re-reads some but skips none
+                self._cursor = max(self._cursor - removed, 0)
+        return len(batch)
+
+    def run(self):
+        """Compact every session once"""
+        self._queue, self._cursor = [], None
+        self.step()
+        while self._queue or self._cursor is not None:
+            self.step()
+
+    def compact_session(self, session_id: str) -> int:
+        """Compact one session and return how many entries it removed"""
+        collection = self.memory_store.collection
+        results = collection.get(where={"session_id": session_id}, include=["embeddings", "documents", "metadatas"])
+        turns = sorted(({"id": turn_id, "embedding": embedding, "document": document, "metadata": metadata}
+                        for turn_id, embedding, document, metadata in zip(
+                            results["ids"], MemoryStore._embeddings(results), results["documents"],
+                            results["metadatas"])),
+                       key=lambda turn: turn["metadata"]["turn_number"])
+
+        removed = []
+        turns = self._expire(turns, removed)
+        turns = self._deduplicate(turns, removed)
+        turns = self._roll_up(session_id, turns, removed)
+        self._cap(turns, removed)
+
+        if removed:
+            collection.delete(ids=removed)
+            self.memory_store.refresh_corpus_size()
+        if removed and self.memory_store.hot_index is not None:
+            self.memory_store.hot_index.discard(session_id)
+        self.stats["sessions"] += 1
+        return len(removed)
+
+    def start(self, interval: float = 60.0):
+        """Run step() on a background thread every interval seconds"""
+        self._stop.clear()
+        self._worker = threading.Thread(target=self._run_background, args=(interval,), name="memory-compactor",
+                                        daemon=True)
+        self._worker.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._worker:
+            self._worker.join()
+
+    def _run_background(self, interval: float):
+        while not self._stop.wait(interval):
+            try:
+                self.step()
+            except Exception as error:
+                self.last_error = error
+                self.stats["errors"] += 1
+
+    def _next_sessions(self) -> List[str]:
+        """Session ids first seen in the next page of metadata; an empty page ends the pass"""
+        metadatas = self.memory_store.collection.get(offset=self._cursor, limit=self.page_size,
+                                                     include=["metadatas"])["metadatas"]
+        if not metadatas:
+            self._cursor = None
+            return []
+        self._cursor += len(metadatas)
+        sessions = []
+        for metadata in metadatas:
+            if metadata["session_id"] not in self._seen:
+                self._seen.add(metadata["session_id"])
+                sessions.append(metadata["session_id"])
+        return sessions
+
+    def _expire(self, turns: List[Dict], removed: List[str]) -> List[Dict]:
+        if self.ttl is None:
+            return turns
+        cutoff = datetime.now() - timedelta(seconds=self.ttl)
+        expired = [turn for turn in turns if datetime.fromisoformat(turn["metadata"]["timestamp"]) < cutoff]
+        return self._remove(turns, expired, removed, "expired")
+
+    def _deduplicate(self, turns: List[Dict], removed: List[str]) -> List[Dict]:
+        """Drop turns within duplicate_distance (squared L2) of a newer turn"""
+        if self.duplicate_distance is None or len(turns) < 2:
+            return turns
+        vectors = np.asarray([turn["embedding"] for turn in turns], dtype=np.float32)
+        norms = (vectors ** 2).sum(axis=1)
+        distances = norms[:, None] - 2 * (vectors @ vectors.T) + norms[None, :]
+        newer = np.triu(distances < self.duplicate_distance, k=1)
+        duplicates = [turn for turn, has_newer in zip(turns, newer.any(axis=1)) if has_newer]
+        return self._remove(turns, duplicates, removed, "duplicates")
+
+    def _roll_up(self, session_id: str, turns: List[Dict], removed: List[str]) -> List[Dict]:
+        """Replace full ranges of rollup_size old turns with one summary; partial ranges wait for a later pass"""
+        if self.rollup_age is None or not self.model:
+            return turns
+        cutoff = datetime.now() - timedelta(seconds=self.rollup_age)
+        old = [turn for turn in turns if not turn["metadata"].get("rollup")
+               and datetime.fromisoformat(turn["metadata"]["timestamp"]) < cutoff]
+
+        for start in range(0, len(old) - self.rollup_size + 1, self.rollup_size):
+            group = old[start:start + self.rollup_size]
+            summary = self._summarize([turn["document"] for turn in group])
+            first, last = group[0]["metadata"], group[-1]["metadata"]
+            rollup = {
+                "id": f"{session_id}_rollup{first['turn_number']}-{last['turn_number']}",
+                "embedding": self.memory_store.embed(summary, background=True),
+                "document": f"Summary of turns {first['turn_number']}-{last['turn_number']}: {summary}",
+                "metadata": {**{key: value for key, value in first.items() if key != "user_message"},
+                             "timestamp": last["timestamp"], "rollup": True}
+            }
+            self.memory_store.collection.upsert(ids=[rollup["id"]], embeddings=[rollup["embedding"]],
+                                                documents=[rollup["document"]], metadatas=[rollup["metadata"]])
+            turns = self._remove(turns, group, removed, "rolled_up") + [rollup]
+            self.stats["rollups"] += 1
+        return sorted(turns, key=lambda turn: turn["metadata"]["turn_number"])
+
+    def _cap(self, turns: List[Dict], removed: List[str]):
+        if self.max_turns is None or len(turns) <= self.max_turns:
+            return
+        oldest = sorted(turns, key=lambda turn: turn["metadata"]["timestamp"])[:len(turns) - self.max_turns]
+        self._remove(turns, oldest, removed, "capped")
+
+    def _remove(self, turns: List[Dict], dropped: List[Dict], removed: List[str], stat: str) -> List[Dict]:
+        """Record dropped turns for deletion and return the turns that remain"""
+        dropped_ids = {turn["id"] for turn in dropped}
+        removed.extend(dropped_ids)
+        self.stats[stat] += len(dropped_ids)
+        return [turn for turn in turns if turn["id"] not in dropped_ids]
+
+    def _summarize(self, documents: List[str]) -> str:
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": ROLLUP_PROMPT},
+                {"role": "user", "content": "\n\n".join(documents)}
+            ]
+        )
+        return response.choices[0].message.content
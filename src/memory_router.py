@@ -0,0 +1,111 @@
+import hashlib
+import os
+import re
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from openai import OpenAI
+
+from src.memory_store import MemoryStore
+
+COLLECTION_PARTITIONS = "collection"
+DIRECTORY_PARTITIONS = "directory"
+PARTITION_MODES = (COLLECTION_PARTITIONS, DIRECTORY_PARTITIONS)
+# Directory under persist_dir holding one persist dir per user in DIRECTORY_PARTITIONS mode
+TENANTS_DIR = "tenants"
+
+
+class MemoryRouter:
+    """
+    Routes each user's turns and queries to their own partition: a per-tenant collection or a per-tenant
+    persist directory. Turns without a user_id, and global queries, use the shared default store. A tenant's
+    queries never leave its partition, so their cost grows with that tenant's data only.
+    """
+
+    def __init__(self, client: OpenAI, persist_dir: str = "./chroma_data", mode: str = COLLECTION_PARTITIONS,
+                 collection_name: str = "conversations", store_class: type = MemoryStore, **store_options):
+        if mode not in PARTITION_MODES:
+            raise ValueError(f"Unknown partition mode {mode!r}, expected one of {PARTITION_MODES}")
+        self.client = client
+        self.persist_dir = persist_dir
+        self.mode = mode
+        self.collection_name = collection_name
+        self.store_class = store_class
+        self.store_options = store_options
+        self.default_store = store_class(client, persist_dir, collection_name, **store_options)
+        self._stores: Dict[str, MemoryStore] = {}
+        self._lock = threading.Lock()
+
+    def store_for(self, user_id: Optional[str] = None) -> MemoryStore:
+        """The store holding a user's partition, opened on first use"""
+        if not user_id:
+            return self.default_store
+        with self._lock:
+            store = self._stores.get(user_id)
+            if store is None:
+                persist_dir, collection_name = self.partition(user_id)
+                os.makedirs(persist_dir, exist_ok=True)
+                store = self._stores[user_id] = self.store_class(self.client, persist_dir, collection_name,
+                                                                 **self.store_options)
+            return store
+
+    def partition(self, user_id: str) -> tuple:
+        """(persist_dir, collection_name) of a user's partition"""
+        tenant = hashlib.sha256(user_id.encode()).hexdigest()[:16]
+        if self.mode == DIRECTORY_PARTITIONS:
+            return os.path.join(self.persist_dir, TENANTS_DIR, tenant), self.collection_name
+        return self.persist_dir, f"{self.collection_name}_{tenant}"
+
+    def store_turn(self, session_id: str, turn_number: int, user_message: str, assistant_message: str,
+                   embedding: Optional[List[float]] = None, user_id: Optional[str] = None):
+        return self.store_for(user_id).store_turn(session_id, turn_number, user_message, assistant_message,
+                                                  embedding=embedding, user_id=user_id)
+
+    def store_turns(self, turns: Iterable[dict], batch_size: int = 256) -> int:
+        """Bulk-load turns into their users' partitions, writing each partition's batch as soon as it fills"""
+        batches, stored = {}, 0
+        for turn in turns:
+            user_id = turn.get("user_id")
+            batch = batches.setdefault(user_id, [])
+            batch.append(turn)
+            if len(batch) == batch_size:
+                stored += self.store_for(user_id).store_turns(batches.pop(user_id), batch_size)
+        for user_id, batch in batches.items():
+            stored += self.store_for(user_id).store_turns(batch, batch_size)
+        return stored
+
+    def retrieve_relevant(self, query: str, top_k: int = 3, session_id: str = None,
+                          query_embedding: Optional[List[float]] = None,
+                          user_id: Optional[str] = None) -> List[Dict[str, str]]:
+        return self.store_for(user_id).retrieve_relevant(query, top_k, session_id=session_id,
+                                                         query_embedding=query_embedding)
+
+    def embed(self, text: str, background: bool = False) -> List[float]:
+        return self.default_store.embed(text, background)
+
+    def embed_many(self, texts: List[str], background: bool = False) -> List[List[float]]:
+        return self.default_store.embed_many(texts, background)
+
+    def flush(self):
+        for store in self.stores():
+            store.flush()
+
+    def close(self) -> List[dict]:
+        return [turn for store in self.stores() for turn in store.close()]
+
+    def stores(self) -> List[MemoryStore]:
+        """The default store and every partition opened so far"""
+        with self._lock:
+            return [self.default_store, *self._stores.values()]
+
+
+def partition_dirs(persist_dir: str) -> List[str]:
+    """The shared persist dir and each user's directory under DIRECTORY_PARTITIONS"""
+    tenants_dir = os.path.join(persist_dir, TENANTS_DIR)
+    tenants = sorted(os.listdir(tenants_dir)) if os.path.isdir(tenants_dir) else []
+    return [persist_dir, *(os.path.join(tenants_dir, tenant) for tenant in tenants)]
+
+
+def is_partition(name: str, collection_name: str = "conversations") -> bool:
+    """Whether name is the shared conversation collection or a user's under COLLECTION_PARTITIONS"""
+    return re.fullmatch(rf"{re.escape(collection_name)}(_[0-9a-f]{{16}})?", name) is not None
@@ -1,70 +1,323 @@
+import threading
+
 import chromadb
+import numpy as np
 from openai import OpenAI
-from typing import List, Dict
+from typing import List, Dict, Iterable, Iterator, Optional
 from datetime import datetime
 
+from src.embedding_cache import EmbeddingCache
+from src.memory_writer import MemoryWriter
+from src.vector_index import VectorIndex
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+
 
 class MemoryStore:
     """Stores and retrieves conversation history using ChromaDB"""
     
-    def __init__(self, client: OpenAI, persist_dir: str = "./chroma_data", collection_name: str = "conversations"):
+    def __init__(self, client: OpenAI, persist_dir: str = "./chroma_data", collection_name: str = "conversations",
+                 embedding_cache: Optional[EmbeddingCache] = None, write_behind: bool = False,
+                 hot_index: Optional[VectorIndex] = None, dimensions: Optional[int] = None,
+                 background_client: Optional[OpenAI] = None, drop_user_message: bool = False):
         self.client = client
+        # Embeds turns as they are written, which no reply waits on; a lower-priority view of client if given
+        self.background_client = background_client or client
+        self.embedding_cache = embedding_cache
+        self.hot_index = hot_index
+        self.dimensions = dimensions
+        # Leave the user_message metadata (already part of the stored document) off new turns
+        self.drop_user_message = drop_user_message
         self.chroma_client = chromadb.PersistentClient(path=persist_dir)
         self.collection = self.chroma_client.get_or_create_collection(name=collection_name)
+        # Turns in the collection, kept up to date locally so queries don't ask ChromaDB each time;
+        # writes from other processes show up after the next store_turns() or a restart. The writer and
+        # compactor threads update it under _corpus_lock.
+        self.corpus_size = self.collection.count()
+        self._corpus_lock = threading.Lock()
+        self.writer = MemoryWriter(self._write_turns) if write_behind else None
     
-    def store_turn(self, session_id: str, turn_number: int, user_message: str, assistant_message: str):
-        """Store a conversation turn (user + assistant pair)"""
-        document = f"User: {user_message}\nAssistant: {assistant_message}"
-        doc_id = f"{session_id}_turn{turn_number}"
-        
-        embedding = self._generate_embedding(user_message)
+    def store_turn(self, session_id: str, turn_number: int, user_message: str, assistant_message: str,
+                   embedding: Optional[List[float]] = None, user_id: Optional[str] = None):
+        """
+        Store a conversation turn (user + assistant pair), reusing the user message embedding if given.
+        With write-behind the turn is queued and written in a background batch, which also embeds it if needed.
+        """
+        turn = self._turn(session_id, turn_number, user_message, assistant_message, embedding, user_id)
+        if embedding is not None:
+            self._index_turn(turn)
+        if self.writer:
+            self.writer.enqueue(turn)
+        else:
+            self._write_turns([turn])
+    
+    def store_turns(self, turns: Iterable[dict], batch_size: int = 256) -> int:
+        """
+        Bulk-load turns (dicts with session_id, turn_number, user_message, assistant_message and an
+        optional timestamp and user_id), embedding each batch in one request. Upserts, so re-running a batch is safe.
+        """
+        stored = 0
+        for batch in self._batched(turns, batch_size):
+            records = self._bulk_records(batch)
+            missing = [record for record in records if record["embedding"] is None]
+            embeddings = self.embed_many([record["user_message"] for record in missing], background=True)
+            for record, embedding in zip(missing, embeddings):
+                record["embedding"] = embedding
+            self.collection.upsert(**self._turn_records(records))
+            for record in records:
+                self._index_turn(record)
+            stored += len(records)
+        self.refresh_corpus_size()
+        return stored
+    
+    def retrieve_relevant(self, query: str, top_k: int = 3, session_id: str = None,
+                          query_embedding: Optional[List[float]] = None,
+                          user_id: Optional[str] = None) -> List[Dict[str, str]]:
+        """
+        Retrieve top-k most relevant conversation turns (optionally filtered by session or user).
+        Session queries are served from the hot in-process index when one is configured.
+        """
+        if session_id and self.hot_index is not None:
+            if session_id not in self.hot_index:
+                self._warm_session(session_id)
+            if query_embedding is None:
+                query_embedding = self.embed(query)
+            return self.hot_index.search(session_id, query_embedding, top_k) or []
         
-        self.collection.add(
-            documents=[document],
-            embeddings=[embedding],
-            metadatas=[{
-                "session_id": session_id,
-                "turn_number": turn_number,
-                "timestamp": datetime.now().isoformat(),
-                "user_message": user_message
-            }],
-            ids=[doc_id]
-        )
-    
-    def retrieve_relevant(self, query: str, top_k: int = 3, session_id: str = None) -> List[Dict[str, str]]:
-        """Retrieve top-k most relevant conversation turns (optionally filtered by session)"""
-        if self.collection.count() == 0:
+        pending = self._pending_turns(session_id, user_id)
+        count = self.corpus_size
+        if count == 0 and not pending:
             return []
         
-        query_embedding = self._generate_embedding(query)
+        if query_embedding is None:
+            query_embedding = self.embed(query)
         
+        relevant_turns = []
+        if count:
+            results = self.collection.query(**self._query_params(query_embedding, top_k, session_id, count,
+                                                                      user_id))
+            relevant_turns = self._parse_results(results)
+        return self._merge_pending(relevant_turns, pending, query_embedding, top_k)
+    
+    def embed(self, text: str, background: bool = False) -> List[float]:
+        """Embed text, reusing cached vectors for text embedded before"""
+        return self.embed_many([text], background)[0]
+    
+    def embed_many(self, texts: List[str], background: bool = False) -> List[List[float]]:
+        """
+        Embed texts with one batched API request for those not already cached; background requests go
+        through background_client
+        """
+        keys = [self.embedding_cache.key(self._embedding_model, text) for text in texts] if self.embedding_cache else None
+        embeddings = [self.embedding_cache.get(key) for key in keys] if keys else [None] * len(texts)
+        
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            generated = self._generate_embeddings([texts[i] for i in missing],
+                                                  self.background_client if background else None)
+            for i, embedding in zip(missing, generated):
+                embeddings[i] = embedding
+            if keys:
+                self.embedding_cache.put_many([keys[i] for i in missing], generated)
+        return embeddings
+    
+    def refresh_corpus_size(self):
+        """Recount the collection, e.g. after deleting turns"""
+        with self._corpus_lock:
+            self.corpus_size = self.collection.count()
+    
+    def flush(self):
+        """Block until queued write-behind turns are persisted"""
+        if self.writer:
+            self.writer.flush()
+    
+    def close(self) -> List[dict]:
+        """Persist queued turns and stop the background writer; returns any turns that could not be written"""
+        if not self.writer:
+            return []
+        self.writer.close()
+        return self.writer.failed()
+    
+    def _write_turns(self, turns: List[dict]):
+        missing = [turn for turn in turns if turn["embedding"] is None]
+        if missing:
+            for turn, embedding in zip(missing, self.embed_many([turn["user_message"] for turn in missing], True)):
+                turn["embedding"] = embedding
+                self._index_turn(turn)
+        # The add and the increment move together, so a concurrent recount can't count the batch twice
+        with self._corpus_lock:
+            self.collection.add(**self._turn_records(turns))
+            self.corpus_size += len(turns)
+    
+    def _index_turn(self, turn: dict):
+        if self.hot_index is not None:
+            self.hot_index.add(turn["session_id"], self._turn_id(turn), turn["embedding"], {
+                "content": self._document(turn),
+                "turn_number": turn["turn_number"],
+                "timestamp": turn["timestamp"]
+            })
+    
+    def _warm_session(self, session_id: str):
+        """Load a session's stored and queued turns into the hot index"""
+        results = self.collection.get(where={"session_id": session_id},
+                                      include=["embeddings", "documents", "metadatas"])
+        entries = [(turn_id, embedding, {
+            "content": document,
+            "turn_number": metadata["turn_number"],
+            "timestamp": metadata["timestamp"]
+        }) for turn_id, embedding, document, metadata in zip(
+            results["ids"], self._embeddings(results), results["documents"], results["metadatas"])]
+        self.hot_index.warm(session_id, entries)
+        for turn in self._pending_turns(session_id):
+            self._index_turn(turn)
+    
+    @staticmethod
+    def _embeddings(results: dict) -> list:
+        embeddings = results.get("embeddings")
+        return [] if embeddings is None else embeddings
+    
+    @staticmethod
+    def _batched(items: Iterable, batch_size: int) -> Iterator[list]:
+        batch = []
+        for item in items:
+            batch.append(item)
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+    
+    @staticmethod
+    def _bulk_records(batch: List[dict]) -> List[dict]:
+        """Turn records for bulk-loaded turns, keeping their own timestamps where given"""
+        records = [MemoryStore._turn(turn["session_id"], turn["turn_number"], turn["user_message"],
+                                     turn["assistant_message"], turn.get("embedding"), turn.get("user_id"))
+                   for turn in batch]
+        for record, turn in zip(records, batch):
+            record["timestamp"] = turn.get("timestamp", record["timestamp"])
+        return records
+    
+    @staticmethod
+    def _turn(session_id: str, turn_number: int, user_message: str, assistant_message: str,
+              embedding: Optional[List[float]] = None, user_id: Optional[str] = None) -> dict:
+        return {
+            "session_id": session_id,
+            "user_id": user_id,
+            "turn_number": turn_number,
+            "user_message": user_message,
+            "assistant_message": assistant_message,
+            "embedding": embedding,
+            "timestamp": datetime.now().isoformat()
+        }
+    
+    def _turn_records(self, turns: List[dict]) -> dict:
+        return {
+            "documents": [MemoryStore._document(turn) for turn in turns],
+            "embeddings": [turn["embedding"] for turn in turns],
+            "metadatas": [MemoryStore._metadata(turn, self.drop_user_message) for turn in turns],
+            "ids": [MemoryStore._turn_id(turn) for turn in turns]
+        }
+    
+    @staticmethod
+    def _metadata(turn: dict, drop_user_message: bool = False) -> dict:
+        metadata = {
+            "session_id": turn["session_id"],
+            "turn_number": turn["turn_number"],
+            "timestamp": turn["timestamp"]
+        }
+        if not drop_user_message:
+            metadata["user_message"] = turn["user_message"]
+        if turn.get("user_id") is not None:
+            metadata["user_id"] = turn["user_id"]
+        return metadata
+    
+    @staticmethod
+    def _turn_id(turn: dict) -> str:
+        return f"{turn['session_id']}_turn{turn['turn_number']}"
+    
+    @staticmethod
+    def _document(turn: dict) -> str:
+        return f"User: {turn['user_message']}\nAssistant: {turn['assistant_message']}"
+    
+    @staticmethod
+    def _query_params(query_embedding: List[float], top_k: int, session_id: str, count: int,
+                      user_id: Optional[str] = None) -> dict:
         query_params = {
             "query_embeddings": [query_embedding],
-            "n_results": min(top_k, self.collection.count())
+            "n_results": min(top_k, count)
         }
         
-        if session_id:
-            query_params["where"] = {"session_id": session_id}
-        
-        results = self.collection.query(**query_params)
+        filters = [{"session_id": session_id}] if session_id else []
+        if user_id:
+            filters.append({"user_id": user_id})
+        if filters:
+            query_params["where"] = filters[0] if len(filters) == 1 else {"$and": filters}
         
+        return query_params
+    
+    @staticmethod
+    def _parse_results(results: dict) -> List[Dict[str, str]]:
         if not results['documents'] or not results['documents'][0]:
             return []
         
+        distances = (results.get('distances') or [[None] * len(results['documents'][0])])[0]
         relevant_turns = []
-        for doc, metadata in zip(results['documents'][0], results['metadatas'][0]):
+        for doc, metadata, distance in zip(results['documents'][0], results['metadatas'][0], distances):
             relevant_turns.append({
                 "content": doc,
                 "turn_number": metadata['turn_number'],
-                "timestamp": metadata['timestamp']
+                "timestamp": metadata['timestamp'],
+                "distance": distance
             })
         
         return relevant_turns
     
+    def _pending_turns(self, session_id: str = None, user_id: str = None) -> List[dict]:
+        if not self.writer:
+            return []
+        return [turn for turn in self.writer.pending()
+                if turn["embedding"] is not None and (not session_id or turn["session_id"] == session_id)
+                and (not user_id or turn.get("user_id") == user_id)]
+    
+    @staticmethod
+    def _merge_pending(relevant_turns: List[Dict], pending: List[dict], query_embedding: List[float],
+                       top_k: int) -> List[Dict]:
+        """Rank queued turns alongside stored ones by squared L2 distance, Chroma's default metric"""
+        if not pending:
+            return relevant_turns
+        
+        stored = {turn["content"] for turn in relevant_turns}
+        query = np.asarray(query_embedding, dtype=np.float32)
+        for turn in pending:
+            document = MemoryStore._document(turn)
+            if document in stored:
+                continue
+            relevant_turns.append({
+                "content": document,
+                "turn_number": turn["turn_number"],
+                "timestamp": turn["timestamp"],
+                "distance": float(np.sum((np.asarray(turn["embedding"], dtype=np.float32) - query) ** 2))
+            })
+        
+        relevant_turns.sort(key=lambda turn: float("inf") if turn["distance"] is None else turn["distance"])
+        return relevant_turns[:top_k]
+    
+    @property
+    def _embedding_model(self) -> str:
+        """Model label for cache keys; shortened embeddings are cached apart from full ones"""
+        return f"{EMBEDDING_MODEL}@{self.dimensions}" if self.dimensions else EMBEDDING_MODEL
+    
+    def _embedding_request(self, texts) -> dict:
+        request = {"model": EMBEDDING_MODEL, "input": texts}
+        if self.dimensions:
+            request["dimensions"] = self.dimensions
+        return request
+    
     def _generate_embedding(self, text: str) -> List[float]:
         """Generate embedding using OpenAI API"""
-        response = self.client.embeddings.create(
-            model="text-embedding-3-small",
-            input=text
-        )
-        return response.data[0].embedding
+        return self._generate_embeddings([text])[0]
+    
+    def _generate_embeddings(self, texts: List[str], client: Optional[OpenAI] = None) -> List[List[float]]:
+        request = self._embedding_request(texts if len(texts) > 1 else texts[0])
+        response = (client or self.client).embeddings.create(**request)
+        return [item.embedding for item in sorted(response.data, key=lambda item: item.index)]
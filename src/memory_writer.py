@@ -0,0 +1,126 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, List
+
+_FLUSH = object()
+_STOP = object()
+
+logger = logging.getLogger(__name__)
+
+
+class MemoryWriter:
+    """
+    Write-behind queue that persists turns in batches on a worker thread. A failed batch is retried with
+    exponential backoff; turns that still fail stay pending (and retrievable) and are retried with the next
+    batch. Whatever is still failing at close() is handed back through failed().
+    """
+
+    def __init__(self, write_batch: Callable[[List[dict]], None], batch_size: int = 16, flush_interval: float = 0.5,
+                 max_retries: int = 3, retry_delay: float = 0.5):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_delay = retry_delay
+        self.last_error = None
+        self.stats = {"queued": 0, "written": 0, "flushes": 0, "errors": 0,
+                      "last_flush_latency": 0.0, "total_flush_latency": 0.0}
+        self._queue = queue.Queue()
+        self._pending = []
+        self._failed = []
+        self._lock = threading.Lock()
+        self._worker = threading.Thread(target=self._run, name="memory-writer", daemon=True)
+        self._worker.start()
+
+    def enqueue(self, turn: dict):
+        """Queue a turn for writing; it stays visible through pending() until written"""
+        with self._lock:
+            self._pending.append(turn)
+            self.stats["queued"] += 1
+        self._queue.put(turn)
+
+    def pending(self) -> List[dict]:
+        """Turns queued but not yet written, for read-your-writes retrieval"""
+        with self._lock:
+            return list(self._pending)
+
+    def failed(self) -> List[dict]:
+        """Turns whose last write attempt failed; after close() these were never persisted"""
+        with self._lock:
+            return list(self._failed)
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def flush(self):
+        """Write everything queued so far and wait for it"""
+        self._queue.put(_FLUSH)
+        self._queue.join()
+
+    def close(self):
+        """Flush remaining turns and stop the worker"""
+        self._queue.put(_STOP)
+        self._worker.join()
+
+    def _run(self):
+        while True:
+            batch, marker = self._collect()
+            if batch or (self._failed and marker is not None):
+                self._write(batch)
+            for _ in range(len(batch) + (marker is not None)):
+                self._queue.task_done()
+            if marker is _STOP:
+                return
+
+    def _collect(self) -> tuple:
+        """Gather turns until the batch is full, the interval elapses or a flush/stop marker arrives"""
+        batch = []
+        deadline = None
+        while len(batch) < self.batch_size:
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if item is _FLUSH or item is _STOP:
+                return batch, item
+            batch.append(item)
+            deadline = deadline or time.monotonic() + self.flush_interval
+        return batch, None
+
+    def _write(self, batch: List[dict]):
+        """Write earlier failures plus batch, retrying with backoff; turns that still fail are kept for later"""
+        start = time.perf_counter()
+        with self._lock:
+            turns, self._failed = self._failed + batch, []
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.write_batch(turns)
+                self.stats["written"] += len(turns)
+                break
+            except Exception as error:
+                self.last_error = error
+                self.stats["errors"] += 1
+                logger.warning("Writing %d memory turns failed (attempt %d of %d): %s",
+                               len(turns), attempt + 1, self.max_retries + 1, error)
+                if attempt < self.max_retries:
+                    time.sleep(self.retry_delay * 2 ** attempt)
+        else:
+            logger.error("Keeping %d memory turns pending after repeated write failures", len(turns))
+            with self._lock:
+                self._failed = turns
+
+        if not self._failed:
+            written = {id(turn) for turn in turns}
+            with self._lock:
+                self._pending = [turn for turn in self._pending if id(turn) not in written]
+        elapsed = time.perf_counter() - start
+        self.stats["flushes"] += 1
+        self.stats["last_flush_latency"] = elapsed
+        self.stats["total_flush_latency"] += elapsed
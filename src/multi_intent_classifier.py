@@ -0,0 +1,63 @@
+import math
+from openai import OpenAI
+from typing import Optional
+
+from src.classification_cache import ClassificationCache
+from src.intent_classifier import IntentClassifier
+from src.pre_classifier import PreClassifier
+from src.request_hedger import RequestHedger
+from src.classification_gate import EXIT, UNSAFE, SAFE
+
+LABELS = {"0": SAFE, "1": EXIT, "2": UNSAFE}
+
+
+class MultiIntentClassifier(IntentClassifier):
+    """
+    Answers exit and security in one call: '0'=continue-safe, '1'=exit, '2'=unsafe.
+    Cached and locally settled verdicts skip the call, like IntentClassifier; they carry no confidence.
+    """
+    
+    def __init__(self, client: OpenAI, model: str, system_prompt: str = None,
+                 cache: Optional[ClassificationCache] = None,
+                 pre_classifier: Optional[PreClassifier] = None,
+                 hedger: Optional[RequestHedger] = None):
+        super().__init__(client, model, system_prompt, cache, pre_classifier, hedger=hedger)
+        self.last_confidence = None
+    
+    def classify(self, user_input: str) -> str:
+        """Classify user input and return '0', '1' or '2'"""
+        return self.classify_with_confidence(user_input)[0]
+    
+    def classify_with_confidence(self, user_input: str) -> tuple:
+        """
+        Classify user input and return the label with the model's probability for it. The probability is
+        None when the model wasn't asked or returned no logprobs.
+        """
+        self.last_confidence = None
+        verdict = self._cached(user_input)
+        if verdict is None and self.pre_classifier:
+            verdict = self.pre_classifier.settle(user_input)
+        if verdict is not None:
+            return verdict, None
+        
+        response = self._create(self._request(user_input))
+        self.prompt_cache.record(response.usage)
+        choice = response.choices[0]
+        logprobs = getattr(choice, "logprobs", None)
+        if logprobs and logprobs.content:
+            self.last_confidence = math.exp(logprobs.content[0].logprob)
+        return self._remember(user_input, choice.message.content.strip()), self.last_confidence
+    
+    def check(self, user_input: str) -> str:
+        """Return EXIT, UNSAFE or SAFE; unknown labels fail closed as UNSAFE"""
+        return LABELS.get(self.classify(user_input), UNSAFE)
+    
+    def _request(self, user_input: str) -> dict:
+        request = super()._request(user_input)
+        request["logit_bias"] = {
+            "15": 100,  # Token for "0"
+            "16": 100,  # Token for "1"
+            "17": 100   # Token for "2"
+        }
+        request["logprobs"] = True
+        return request
@@ -0,0 +1,54 @@
+import re
+from abc import ABC, abstractmethod
+from typing import Dict, List, Optional
+
+
+class PreClassifier(ABC):
+    """Base for local classifiers that settle confident inputs before IntentClassifier calls the model"""
+
+    def __init__(self, shadow: bool = False):
+        self.shadow = shadow
+        self.stats = {"avoided": 0, "shadowed": 0, "agreed": 0}
+
+    @abstractmethod
+    def predict(self, user_input: str) -> Optional[str]:
+        """Return '0' or '1' when confident, None to defer to the model"""
+
+    def settle(self, user_input: str) -> Optional[str]:
+        """Return a verdict that replaces the model call; shadow mode never settles"""
+        if self.shadow:
+            return None
+        verdict = self.predict(user_input)
+        if verdict is not None:
+            self.stats["avoided"] += 1
+        return verdict
+
+    def observe(self, user_input: str, model_verdict: str):
+        """In shadow mode, compare the local prediction with the model's verdict"""
+        if not self.shadow:
+            return
+        verdict = self.predict(user_input)
+        if verdict is None:
+            return
+        self.stats["shadowed"] += 1
+        self.stats["agreed"] += verdict == model_verdict
+
+    @property
+    def agreement_rate(self) -> float:
+        return self.stats["agreed"] / self.stats["shadowed"] if self.stats["shadowed"] else 0.0
+
+
+class KeywordPreClassifier(PreClassifier):
+    """Settles inputs that fully match one verdict's compiled keyword patterns"""
+
+    def __init__(self, patterns: Dict[str, List[str]], shadow: bool = False):
+        super().__init__(shadow)
+        self._patterns = {
+            verdict: re.compile(r"(?:%s)[\s.!?]*" % "|".join(alternatives), re.IGNORECASE)
+            for verdict, alternatives in patterns.items()
+        }
+
+    def predict(self, user_input: str) -> Optional[str]:
+        text = " ".join(user_input.split())
+        matches = [verdict for verdict, pattern in self._patterns.items() if pattern.fullmatch(text)]
+        return matches[0] if len(matches) == 1 else None
@@ -0,0 +1,20 @@
+class PromptCacheStats:
+    """Tallies prompt tokens and the share the provider served from its prefix cache"""
+
+    def __init__(self):
+        self.stats = {"requests": 0, "prompt_tokens": 0, "cached_tokens": 0}
+
+    def record(self, usage):
+        """Add a response's usage; responses without usage (e.g. streams without include_usage) are skipped"""
+        prompt_tokens = getattr(usage, "prompt_tokens", None)
+        if not isinstance(prompt_tokens, int):
+            return
+        cached_tokens = getattr(getattr(usage, "prompt_tokens_details", None), "cached_tokens", None)
+        self.stats["requests"] += 1
+        self.stats["prompt_tokens"] += prompt_tokens
+        self.stats["cached_tokens"] += cached_tokens if isinstance(cached_tokens, int) else 0
+
+    @property
+    def hit_ratio(self) -> float:
+        prompt_tokens = self.stats["prompt_tokens"]
+        return self.stats["cached_tokens"] / prompt_tokens if prompt_tokens else 0.0
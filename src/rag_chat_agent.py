@@ -1,7 +1,17 @@
+import time
 from openai import OpenAI
 from src.chat_agent import ChatAgent
 from src.memory_store import MemoryStore
-from typing import Optional
+from src.context_builder import ContextBuilder
+from src.history_manager import HistoryManager
+from src.response_cache import ResponseCache, replay_chunks
+from src.retrieval_gate import RetrievalGate
+from typing import List, Optional
+
+SESSION_SCOPE = "session"
+USER_SCOPE = "user"
+GLOBAL_SCOPE = "global"
+SCOPES = (SESSION_SCOPE, USER_SCOPE, GLOBAL_SCOPE)
 
 
 class RAGChatAgent:
@@ -9,75 +19,162 @@ class RAGChatAgent:
     
     def __init__(self, client: OpenAI, model: str, session_id: str, 
                  memory_store: Optional[MemoryStore] = None, 
-                 top_k: int = 3, recent_turns: int = 2):
+                 top_k: int = 3, recent_turns: int = 2,
+                 scope: str = GLOBAL_SCOPE, user_id: Optional[str] = None,
+                 context_builder: Optional[ContextBuilder] = None,
+                 history_manager: Optional[HistoryManager] = None,
+                 response_cache: Optional[ResponseCache] = None,
+                 retrieval_gate: Optional[RetrievalGate] = None):
+        if scope not in SCOPES:
+            raise ValueError(f"Unknown retrieval scope {scope!r}, expected one of {SCOPES}")
+        if scope == USER_SCOPE and not user_id:
+            raise ValueError("User-scoped retrieval needs a user_id")
+        
         self.client = client
         self.model = model
         self.session_id = session_id
         self.top_k = top_k
         self.recent_turns = recent_turns
+        self.scope = scope
+        self.user_id = user_id
         self.turn_counter = 0
+        self.context_builder = context_builder or ContextBuilder(recent_turns=recent_turns)
+        self.response_cache = response_cache
+        self.retrieval_gate = retrieval_gate
+        self._prepared = None
+        self._uncached_reply = (None, None, 0.0)
         
-        self.chat_agent = ChatAgent(client, model)
+        self.chat_agent = ChatAgent(client, model, history_manager)
         self.memory_store = memory_store or MemoryStore(client)
     
     def respond(self, user_input: str) -> str:
         """Generate response with memory-augmented context"""
-        relevant_memories = self.memory_store.retrieve_relevant(
-            user_input, 
-            self.top_k
-        )
-        
-        augmented_history = self._build_context(relevant_memories)
+        query_embedding = self._prepare(user_input)["embedding"]
+        cached = self._cached_reply(user_input, query_embedding)
+        if cached is not None:
+            response = "".join(self.chat_agent.respond_stream(user_input, cached))
+        else:
+            relevant_memories = self.retrieve(user_input)
+            response = self.chat_agent.respond(user_input, self._build_context(relevant_memories, user_input))
+            self._cache_reply(user_input, response)
         
-        original_history = self.chat_agent.conversation_history
-        self.chat_agent.conversation_history = augmented_history
-        
-        response = self.chat_agent.respond(user_input)
-        
-        self.chat_agent.conversation_history = original_history
         self.turn_counter += 1
-        self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, response)
-        
-        original_history.append({"role": "user", "content": user_input})
-        original_history.append({"role": "assistant", "content": response})
+        self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, response,
+                                     embedding=query_embedding, user_id=self.user_id)
+        self._prepared = None
         
         return response
     
-    def respond_stream(self, user_input: str):
-        """Generate streaming response with memory-augmented context"""
-        relevant_memories = self.memory_store.retrieve_relevant(
-            user_input,
-            self.top_k
-        )
-        
-        augmented_history = self._build_context(relevant_memories)
-        
-        original_history = self.chat_agent.conversation_history
-        self.chat_agent.conversation_history = augmented_history
+    def embed_query(self, user_input: str) -> Optional[List[float]]:
+        """
+        Gate the turn and embed user_input if retrieval or the response cache will use it. May run ahead of
+        the turn, e.g. alongside classification; the rest of the turn reuses the result for the same input.
+        """
+        retrieve = self._should_retrieve(user_input)
+        query_embedding = self.memory_store.embed(user_input) if retrieve or self._cacheable() else None
+        self._prepared = {"input": user_input, "retrieve": retrieve, "embedding": query_embedding, "memories": None}
+        return query_embedding
+    
+    def retrieve(self, user_input: str) -> list:
+        """Memories for user_input (none when the gate skipped it), reusing any earlier lookup for the same input"""
+        prepared = self._prepare(user_input)
+        if prepared["memories"] is None:
+            memories = []
+            if prepared["retrieve"]:
+                memories = self.memory_store.retrieve_relevant(
+                    user_input,
+                    self.top_k,
+                    query_embedding=prepared["embedding"],
+                    **self._scope_filter()
+                )
+            # Only a finished lookup is kept, so a failed prefetch is retried when the reply needs it
+            prepared["memories"] = memories
+        return prepared["memories"]
+    
+    def open_stream(self, user_input: str):
+        """Start a memory-augmented completion stream without recording the turn, or replay a cached answer"""
+        query_embedding = self._prepare(user_input)["embedding"]
+        cached = self._cached_reply(user_input, query_embedding)
+        if cached is not None:
+            return cached
+        return self.chat_agent.open_stream(user_input, self._build_context(self.retrieve(user_input), user_input))
+    
+    def respond_stream(self, user_input: str, stream=None):
+        """Generate streaming response with memory-augmented context, optionally from open_stream()"""
+        if stream is None:
+            stream = self.open_stream(user_input)
         
-        full_response = ""
-        for chunk in self.chat_agent.respond_stream(user_input):
-            full_response += chunk
+        parts = []
+        for chunk in self.chat_agent.respond_stream(user_input, stream):
+            parts.append(chunk)
             yield chunk
+        full_response = "".join(parts)
         
-        self.chat_agent.conversation_history = original_history
+        self._cache_reply(user_input, full_response)
         self.turn_counter += 1
-        self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, full_response)
-        
-        original_history.append({"role": "user", "content": user_input})
-        original_history.append({"role": "assistant", "content": full_response})
+        self.memory_store.store_turn(self.session_id, self.turn_counter, user_input, full_response,
+                                     embedding=self._embedding_for(user_input), user_id=self.user_id)
+        self._prepared = None
     
-    def _build_context(self, relevant_memories: list) -> list:
-        """Combine retrieved memories with recent conversation history"""
-        context = []
-        
-        if relevant_memories:
-            memory_text = "Previous relevant conversations:\n\n"
-            for memory in relevant_memories:
-                memory_text += f"{memory['content']}\n\n"
-            context.append({"role": "system", "content": memory_text})
-        
-        recent_history = self.chat_agent.conversation_history[-self.recent_turns*2:] if self.chat_agent.conversation_history else []
-        context.extend(recent_history)
-        
-        return context
+    def _build_context(self, relevant_memories: list, user_input: str = "") -> list:
+        """Combine the running summary, retrieved memories and recent history within the prompt-token budget"""
+        return self.chat_agent.summary_messages() + self.context_builder.build(
+            relevant_memories, self.chat_agent.conversation_history, user_input)
+    
+    def _should_retrieve(self, user_input: str) -> bool:
+        """Ask the retrieval gate, if any, whether memories could add to the recent window"""
+        if not self.retrieval_gate:
+            return True
+        history = self.chat_agent.conversation_history
+        return self.retrieval_gate.should_retrieve(user_input, history[max(len(history) - self.recent_turns * 2, 0):])
+    
+    def _cacheable(self) -> bool:
+        """Only a session's opening turn is looked up (and later cached), since any history could change the answer"""
+        return bool(self.response_cache) and not (self.chat_agent.conversation_history
+                                                  or self.chat_agent.summary_messages())
+    
+    def _cached_reply(self, user_input: str, query_embedding: Optional[List[float]]) -> Optional[list]:
+        """Replay chunks for a cached answer to a near-identical question, or None"""
+        self._uncached_reply = (None, None, 0.0)
+        if not self._cacheable():
+            return None
+        entry = self.response_cache.get(self._cache_scope(), query_embedding)
+        if entry is None:
+            self._uncached_reply = (user_input, query_embedding, time.perf_counter())
+            return None
+        return replay_chunks(entry["answer"])
+    
+    def _cache_reply(self, user_input: str, response: str):
+        """Cache a reply generated after a miss in _cached_reply() for the same input"""
+        text, query_embedding, started = self._uncached_reply
+        if text != user_input or not response:
+            return
+        self._uncached_reply = (None, None, 0.0)
+        self.response_cache.put(self._cache_scope(), query_embedding, user_input, response,
+                                time.perf_counter() - started)
+    
+    def _cache_scope(self) -> str:
+        """Cached answers are shared only as widely as retrieved memories are, and never between users"""
+        owner = {SESSION_SCOPE: self.session_id, USER_SCOPE: self.user_id}.get(self.scope, "")
+        return f"{self.model}:{self.scope}:{owner}:{self.user_id or ''}"
+    
+    def _scope_filter(self) -> dict:
+        """Retrieval filter for the configured scope"""
+        if self.scope == SESSION_SCOPE:
+            return {"session_id": self.session_id, "user_id": self.user_id}
+        if self.scope == USER_SCOPE:
+            return {"user_id": self.user_id}
+        return {}
+    
+    def _prepare(self, user_input: str) -> dict:
+        """The prepared turn for user_input, gating and embedding it now unless embed_query() already did"""
+        if not self._current(user_input):
+            self.embed_query(user_input)
+        return self._prepared
+    
+    def _current(self, user_input: str) -> bool:
+        return self._prepared is not None and self._prepared["input"] == user_input
+    
+    def _embedding_for(self, user_input: str):
+        """Reuse the query embedding prepared for this input, if any"""
+        return self._prepared["embedding"] if self._current(user_input) else None
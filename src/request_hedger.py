@@ -0,0 +1,87 @@
+import asyncio
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from typing import Callable, Optional
+
+
+class RequestHedger:
+    """
+    Hedging for short idempotent calls: a call still running after the recent p95 latency gets a duplicate,
+    and whichever answers first wins. The async variant cancels the loser; threads can only abandon it.
+    """
+
+    def __init__(self, quantile: float = 0.95, window: int = 200, min_samples: int = 20,
+                 initial_delay: float = 1.0, executor: Optional[Executor] = None):
+        self.quantile = quantile
+        self.min_samples = min_samples
+        self.initial_delay = initial_delay
+        self.executor = executor or ThreadPoolExecutor(max_workers=8)
+        self.latencies = deque(maxlen=window)
+        self.stats = {"calls": 0, "hedged": 0, "hedge_wins": 0, "errors": 0}
+        self._lock = threading.Lock()
+
+    @property
+    def delay(self) -> float:
+        """Seconds to wait before hedging: the quantile of recent latencies, or initial_delay until warmed up"""
+        with self._lock:
+            samples = sorted(self.latencies)
+        if len(samples) < self.min_samples:
+            return self.initial_delay
+        return samples[min(int(len(samples) * self.quantile), len(samples) - 1)]
+
+    def call(self, function: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        primary = self.executor.submit(function, *args, **kwargs)
+        pending = {primary}
+        done, _ = wait(pending, timeout=self.delay)
+        if not done:
+            pending.add(self.executor.submit(function, *args, **kwargs))
+            self._record("hedged")
+
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        loser.cancel()
+                    return self._finish(start, future is not primary, future.result())
+                error = future.exception()
+        self._record("errors")
+        raise error
+
+    async def call_async(self, function: Callable, *args, **kwargs):
+        start = time.perf_counter()
+        primary = asyncio.ensure_future(function(*args, **kwargs))
+        pending = {primary}
+        try:
+            done, _ = await asyncio.wait(pending, timeout=self.delay)
+            if not done:
+                pending.add(asyncio.ensure_future(function(*args, **kwargs)))
+                self._record("hedged")
+
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return self._finish(start, task is not primary, task.result())
+                    error = task.exception()
+            self._record("errors")
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def _finish(self, start: float, hedge_won: bool, result):
+        with self._lock:
+            self.latencies.append(time.perf_counter() - start)
+            self.stats["calls"] += 1
+            self.stats["hedge_wins"] += hedge_won
+        return result
+
+    def _record(self, stat: str):
+        with self._lock:
+            self.stats[stat] += 1
@@ -0,0 +1,95 @@
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class ResponseCache:
+    """
+    Semantic cache of answers to context-free questions, keyed by the question's embedding. A lookup hits
+    when a stored question in the same scope has cosine similarity of at least min_similarity; entries
+    expire after ttl seconds and the least recently used are evicted past max_entries.
+    """
+
+    def __init__(self, min_similarity: float = 0.95, ttl: Optional[float] = None, max_entries: int = 1024):
+        self.min_similarity = min_similarity
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stats = {"lookups": 0, "hits": 0, "stores": 0, "evictions": 0, "expired": 0, "latency_saved": 0.0}
+        self._entries = OrderedDict()
+        self._scopes = {}
+        self._ids = itertools.count()
+        self._lock = threading.Lock()
+
+    @property
+    def hit_rate(self) -> float:
+        return self.stats["hits"] / self.stats["lookups"] if self.stats["lookups"] else 0.0
+
+    def get(self, scope: str, embedding: List[float]) -> Optional[Dict]:
+        """The closest cached entry in scope within min_similarity, or None"""
+        with self._lock:
+            self.stats["lookups"] += 1
+            self._expire()
+            ids, vectors = self._matrix(scope)
+            if not ids:
+                return None
+            similarities = vectors @ self._normalize(embedding)
+            best = int(np.argmax(similarities))
+            if similarities[best] < self.min_similarity:
+                return None
+            entry = self._entries[ids[best]]
+            self._entries.move_to_end(ids[best])
+            self.stats["hits"] += 1
+            self.stats["latency_saved"] += entry["latency"]
+            return {**entry, "similarity": float(similarities[best])}
+
+    def put(self, scope: str, embedding: List[float], question: str, answer: str, latency: float = 0.0):
+        """Cache answer for question; latency is what generating it cost, credited on every hit"""
+        with self._lock:
+            entry_id = next(self._ids)
+            self._entries[entry_id] = {"scope": scope, "vector": self._normalize(embedding), "question": question,
+                                       "answer": answer, "latency": latency, "created": time.monotonic()}
+            self._scopes.setdefault(scope, {"ids": [], "matrix": None})["matrix"] = None
+            self._scopes[scope]["ids"].append(entry_id)
+            self.stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.stats["evictions"] += 1
+
+    def _expire(self):
+        if self.ttl is None:
+            return
+        cutoff = time.monotonic() - self.ttl
+        expired = [entry_id for entry_id, entry in self._entries.items() if entry["created"] < cutoff]
+        for entry_id in expired:
+            self._remove(entry_id)
+        self.stats["expired"] += len(expired)
+
+    def _matrix(self, scope: str) -> tuple:
+        """Ids and stacked unit vectors for scope, rebuilt only after the scope changed"""
+        cached = self._scopes.get(scope)
+        if not cached or not cached["ids"]:
+            return [], None
+        if cached["matrix"] is None:
+            cached["matrix"] = np.stack([self._entries[entry_id]["vector"] for entry_id in cached["ids"]])
+        return cached["ids"], cached["matrix"]
+
+    def _remove(self, entry_id: int):
+        scope = self._scopes[self._entries.pop(entry_id)["scope"]]
+        scope["ids"].remove(entry_id)
+        scope["matrix"] = None
+
+    @staticmethod
+    def _normalize(embedding: List[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def replay_chunks(answer: str) -> List[SimpleNamespace]:
+    """A cached answer shaped as completion stream chunks, so agents record it like a generated reply"""
+    delta = SimpleNamespace(content=answer)
+    return [SimpleNamespace(choices=[SimpleNamespace(delta=delta)], usage=None)]
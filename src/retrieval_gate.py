@@ -0,0 +1,59 @@
+import re
+from typing import List, Optional
+
+CHITCHAT = "chitchat"
+COVERED = "covered"
+
+# Words that carry no retrieval signal on their own: function words, chit-chat and follow-up filler
+STOP_WORDS = frozenset("""
+a an the and or but if so of to in on at by for with from about as into than then that this these those it its
+is are was were be been being am do does did have has had i me my mine you your we our they them their he she
+him her his what which who whom how why when where there here can could would should will shall may might must
+not no yes yeah yep ok okay sure hi hello hey thanks thank please cool great nice good fine alright right well
+tell say more again also just really very much too lol bye see later let us lets go ahead continue got
+""".split())
+
+
+class RetrievalGate:
+    """
+    Decides locally, before any embedding, whether a message is worth a memory lookup. Messages with no
+    content words ("hi", "ok thanks") and short follow-ups whose content words all appear in the recent
+    window are answered from the conversation alone. A skipped turn saves the query embedding and vector
+    search ahead of the reply, not the embedding of the turn itself: the store still embeds it to save it,
+    in the writer's batch with write-behind and otherwise after the reply.
+    """
+
+    def __init__(self, max_covered_terms: int = 4, min_overlap: float = 1.0):
+        self.max_covered_terms = max_covered_terms
+        self.min_overlap = min_overlap
+        self.last_reason = None
+        self.stats = {"checks": 0, "skipped": 0, CHITCHAT: 0, COVERED: 0}
+
+    def should_retrieve(self, user_input: str, recent: Optional[List[dict]] = None) -> bool:
+        self.stats["checks"] += 1
+        self.last_reason = self._skip_reason(user_input, recent or [])
+        if self.last_reason is None:
+            return True
+        self.stats["skipped"] += 1
+        self.stats[self.last_reason] += 1
+        return False
+
+    @property
+    def skip_rate(self) -> float:
+        return self.stats["skipped"] / self.stats["checks"] if self.stats["checks"] else 0.0
+
+    def _skip_reason(self, user_input: str, recent: List[dict]) -> Optional[str]:
+        terms = content_terms(user_input)
+        if not terms:
+            return CHITCHAT
+        if len(terms) <= self.max_covered_terms and recent:
+            window = set().union(*(content_terms(message["content"]) for message in recent))
+            if len(terms & window) / len(terms) >= self.min_overlap:
+                return COVERED
+        return None
+
+
+def content_terms(text: str) -> set:
+    """Lower-cased words of text minus stop words, with a trailing plural s dropped"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return {word[:-1] if len(word) > 3 and word.endswith("s") else word for word in words if word not in STOP_WORDS}
@@ -0,0 +1,107 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class ChatSession:
+    """One client conversation: its agent, a lock serializing its turns and a cap on the history it keeps"""
+
+    def __init__(self, session_id: str, agent, max_history_turns: int = 20, clock: Callable[[], float] = time.monotonic,
+                 user_id: Optional[str] = None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.agent = agent
+        self.max_history_turns = max_history_turns
+        self.clock = clock
+        self.lock = asyncio.Lock()
+        self.turns = 0
+        self.last_used = clock()
+
+    @property
+    def history(self) -> list:
+        """The agent's verbatim history (a RAG agent keeps it on its inner chat agent)"""
+        return getattr(self.agent, "chat_agent", self.agent).conversation_history
+
+    def touch(self):
+        self.last_used = self.clock()
+
+    def trim(self):
+        """Drop the oldest turns beyond max_history_turns; with memory they stay retrievable from the store"""
+        self.turns += 1
+        excess = len(self.history) - self.max_history_turns * 2
+        if excess > 0:
+            del self.history[:excess]
+
+
+class SessionRegistry:
+    """
+    Sessions by id, most recently used last. Past max_sessions the least recently used idle session is
+    evicted, and sweep() drops sessions idle for longer than idle_timeout. Sessions in the middle of a
+    turn are never evicted.
+    """
+
+    def __init__(self, agent_factory: Callable[[str, Optional[str]], object], max_sessions: int = 1000,
+                 idle_timeout: Optional[float] = 1800.0, max_history_turns: int = 20,
+                 clock: Callable[[], float] = time.monotonic):
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.max_history_turns = max_history_turns
+        self.clock = clock
+        self.stats = {"created": 0, "closed": 0, "evicted_lru": 0, "evicted_idle": 0}
+        self._sessions = OrderedDict()
+
+    def create(self, user_id: Optional[str] = None) -> ChatSession:
+        """
+        Start a session under a new id, first evicting the least recently used idle one if the registry is full
+        (if every session is mid-turn the registry briefly holds one more than max_sessions)
+        """
+        if len(self._sessions) >= self.max_sessions:
+            self._evict_lru()
+        session_id = str(uuid.uuid4())
+        session = ChatSession(session_id, self.agent_factory(session_id, user_id), self.max_history_turns, self.clock,
+                              user_id)
+        self._sessions[session_id] = session
+        self.stats["created"] += 1
+        return session
+
+    def get(self, session_id: str) -> Optional[ChatSession]:
+        """The live session for session_id, marked as just used, or None if it was closed or evicted"""
+        session = self._sessions.get(session_id)
+        if session is not None:
+            self._sessions.move_to_end(session_id)
+            session.touch()
+        return session
+
+    def close(self, session_id: str) -> bool:
+        if self._sessions.pop(session_id, None) is None:
+            return False
+        self.stats["closed"] += 1
+        return True
+
+    def sweep(self) -> int:
+        """Evict sessions idle for longer than idle_timeout and return how many went"""
+        if not self.idle_timeout:
+            return 0
+        cutoff = self.clock() - self.idle_timeout
+        expired = [session_id for session_id, session in self._sessions.items()
+                   if session.last_used < cutoff and not session.lock.locked()]
+        for session_id in expired:
+            del self._sessions[session_id]
+        self.stats["evicted_idle"] += len(expired)
+        return len(expired)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _evict_lru(self):
+        for session_id, session in self._sessions.items():
+            if not session.lock.locked():
+                del self._sessions[session_id]
+                self.stats["evicted_lru"] += 1
+                return
@@ -0,0 +1,88 @@
+import itertools
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, Optional
+
+_END = object()
+
+
+class SpeculativeResponder:
+    """Starts a response stream while the turn is still being classified, holding tokens until released"""
+
+    def __init__(self, chat_agent, executor: Optional[ThreadPoolExecutor] = None):
+        self.chat_agent = chat_agent
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.last_first_token_latency = 0.0
+        self.stats = {"started": 0, "released": 0, "aborted": 0, "aborted_chunks": 0}
+        self._future = None
+
+    def start(self, user_input: str):
+        """Open the completion stream in the background and buffer its chunks"""
+        self._user_input = user_input
+        self._buffer = queue.Queue()
+        self._abort = threading.Event()
+        self._started_at = time.perf_counter()
+        self._future = self.executor.submit(self._prefetch, user_input, self._buffer, self._abort)
+        self.stats["started"] += 1
+
+    def release(self) -> Iterator[str]:
+        """Flush buffered tokens and keep streaming; the agent records the turn as usual"""
+        self.stats["released"] += 1
+        # Wait for the first chunk here, so a stream that failed to open raises before the agent records the turn
+        head = self._take(self._buffer)
+        chunks = itertools.chain([head], self._drain(self._buffer)) if head is not _END else iter(())
+        first = True
+        for content in self.chat_agent.respond_stream(self._user_input, chunks):
+            if first:
+                self.last_first_token_latency = time.perf_counter() - self._started_at
+                first = False
+            yield content
+        self._future.result()
+
+    def abort(self):
+        """
+        Discard the speculative response.
+        The turn was never recorded, so conversation history is left as it was before start().
+        """
+        self._abort.set()
+        self.stats["aborted"] += 1
+        if not self._future.cancel():
+            self._future.add_done_callback(self._count_aborted_chunks)
+
+    def _prefetch(self, user_input: str, buffer: queue.Queue, abort: threading.Event):
+        fetched = 0
+        try:
+            stream = self.chat_agent.open_stream(user_input)
+            for chunk in stream:
+                if abort.is_set():
+                    break
+                buffer.put(chunk)
+                fetched += 1
+        except Exception as error:
+            buffer.put(error)
+            raise
+        finally:
+            buffer.put(_END)
+
+        if abort.is_set() and hasattr(stream, "close"):
+            stream.close()
+        return fetched
+
+    def _count_aborted_chunks(self, future):
+        if future.exception() is None:
+            self.stats["aborted_chunks"] += future.result()
+
+    @classmethod
+    def _drain(cls, buffer: queue.Queue):
+        while (chunk := cls._take(buffer)) is not _END:
+            yield chunk
+
+    @staticmethod
+    def _take(buffer: queue.Queue):
+        """The next buffered chunk or _END; a failure of the background stream is raised here"""
+        chunk = buffer.get()
+        if isinstance(chunk, Exception):
+            raise chunk
+        return chunk
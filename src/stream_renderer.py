@@ -0,0 +1,87 @@
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from rich.console import Console
+
+
+class StreamRenderer:
+    """
+    Prints a streamed reply in frames of at most max_fps per second instead of once per token. Text that
+    arrives within a frame is written in one print; the reply is kept as a list of parts joined once. The
+    first chunk is printed as soon as it arrives, so time to first token isn't held back by the frame rate,
+    and a flusher thread prints held text once a frame interval passes, so a stalled stream isn't held back either.
+    """
+
+    def __init__(self, console: Console, max_fps: float = 20.0, clock: Callable[[], float] = time.perf_counter):
+        self.console = console
+        self.frame_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+        self.clock = clock
+        self.last_ttft = None
+        self.last_tokens_per_second = 0.0
+        self.stats = {"replies": 0, "tokens": 0, "frames": 0, "ttft": 0.0, "stream_time": 0.0}
+
+    def render(self, chunks: Iterable[str], started: Optional[float] = None) -> str:
+        """
+        Print chunks as they stream and return the whole reply. started is when the user's turn began
+        (default: now), so time to first token includes any work done before streaming.
+        """
+        started = self.clock() if started is None else started
+        parts, pending = [], []
+        first = last_flush = None
+        lock, done = threading.Lock(), threading.Event()
+        flusher = None
+        if self.frame_interval > 0:
+            flusher = threading.Thread(target=self._flush_every_frame, args=(pending, lock, done), daemon=True)
+            flusher.start()
+        try:
+            for chunk in chunks:
+                if not chunk:
+                    continue
+                parts.append(chunk)
+                now = self.clock()
+                if first is None:
+                    first = now
+                with lock:
+                    pending.append(chunk)
+                    if last_flush is None or now - last_flush >= self.frame_interval:
+                        self._flush(pending)
+                        last_flush = now
+        finally:
+            done.set()
+            if flusher is not None:
+                flusher.join()
+        self._flush(pending)
+        finished = self.clock()
+
+        self.last_ttft = first - started if first is not None else None
+        streaming = finished - first if first is not None else 0.0
+        self.last_tokens_per_second = len(parts) / streaming if streaming > 0 else 0.0
+        self.stats["replies"] += 1
+        self.stats["tokens"] += len(parts)
+        self.stats["ttft"] += self.last_ttft or 0.0
+        self.stats["stream_time"] += streaming
+        return "".join(parts)
+
+    @property
+    def mean_ttft(self) -> float:
+        return self.stats["ttft"] / self.stats["replies"] if self.stats["replies"] else 0.0
+
+    @property
+    def tokens_per_second(self) -> float:
+        """Streamed chunks (about one token each) per second, across all replies"""
+        return self.stats["tokens"] / self.stats["stream_time"] if self.stats["stream_time"] else 0.0
+
+    def _flush_every_frame(self, pending: list, lock: threading.Lock, done: threading.Event):
+        """Print text still held after a frame interval, while the stream waits for its next chunk"""
+        while not done.wait(self.frame_interval):
+            with lock:
+                self._flush(pending)
+
+    def _flush(self, pending: list):
+        """Write one frame; model text is printed verbatim rather than parsed as Rich markup"""
+        if not pending:
+            return
+        self.console.print("".join(pending), end="", markup=False, highlight=False)
+        pending.clear()
+        self.stats["frames"] += 1
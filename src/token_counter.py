@@ -0,0 +1,42 @@
+from functools import lru_cache
+from typing import List
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Role and separator tokens the chat format adds around each message
+MESSAGE_OVERHEAD = 4
+# Rough characters per token when tiktoken is unavailable
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=1)
+def _encoding():
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Tokens in text, exact with tiktoken and estimated from its length otherwise"""
+    encoding = _encoding()
+    if encoding is None:
+        return (len(text) + CHARS_PER_TOKEN - 1) // CHARS_PER_TOKEN
+    return len(encoding.encode(text))
+
+
+def count_message_tokens(messages: List[dict]) -> int:
+    return sum(count_tokens(message["content"]) + MESSAGE_OVERHEAD for message in messages)
+
+
+def truncate_tokens(text: str, max_tokens: int) -> str:
+    """Cut text down to at most max_tokens tokens"""
+    encoding = _encoding()
+    if encoding is None:
+        return text[:max(max_tokens, 0) * CHARS_PER_TOKEN]
+    return encoding.decode(encoding.encode(text)[:max(max_tokens, 0)])
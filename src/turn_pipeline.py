@@ -0,0 +1,129 @@
+import logging
+import threading
+import time
+from concurrent.futures import Executor, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+
+class TurnPipeline:
+    """
+    Small DAG executor for one chat turn. Background stages start on the executor as soon as the stages
+    they run after are done; inline stages run on the caller's thread. Each turn records when every stage
+    ran and its critical path: the chain of stages that decided when the turn finished. A failing
+    background stage is logged and kept in last_errors even if nothing waits for its result.
+    """
+
+    def __init__(self, executor: Executor = None):
+        self.executor = executor or ThreadPoolExecutor(max_workers=4)
+        self.last_timings = {}
+        self.last_errors = {}
+        self.last_critical_path = []
+        self.last_duration = 0.0
+        self.stats = {"turns": 0, "duration": 0.0, "failures": 0}
+        self.stage_totals = {}
+        self.critical_path_counts = {}
+        self._stages = {}
+        self._start = time.perf_counter()
+        self._lock = threading.Lock()
+
+    def begin(self):
+        """Start a new turn, first letting any stage the last turn left running (e.g. after an early exit) finish"""
+        wait(list(self._stages.values()))
+        self._stages = {}
+        self.last_timings = {}
+        self.last_errors = {}
+        self._start = time.perf_counter()
+
+    def submit(self, name: str, function: Callable, *args, after: Sequence[str] = ()) -> Future:
+        """Run function(*args) in the background once every stage in after has finished"""
+        future, dependencies = Future(), [self._stages[stage] for stage in after]
+        self._stages[name] = future
+        timings, errors, launched = self.last_timings, self.last_errors, []
+
+        def launch(_=None):
+            with self._lock:
+                if launched or not all(dependency.done() for dependency in dependencies):
+                    return
+                launched.append(True)
+            failed = next((dependency.exception() for dependency in dependencies if dependency.exception()), None)
+            if failed:
+                future.set_exception(failed)
+            else:
+                self.executor.submit(self._run, name, tuple(after), future, timings, errors, function, args)
+
+        for dependency in dependencies:
+            dependency.add_done_callback(launch)
+        launch()
+        return future
+
+    def result(self, name: str):
+        """Wait for a stage and return its result"""
+        return self._stages[name].result()
+
+    def exception(self, name: str) -> Optional[BaseException]:
+        """Wait for a stage and return the exception it failed with, or None"""
+        return self._stages[name].exception()
+
+    def run(self, name: str, function: Callable, *args, after: Sequence[str] = ()):
+        """Run function(*args) on this thread after the stages in after"""
+        with self.timed(name, after):
+            return function(*args)
+
+    @contextmanager
+    def timed(self, name: str, after: Sequence[str] = ()):
+        """Time a block of the caller's own work as a stage, once the stages in after are done"""
+        for stage in after:
+            self.result(stage)
+        future, timings = Future(), self.last_timings
+        self._stages[name] = future
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            timings[name] = (start - self._start, time.perf_counter() - self._start, tuple(after))
+            future.set_result(None)
+
+    def finish(self) -> List[str]:
+        """Close the turn: record stage and critical-path timings and return the critical path"""
+        finished = dict(self.last_timings)
+        if not finished:
+            return []
+        path = [max(finished, key=lambda name: finished[name][1])]
+        while True:
+            before = [stage for stage in finished[path[0]][2] if stage in finished]
+            if not before:
+                break
+            path.insert(0, max(before, key=lambda stage: finished[stage][1]))
+
+        self.last_critical_path = path
+        self.last_duration = finished[path[-1]][1]
+        self.stats["turns"] += 1
+        self.stats["duration"] += self.last_duration
+        for name, (start, end, _) in finished.items():
+            self.stage_totals[name] = self.stage_totals.get(name, 0.0) + end - start
+        for name in path:
+            self.critical_path_counts[name] = self.critical_path_counts.get(name, 0) + 1
+        return path
+
+    def stage_times(self) -> Dict[str, float]:
+        """Seconds each stage of the last turn took"""
+        return {name: end - start for name, (start, end, _) in self.last_timings.items()}
+
+    def _run(self, name: str, after: tuple, future: Future, timings: dict, errors: dict, function: Callable,
+             args: tuple):
+        start = time.perf_counter()
+        try:
+            result = function(*args)
+        except Exception as error:
+            timings[name] = (start - self._start, time.perf_counter() - self._start, after)
+            errors[name] = error
+            with self._lock:
+                self.stats["failures"] += 1
+            logger.warning("Turn stage %s failed: %r", name, error)
+            future.set_exception(error)
+            return
+        timings[name] = (start - self._start, time.perf_counter() - self._start, after)
+        future.set_result(result)
@@ -0,0 +1,153 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+class _Session:
+    """Contiguous matrix of one session's turn embeddings (float32, or int8 codes with per-row scales)"""
+
+    def __init__(self, dimensions: int, quantize: bool = False, capacity: int = 16):
+        self.quantize = quantize
+        self.vectors = np.empty((capacity, dimensions), dtype=np.int8 if quantize else np.float32)
+        self.scales = np.ones(capacity, dtype=np.float32)
+        self.norms = np.empty(capacity, dtype=np.float32)
+        self.turns = []
+        self.rows = {}
+
+    def add(self, turn_id: str, vector: np.ndarray, result: dict):
+        row = self.rows.get(turn_id)
+        if row is None:
+            row = len(self.turns)
+            if row == len(self.vectors):
+                self.vectors = np.resize(self.vectors, (row * 2, self.vectors.shape[1]))
+                self.scales = np.resize(self.scales, row * 2)
+                self.norms = np.resize(self.norms, row * 2)
+            self.rows[turn_id] = row
+            self.turns.append(result)
+        self.turns[row] = result
+        if self.quantize:
+            self.vectors[row], self.scales[row] = _quantize(vector)
+        else:
+            self.vectors[row] = vector
+        self.norms[row] = vector @ vector
+
+    def distances(self, query: np.ndarray, rows: np.ndarray) -> np.ndarray:
+        """Squared L2 from the query; int8 rows are rescaled and use the norm of the original vector"""
+        dots = self.vectors[rows] @ query
+        if self.quantize:
+            dots = dots * self.scales[rows]
+        return self.norms[rows] - 2 * dots + query @ query
+
+    @property
+    def nbytes(self) -> int:
+        count = len(self.turns)
+        return self.vectors[:count].nbytes + self.norms[:count].nbytes + (self.scales[:count].nbytes if self.quantize else 0)
+
+
+def _quantize(vector: np.ndarray) -> tuple:
+    """Symmetric int8 codes and the scale that maps them back"""
+    scale = max(float(np.abs(vector).max()), 1e-12) / 127
+    return np.round(vector / scale).astype(np.int8), scale
+
+
+class VectorIndex:
+    """
+    In-process top-k over the embeddings of recently used sessions, evicted LRU. Exact by default; with
+    quantize, vectors are held as int8 codes (a quarter of the memory) and rescored against the
+    full-precision query using each row's exact norm.
+    """
+
+    def __init__(self, max_sessions: int = 8, quantize: bool = False):
+        self.max_sessions = max_sessions
+        self.quantize = quantize
+        self.stats = {"searches": 0, "warms": 0, "evictions": 0}
+        self._sessions = OrderedDict()
+        self._warming = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        with self._lock:
+            return session_id in self._sessions
+
+    def __len__(self) -> int:
+        with self._lock:
+            return sum(len(session.turns) for session in self._sessions.values() if session)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by indexed vectors and their norms"""
+        with self._lock:
+            return sum(session.nbytes for session in self._sessions.values() if session)
+
+    def warm(self, session_id: str, entries: List[tuple]):
+        """
+        Make a session hot with its full set of (turn_id, embedding, result) entries. The matrix is built
+        first and published in one locked step, so searches never see a half-loaded session; turns added
+        meanwhile are held and applied on top of it.
+        """
+        with self._lock:
+            self._warming.setdefault(session_id, [])
+        session = None
+        for turn_id, embedding, result in entries:
+            session = self._session_with(session, turn_id, np.asarray(embedding, dtype=np.float32), result)
+        with self._lock:
+            if session_id not in self._warming:
+                return  # discarded while loading, so the entries may be stale; the next search reloads it
+            for turn_id, vector, result in self._warming.pop(session_id):
+                session = self._session_with(session, turn_id, vector, result)
+            self.stats["warms"] += 1
+            self._sessions[session_id] = session
+            self._sessions.move_to_end(session_id)
+            self._evict()
+
+    def add(self, session_id: str, turn_id: str, embedding: List[float], result: dict, touch: bool = True):
+        """Index a turn if its session is hot; cold sessions are loaded in full when next warmed"""
+        vector = np.asarray(embedding, dtype=np.float32)
+        with self._lock:
+            if session_id in self._warming:
+                self._warming[session_id].append((turn_id, vector, result))
+                return
+            if session_id not in self._sessions:
+                return
+            self._sessions[session_id] = self._session_with(self._sessions[session_id], turn_id, vector, result)
+            if touch:
+                self._sessions.move_to_end(session_id)
+
+    def discard(self, session_id: str):
+        """Drop a session so its next search reloads it, e.g. after turns were deleted"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            self._warming.pop(session_id, None)
+
+    def search(self, session_id: str, query_embedding: List[float], top_k: int) -> Optional[List[Dict]]:
+        """Exact top-k by squared L2 distance (Chroma's default metric), or None if the session is not hot"""
+        with self._lock:
+            if session_id not in self._sessions:
+                return None
+            self._sessions.move_to_end(session_id)
+            self.stats["searches"] += 1
+            session = self._sessions[session_id]
+            if session is None or top_k <= 0:
+                return []
+
+            count = len(session.turns)
+            query = np.asarray(query_embedding, dtype=np.float32)
+            distances = session.distances(query, np.arange(count))
+            k = min(top_k, count)
+            nearest = np.argpartition(distances, k - 1)[:k] if k < count else np.arange(count)
+            nearest = nearest[np.argsort(distances[nearest])]
+            return [{**session.turns[row], "distance": float(max(distances[row], 0.0))} for row in nearest]
+
+    def _session_with(self, session: Optional[_Session], turn_id: str, vector: np.ndarray, result: dict) -> _Session:
+        """session with the turn added, created on the first turn of an empty session"""
+        if session is None:
+            session = _Session(len(vector), self.quantize)
+        session.add(turn_id, vector, result)
+        return session
+
+    def _evict(self):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.stats["evictions"] += 1
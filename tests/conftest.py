@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 
 
 @pytest.fixture
@@ -16,3 +16,57 @@ def mock_response():
         response.choices[0].message.content = content
         return response
     return _create_response
+
+
+@pytest.fixture
+def mock_async_openai_client():
+    """Mock AsyncOpenAI client whose API calls are awaitable"""
+    client = MagicMock()
+    client.chat.completions.create = AsyncMock()
+    client.embeddings.create = AsyncMock()
+    return client
+
+
+@pytest.fixture
+def mock_async_stream():
+    """Factory for creating mock async streaming responses"""
+    def _create_stream(chunks):
+        async def _stream():
+            for chunk in _create_stream_chunks(chunks):
+                yield chunk
+        return _stream()
+    return _create_stream
+
+
+@pytest.fixture
+def mock_api_router(mock_response):
+    """Factory routing mocked completions by request type, independent of call order"""
+    def _create_router(exit_verdicts, security_verdicts, streams=()):
+        queues = {
+            "exit": iter(exit_verdicts),
+            "security": iter(security_verdicts),
+            "stream": iter(streams)
+        }
+        
+        def _route(**kwargs):
+            if kwargs.get("stream"):
+                return _create_stream(next(queues["stream"]))
+            system_prompt = kwargs["messages"][0]["content"]
+            kind = "security" if "security classifier" in system_prompt else "exit"
+            # The security call of an exit turn is abandoned, so it may run past the script
+            return mock_response(next(queues[kind], "1"))
+        return _route
+    return _create_router
+
+
+def _create_stream(chunks):
+    return iter(_create_stream_chunks(chunks))
+
+
+def _create_stream_chunks(chunks):
+    stream_chunks = []
+    for chunk_text in chunks:
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = chunk_text
+        stream_chunks.append(chunk)
+    return stream_chunks
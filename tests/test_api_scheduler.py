@@ -0,0 +1,108 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch
+import sys
+sys.path.insert(0, 'src')
+
+from api_scheduler import ApiScheduler
+
+
+class TestApiScheduler:
+    
+    def test_unlimited_calls_admitted_immediately(self):
+        """Test calls without a configured limit only pass through the metrics"""
+        scheduler = ApiScheduler()
+        
+        assert scheduler.acquire(0, 500, "classifier") < 0.01
+        assert scheduler.stats["admitted"] == 1
+        assert scheduler.queue_wait["classifier"]["calls"] == 1
+    
+    def test_higher_priority_overtakes_queued_background(self):
+        """Test a classifier call arriving behind queued background work is admitted first"""
+        scheduler = ApiScheduler(requests_per_minute=600)
+        scheduler.throttle()
+        order = []
+        
+        def _call(priority, name):
+            scheduler.acquire(priority, call_type=name)
+            order.append(name)
+        
+        threads = [threading.Thread(target=_call, args=(3, f"background{i}")) for i in range(2)]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.01)
+        threads.append(threading.Thread(target=_call, args=(0, "classifier")))
+        threads[-1].start()
+        for thread in threads:
+            thread.join()
+        
+        assert order == ["classifier", "background0", "background1"]
+        assert scheduler.stats["throttled"] == 3
+    
+    def test_token_bucket_paces_large_requests(self):
+        """Test a request waits until the token bucket holds its estimated tokens"""
+        scheduler = ApiScheduler(tokens_per_minute=6000)
+        scheduler.throttle()
+        
+        waited = scheduler.acquire(1, 20, "stream")
+        
+        assert 0.15 < waited < 0.5
+        assert scheduler.queue_wait["stream"]["max_wait"] == waited
+    
+    def test_full_queue_rejects(self):
+        """Test arrivals are turned away once max_queue calls are waiting"""
+        scheduler = ApiScheduler(requests_per_minute=600, max_queue=1)
+        scheduler.throttle()
+        waiter = threading.Thread(target=scheduler.acquire, args=(3,))
+        waiter.start()
+        time.sleep(0.02)
+        
+        assert scheduler.acquire(0) is None
+        waiter.join()
+        assert scheduler.stats["rejected"] == 1
+        assert scheduler.queue_depth == 0
+    
+    def test_async_waiters_in_priority_order(self):
+        """Test event-loop waiters follow the same priority order"""
+        scheduler = ApiScheduler(requests_per_minute=1200)
+        scheduler.throttle()
+        order = []
+        
+        async def _call(priority, name, delay):
+            await asyncio.sleep(delay)
+            await scheduler.acquire_async(priority, call_type=name)
+            order.append(name)
+        
+        async def _run():
+            await asyncio.gather(_call(2, "embedding", 0), _call(0, "classifier", 0.01))
+        
+        asyncio.run(_run())
+        assert order == ["classifier", "embedding"]
+    
+    def test_cancelled_async_waiter_leaves_queue(self):
+        """Test a cancelled waiter no longer holds up the queue"""
+        scheduler = ApiScheduler(requests_per_minute=60)
+        scheduler.throttle()
+        
+        async def _run():
+            task = asyncio.create_task(scheduler.acquire_async(0))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        
+        asyncio.run(_run())
+        assert scheduler.queue_depth == 0
+    
+    def test_interrupted_waiter_leaves_queue(self):
+        """Test a thread interrupted while waiting (e.g. by Ctrl-C) no longer holds up the calls behind it"""
+        scheduler = ApiScheduler(requests_per_minute=60)
+        scheduler.throttle()
+        
+        with patch.object(scheduler._condition, "wait", side_effect=KeyboardInterrupt), \
+                pytest.raises(KeyboardInterrupt):
+            scheduler.acquire(0)
+        
+        assert scheduler.queue_depth == 0
@@ -0,0 +1,149 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import openai
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from api_scheduler import ApiScheduler
+from api_transport import ApiTransport, CALL_TYPE_HEADER, CLASSIFIER_CALL, EMBEDDING_CALL, STREAM_CALL
+from intent_classifier import IntentClassifier
+from request_hedger import RequestHedger
+
+
+@pytest.fixture
+def fake_server():
+    """Local OpenAI stand-in answering chat completions from a script of (status, delay) replies"""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _FakeHandler)
+    server.script, server.requests, server.headers, server.connections = [], [], [], set()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+class TestApiTransport:
+    
+    def test_connections_kept_alive(self, fake_server):
+        """Test repeated calls reuse one pooled connection"""
+        transport = self._transport(fake_server)
+        client = transport.client_for(CLASSIFIER_CALL)
+        
+        for _ in range(5):
+            client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        
+        assert len(fake_server.requests) == 5
+        assert len(fake_server.connections) == 1
+        transport.close()
+    
+    def test_timeouts_per_call_type(self, fake_server):
+        """Test a slow reply times out a classifier call but not a stream-class call"""
+        fake_server.script[:] = [(200, 0.5), (200, 0.5)]
+        transport = self._transport(fake_server, timeouts={CLASSIFIER_CALL: 0.1, STREAM_CALL: 5.0})
+        request = {"model": "gpt-4o", "messages": [{"role": "user", "content": "hi"}]}
+        
+        with pytest.raises(openai.APITimeoutError):
+            transport.client_for(CLASSIFIER_CALL).chat.completions.create(**request)
+        assert transport.client_for(STREAM_CALL).chat.completions.create(**request).choices[0].message.content == "1"
+        transport.close()
+    
+    def test_failed_request_retried(self, fake_server):
+        """Test a transient server error is retried on the shared client"""
+        fake_server.script[:] = [(500, 0)]
+        transport = self._transport(fake_server, max_retries=1)
+        
+        response = transport.client_for(CLASSIFIER_CALL).chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        
+        assert response.choices[0].message.content == "1"
+        assert len(fake_server.requests) == 2
+        transport.close()
+    
+    def test_hedged_classifier_takes_first_answer(self, fake_server):
+        """Test a stalled classifier call is hedged and the duplicate's answer used"""
+        fake_server.script[:] = [(200, 2.0)]
+        transport = self._transport(fake_server)
+        hedger = RequestHedger(initial_delay=0.05)
+        classifier = IntentClassifier(transport.client_for(CLASSIFIER_CALL), "gpt-4o", "Exit prompt", hedger=hedger)
+        
+        start = time.perf_counter()
+        assert classifier.classify("bye") == "1"
+        
+        assert time.perf_counter() - start < 1.0
+        assert hedger.stats["hedged"] == 1
+        assert hedger.stats["hedge_wins"] == 1
+        assert len(fake_server.requests) == 2
+    
+    def test_scheduler_sees_call_types(self, fake_server):
+        """Test scheduled requests are tagged with their call type and the tag is not sent upstream"""
+        scheduler = ApiScheduler(requests_per_minute=6000, tokens_per_minute=600000)
+        transport = self._transport(fake_server, scheduler=scheduler)
+        
+        transport.client_for(CLASSIFIER_CALL).chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "hi"}], max_tokens=1)
+        transport.client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        
+        assert set(scheduler.queue_wait) == {CLASSIFIER_CALL, "background"}
+        assert all(CALL_TYPE_HEADER not in {name.lower() for name in headers} for headers in fake_server.headers)
+        transport.close()
+    
+    def test_upstream_rate_limit_throttles(self, fake_server):
+        """Test a 429 from the server drains the buckets so the retry waits for budget"""
+        fake_server.script[:] = [(429, 0)]
+        scheduler = ApiScheduler(requests_per_minute=600)
+        transport = self._transport(fake_server, scheduler=scheduler, max_retries=1)
+        
+        response = transport.client_for(EMBEDDING_CALL).chat.completions.create(
+            model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        
+        assert response.choices[0].message.content == "1"
+        assert scheduler.stats["upstream_limited"] == 1
+        assert scheduler.queue_wait[EMBEDDING_CALL]["max_wait"] > 0
+        transport.close()
+    
+    def test_full_queue_answers_locally(self, fake_server):
+        """Test a full scheduler queue is surfaced as a rate-limit error without reaching the server"""
+        scheduler = ApiScheduler(requests_per_minute=60, max_queue=0)
+        transport = self._transport(fake_server, scheduler=scheduler)
+        
+        with pytest.raises(openai.RateLimitError):
+            transport.client_for(STREAM_CALL).chat.completions.create(
+                model="gpt-4o", messages=[{"role": "user", "content": "hi"}])
+        assert fake_server.requests == []
+        transport.close()
+    
+    @staticmethod
+    def _transport(server, **options):
+        options.setdefault("max_retries", 0)
+        return ApiTransport(api_key="test", base_url=f"http://127.0.0.1:{server.server_port}/v1", **options)
+
+
+class _FakeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(request)
+        self.server.headers.append(dict(self.headers))
+        self.server.connections.add(self.client_address)
+        status, delay = self.server.script.pop(0) if self.server.script else (200, 0)
+        time.sleep(delay)
+        body = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": request["model"],
+            "choices": [{"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": "1"}}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 1, "total_tokens": 11}
+        } if status == 200 else {"error": {"message": "unavailable"}}).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, *args):
+        pass
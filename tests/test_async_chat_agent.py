@@ -0,0 +1,75 @@
+import asyncio
+import pytest
+import sys
+from unittest.mock import MagicMock
+sys.path.insert(0, 'src')
+
+from async_chat_agent import AsyncChatAgent
+
+
+class TestAsyncChatAgent:
+    
+    @pytest.fixture
+    def agent(self, mock_async_openai_client):
+        return AsyncChatAgent(mock_async_openai_client, "gpt-4o-mini")
+    
+    def test_respond_records_history(self, agent, mock_async_openai_client, mock_response):
+        """Test a response is returned and both messages are kept"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_response("Hi there!")
+        
+        assert asyncio.run(agent.respond("Hello")) == "Hi there!"
+        assert agent.conversation_history == [
+            {"role": "user", "content": "Hello"},
+            {"role": "assistant", "content": "Hi there!"}
+        ]
+    
+    def test_respond_stream_is_async_generator(self, agent, mock_async_openai_client, mock_async_stream):
+        """Test streamed chunks are yielded and the full reply is recorded"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_async_stream(["Hi ", "there", None])
+        
+        assert asyncio.run(self._collect(agent.respond_stream("Hello"))) == ["Hi ", "there"]
+        assert agent.conversation_history[-1] == {"role": "assistant", "content": "Hi there"}
+        assert mock_async_openai_client.chat.completions.create.call_args.kwargs['stream'] is True
+    
+    def test_stream_usage_chunk_recorded(self, agent, mock_async_openai_client, mock_async_stream):
+        """Test the closing usage chunk, which has no choices, feeds the prompt cache stats"""
+        async def _stream():
+            async for chunk in mock_async_stream(["Hi"]):
+                yield chunk
+            usage_chunk = MagicMock(choices=[])
+            usage_chunk.usage.prompt_tokens = 2000
+            usage_chunk.usage.prompt_tokens_details.cached_tokens = 1536
+            yield usage_chunk
+        mock_async_openai_client.chat.completions.create.return_value = _stream()
+        
+        assert asyncio.run(self._collect(agent.respond_stream("Hello"))) == ["Hi"]
+        assert agent.conversation_history[-1] == {"role": "assistant", "content": "Hi"}
+        assert mock_async_openai_client.chat.completions.create.call_args.kwargs['stream_options'] == {"include_usage": True}
+        assert agent.prompt_cache.hit_ratio == 0.768
+    
+    def test_open_stream_does_not_record_turn(self, agent, mock_async_openai_client, mock_async_stream):
+        """Test a stream opened ahead of time only records the turn when consumed"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_async_stream(["Ok"])
+        
+        async def _run():
+            stream = await agent.open_stream("Hello")
+            assert agent.conversation_history == []
+            return await self._collect(agent.respond_stream("Hello", stream))
+        
+        assert asyncio.run(_run()) == ["Ok"]
+        assert len(agent.conversation_history) == 2
+    
+    def test_concurrent_conversations(self, mock_async_openai_client, mock_async_stream):
+        """Test one event loop drives hundreds of independent conversations"""
+        mock_async_openai_client.chat.completions.create.side_effect = lambda **kwargs: mock_async_stream(["Hi"])
+        agents = [AsyncChatAgent(mock_async_openai_client, "gpt-4o-mini") for _ in range(300)]
+        
+        async def _run_all():
+            return await asyncio.gather(*(self._collect(agent.respond_stream(f"Hello {i}")) for i, agent in enumerate(agents)))
+        
+        assert asyncio.run(_run_all()) == [["Hi"]] * 300
+        assert all(agent.conversation_history[0]['content'] == f"Hello {i}" for i, agent in enumerate(agents))
+    
+    @staticmethod
+    async def _collect(stream):
+        return [chunk async for chunk in stream]
@@ -0,0 +1,66 @@
+import asyncio
+import time
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from async_classification_gate import AsyncClassificationGate
+from classification_gate import EXIT, UNSAFE, SAFE
+
+
+class TestAsyncClassificationGate:
+    
+    @pytest.mark.parametrize("exit_verdict, security_verdict, expected", [
+        (True, True, EXIT),
+        (False, True, SAFE),
+        (False, False, UNSAFE)
+    ])
+    def test_decision(self, exit_verdict, security_verdict, expected):
+        """Test exit takes precedence, then the security verdict decides"""
+        gate = AsyncClassificationGate(self._classifier(exit_verdict), self._classifier(security_verdict))
+        
+        assert asyncio.run(gate.check("input")) == expected
+    
+    def test_no_thread_pool(self):
+        """Test the gate starts no executor, since its classifiers are tasks on the event loop"""
+        assert AsyncClassificationGate(self._classifier(False), self._classifier(True)).executor is None
+    
+    def test_classifiers_run_concurrently(self):
+        """Test both calls overlap on the event loop"""
+        gate = AsyncClassificationGate(self._classifier(False, 0.1), self._classifier(True, 0.1))
+        
+        start = time.perf_counter()
+        assert asyncio.run(gate.check("hello")) == SAFE
+        
+        assert time.perf_counter() - start < 0.18
+        assert gate.last_time_saved > 0.05
+    
+    def test_exit_cancels_security_call(self):
+        """Test an exit verdict returns without waiting for, and cancels, a slow security call"""
+        security = self._classifier(True, 0.5)
+        gate = AsyncClassificationGate(self._classifier(True), security)
+        
+        async def _check():
+            decision = await gate.check("bye")
+            await asyncio.sleep(0)
+            return decision
+        
+        start = time.perf_counter()
+        assert asyncio.run(_check()) == EXIT
+        assert time.perf_counter() - start < 0.4
+        assert security.finished == []
+        assert gate.stats["early_exits"] == 1
+    
+    @staticmethod
+    def _classifier(verdict: bool, delay: float = 0.0):
+        classifier = MagicMock()
+        classifier.finished = []
+        
+        async def _is_positive(user_input):
+            await asyncio.sleep(delay)
+            classifier.finished.append(user_input)
+            return verdict
+        
+        classifier.is_positive = _is_positive
+        return classifier
@@ -0,0 +1,62 @@
+import asyncio
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from async_intent_classifier import AsyncIntentClassifier
+
+
+class TestAsyncIntentClassifier:
+    
+    @pytest.fixture
+    def classifier(self, mock_async_openai_client):
+        return AsyncIntentClassifier(mock_async_openai_client, "gpt-4o", "Test prompt")
+    
+    def test_classify_returns_binary_values(self, classifier, mock_async_openai_client, mock_response):
+        """Test classify returns '0' or '1'"""
+        mock_async_openai_client.chat.completions.create.side_effect = [
+            mock_response("0"),
+            mock_response("1")
+        ]
+        
+        assert asyncio.run(classifier.classify("input1")) == "0"
+        assert asyncio.run(classifier.classify("input2")) == "1"
+    
+    def test_is_positive(self, classifier, mock_async_openai_client, mock_response):
+        """Test is_positive interprets '1' as True, '0' as False"""
+        mock_async_openai_client.chat.completions.create.side_effect = [
+            mock_response("1"),
+            mock_response("0")
+        ]
+        
+        assert asyncio.run(classifier.is_positive("input1")) is True
+        assert asyncio.run(classifier.is_positive("input2")) is False
+    
+    def test_whitespace_handling(self, classifier, mock_async_openai_client, mock_response):
+        """Test that responses are stripped of whitespace"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_response("  1  \n")
+        
+        assert asyncio.run(classifier.classify("input")) == "1"
+    
+    def test_api_parameters(self, classifier, mock_async_openai_client, mock_response):
+        """Test correct API parameters are used"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_response("1")
+        
+        asyncio.run(classifier.classify("test input"))
+        
+        call_kwargs = mock_async_openai_client.chat.completions.create.call_args.kwargs
+        assert call_kwargs['model'] == "gpt-4o"
+        assert call_kwargs['max_tokens'] == 1
+        assert call_kwargs['temperature'] == 0
+        assert call_kwargs['logit_bias'] == {"15": 100, "16": 100}
+        assert call_kwargs['messages'][1]['content'] == 'test input'
+    
+    def test_concurrent_classifications(self, classifier, mock_async_openai_client, mock_response):
+        """Test many classifications share one event loop"""
+        mock_async_openai_client.chat.completions.create.return_value = mock_response("1")
+        
+        async def _classify_all():
+            return await asyncio.gather(*(classifier.is_positive(f"input{i}") for i in range(200)))
+        
+        assert all(asyncio.run(_classify_all()))
+        assert mock_async_openai_client.chat.completions.create.await_count == 200
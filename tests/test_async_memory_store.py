@@ -0,0 +1,131 @@
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from async_memory_store import AsyncMemoryStore
+from memory_compactor import MemoryCompactor
+from embedding_cache import EmbeddingCache
+
+
+@pytest.fixture
+def mock_async_openai_client():
+    """Mock AsyncOpenAI client"""
+    client = MagicMock()
+    mock_embedding_response = MagicMock()
+    mock_embedding_response.data = [MagicMock(embedding=[0.1] * 1536)]
+    client.embeddings.create = AsyncMock(return_value=mock_embedding_response)
+    return client
+
+
+@pytest.fixture
+def mock_chroma_client():
+    """Mock ChromaDB client"""
+    with patch('memory_store.chromadb.PersistentClient') as mock_chroma:
+        mock_client = MagicMock()
+        mock_collection = MagicMock()
+        mock_client.get_or_create_collection.return_value = mock_collection
+        mock_chroma.return_value = mock_client
+        yield mock_collection
+
+
+class TestAsyncMemoryStore:
+    
+    def test_store_conversation_turn(self, mock_async_openai_client, mock_chroma_client):
+        """Test storing a conversation turn"""
+        store = AsyncMemoryStore(mock_async_openai_client)
+        
+        asyncio.run(store.store_turn("session123", 1, "Hello", "Hi there!"))
+        
+        call_args = mock_chroma_client.add.call_args[1]
+        assert "session123" in call_args['ids'][0]
+        assert "Hello" in call_args['documents'][0]
+        assert "Hi there!" in call_args['documents'][0]
+        assert call_args['metadatas'][0]['session_id'] == "session123"
+        assert call_args['metadatas'][0]['turn_number'] == 1
+        assert mock_async_openai_client.embeddings.create.await_count == 1
+    
+    def test_retrieve_relevant_memories(self, mock_async_openai_client, mock_chroma_client):
+        """Test retrieving relevant conversation turns across all sessions"""
+        mock_chroma_client.count.return_value = 2
+        mock_chroma_client.query.return_value = {
+            'documents': [["User: test\nAssistant: response"]],
+            'metadatas': [[{'turn_number': 1, 'timestamp': '2025-01-01T00:00:00'}]]
+        }
+        
+        store = AsyncMemoryStore(mock_async_openai_client)
+        results = asyncio.run(store.retrieve_relevant("test query", top_k=3))
+        
+        assert len(results) == 1
+        assert results[0]['content'] == "User: test\nAssistant: response"
+        assert 'where' not in mock_chroma_client.query.call_args[1]
+    
+    def test_retrieve_from_empty_store(self, mock_async_openai_client, mock_chroma_client):
+        """Test retrieval from empty memory store"""
+        mock_chroma_client.count.return_value = 0
+        
+        store = AsyncMemoryStore(mock_async_openai_client)
+        
+        assert asyncio.run(store.retrieve_relevant("test query")) == []
+        assert not mock_chroma_client.query.called
+        assert not mock_async_openai_client.embeddings.create.called
+    
+    def test_session_isolation(self, mock_async_openai_client, mock_chroma_client):
+        """Test that retrieval filters by session_id when provided"""
+        mock_chroma_client.count.return_value = 5
+        mock_chroma_client.query.return_value = {'documents': [[]], 'metadatas': [[]]}
+        
+        store = AsyncMemoryStore(mock_async_openai_client)
+        asyncio.run(store.retrieve_relevant("query", top_k=3, session_id="session123"))
+        
+        assert mock_chroma_client.query.call_args[1]['where'] == {"session_id": "session123"}
+    
+    def test_embedding_generation(self, mock_async_openai_client, mock_chroma_client):
+        """Test embedding API is awaited with the expected model"""
+        store = AsyncMemoryStore(mock_async_openai_client)
+        embedding = asyncio.run(store._generate_embedding("Hello world"))
+        
+        call_args = mock_async_openai_client.embeddings.create.call_args[1]
+        assert call_args['model'] == "text-embedding-3-small"
+        assert call_args['input'] == "Hello world"
+        assert len(embedding) == 1536
+    
+    def test_embedding_cache_used_off_the_loop(self, mock_async_openai_client, mock_chroma_client, tmp_path):
+        """Test cached embeddings skip the API and the SQLite cache is read and written on worker threads"""
+        cache = EmbeddingCache(str(tmp_path / "embeddings.sqlite3"))
+        store = AsyncMemoryStore(mock_async_openai_client, embedding_cache=cache)
+        cache_threads = []
+        for name in ("get", "put_many"):
+            method = getattr(cache, name)
+            setattr(cache, name, lambda *args, method=method: cache_threads.append(threading.get_ident()) or method(*args))
+        
+        async def _embed_twice():
+            return await store.embed("Hello"), await store.embed("Hello"), threading.get_ident()
+        
+        first, second, loop_thread = asyncio.run(_embed_twice())
+        
+        assert second == pytest.approx(first)
+        assert mock_async_openai_client.embeddings.create.await_count == 1
+        assert len(cache_threads) == 3
+        assert loop_thread not in cache_threads
+    
+    def test_bulk_load_awaits_batched_embeddings(self, mock_async_openai_client, mock_chroma_client):
+        """Test store_turns and embed_many are coroutines that embed a batch in one awaited request"""
+        mock_async_openai_client.embeddings.create.side_effect = lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[0.1] * 4, index=i) for i in range(len(input))])
+        store = AsyncMemoryStore(mock_async_openai_client)
+        turns = [{"session_id": "s1", "turn_number": n, "user_message": f"q{n}", "assistant_message": f"a{n}"}
+                 for n in range(3)]
+        
+        stored = asyncio.run(store.store_turns(turns, batch_size=3))
+        
+        assert stored == 3
+        assert mock_async_openai_client.embeddings.create.await_count == 1
+        assert mock_chroma_client.upsert.call_args[1]['embeddings'] == [[0.1] * 4] * 3
+    
+    def test_compactor_refuses_async_store(self, mock_async_openai_client, mock_chroma_client):
+        """Test the threaded compactor fails clearly instead of leaving roll-up coroutines un-awaited"""
+        with pytest.raises(TypeError, match="AsyncMemoryStore"):
+            MemoryCompactor(AsyncMemoryStore(mock_async_openai_client))
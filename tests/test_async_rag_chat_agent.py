@@ -0,0 +1,97 @@
+import asyncio
+import pytest
+from unittest.mock import patch, AsyncMock, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from async_rag_chat_agent import AsyncRAGChatAgent
+
+
+@pytest.fixture
+def mock_dependencies():
+    """Mock all AsyncRAGChatAgent dependencies"""
+    with patch('async_rag_chat_agent.AsyncChatAgent') as mock_chat_agent_class, \
+         patch('async_rag_chat_agent.AsyncMemoryStore') as mock_memory_store_class:
+        
+        mock_client = MagicMock()
+        mock_chat_agent = MagicMock()
+        mock_chat_agent.conversation_history = []
+        mock_chat_agent.summary_messages.return_value = []
+        mock_chat_agent.respond = AsyncMock()
+        mock_chat_agent.open_stream = AsyncMock()
+        mock_chat_agent_class.return_value = mock_chat_agent
+        
+        mock_memory_store = MagicMock()
+        mock_memory_store.retrieve_relevant = AsyncMock(return_value=[])
+        mock_memory_store.store_turn = AsyncMock()
+        mock_memory_store.embed = AsyncMock(return_value=[0.1] * 1536)
+        mock_memory_store_class.return_value = mock_memory_store
+        
+        yield {
+            'client': mock_client,
+            'chat_agent': mock_chat_agent,
+            'memory_store': mock_memory_store
+        }
+
+
+class TestAsyncRAGChatAgent:
+    
+    def test_respond_with_memory_context(self, mock_dependencies):
+        """Test that relevant memories are retrieved and used"""
+        mock_dependencies['memory_store'].retrieve_relevant.return_value = [
+            {"content": "User: topic X\nAssistant: about X", "turn_number": 1, "timestamp": "2025-01-01"}
+        ]
+        mock_dependencies['chat_agent'].respond.return_value = "Response with context"
+        
+        agent = AsyncRAGChatAgent(mock_dependencies['client'], "gpt-4o-mini", "session123")
+        
+        response = asyncio.run(agent.respond("Tell me more about X"))
+        
+        assert mock_dependencies['memory_store'].retrieve_relevant.call_args[0][0] == "Tell me more about X"
+        assert mock_dependencies['memory_store'].store_turn.await_count == 1
+        assert response == "Response with context"
+    
+    def test_respond_stream_with_memory(self, mock_dependencies):
+        """Test streaming response with memory context"""
+        mock_dependencies['memory_store'].retrieve_relevant.return_value = [
+            {"content": "User: X\nAssistant: Y", "turn_number": 1, "timestamp": "2025-01-01"}
+        ]
+        mock_dependencies['chat_agent'].respond_stream = lambda user_input, stream: self._agen(["Hello", " ", "world"])
+        
+        agent = AsyncRAGChatAgent(mock_dependencies['client'], "gpt-4o-mini", "session123")
+        
+        chunks = asyncio.run(self._collect(agent.respond_stream("Test query")))
+        
+        assert chunks == ["Hello", " ", "world"]
+        assert mock_dependencies['memory_store'].retrieve_relevant.await_count == 1
+        context = mock_dependencies['chat_agent'].open_stream.call_args[0][1]
+        assert "User: X" in context[0]['content']
+        
+        store_args = mock_dependencies['memory_store'].store_turn.call_args[0]
+        assert store_args[3] == "Hello world"
+        assert mock_dependencies['memory_store'].store_turn.call_args.kwargs['embedding'] == [0.1] * 1536
+        assert mock_dependencies['memory_store'].embed.await_count == 1
+    
+    def test_turn_counter_increments(self, mock_dependencies):
+        """Test that turn counter increments correctly"""
+        mock_dependencies['chat_agent'].respond.return_value = "Response"
+        
+        agent = AsyncRAGChatAgent(mock_dependencies['client'], "gpt-4o-mini", "session123")
+        
+        async def _three_turns():
+            for message in ["First", "Second", "Third"]:
+                await agent.respond(message)
+        
+        asyncio.run(_three_turns())
+        
+        calls = mock_dependencies['memory_store'].store_turn.call_args_list
+        assert [call[0][1] for call in calls] == [1, 2, 3]
+    
+    @staticmethod
+    async def _agen(items):
+        for item in items:
+            yield item
+    
+    @staticmethod
+    async def _collect(stream):
+        return [chunk async for chunk in stream]
@@ -0,0 +1,36 @@
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from chat_config import local_classifier_from_env
+from distilled_classifier import DistilledClassifier
+
+
+class TestChatConfig:
+    
+    @pytest.mark.parametrize("mode, built, shadow", [
+        ("on", True, False), ("1", True, False), ("ON", True, False), ("shadow", True, True),
+        ("", False, None), ("0", False, None), ("off", False, None), ("false", False, None)
+    ])
+    def test_fast_path_modes(self, monkeypatch, mode, built, shadow):
+        """Test only "on"/"1" and "shadow" enable the keyword fast path"""
+        monkeypatch.setenv("CLASSIFIER_FAST_PATH", mode)
+        monkeypatch.delenv("CLASSIFIER_DISTILL_DIR", raising=False)
+        
+        classifier = local_classifier_from_env("exit", {"1": ["bye"]})
+        
+        assert (classifier is not None) == built
+        if built:
+            assert classifier.shadow == shadow
+    
+    @pytest.mark.parametrize("mode, loaded", [("on", True), ("shadow", True), ("", False), ("off", False)])
+    def test_distilled_model_only_loaded_with_fast_path(self, monkeypatch, tmp_path, mode, loaded):
+        """Test a trained model is used only when the fast path is explicitly enabled"""
+        DistilledClassifier().save(str(tmp_path / "exit.npz"))
+        monkeypatch.setenv("CLASSIFIER_FAST_PATH", mode)
+        monkeypatch.setenv("CLASSIFIER_DISTILL_DIR", str(tmp_path))
+        
+        classifier = local_classifier_from_env("exit", {"1": ["bye"]})
+        
+        assert (type(classifier).__name__ == "DistilledClassifier") == loaded
+        assert (classifier is None) == (not loaded)
@@ -0,0 +1,358 @@
+import asyncio
+import json
+import pytest
+import threading
+from unittest.mock import AsyncMock, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from api_transport import ApiTransport, CLASSIFIER_CALL, EMBEDDING_CALL, STREAM_CALL
+from async_classification_gate import AsyncClassificationGate
+from async_intent_classifier import AsyncIntentClassifier
+from async_memory_store import AsyncMemoryStore
+from async_rag_chat_agent import AsyncRAGChatAgent
+from chat_server import ChatServer, GOODBYE, REFUSAL, MAX_MESSAGE_CHARS, build_server
+from chatbot import EXIT_INTENT_PROMPT, SECURITY_INTENT_PROMPT
+from classification_gate import EXIT, UNSAFE, SAFE
+from fake_openai import FakeOpenAI
+from session_registry import SessionRegistry
+
+
+class TestChatServer:
+    
+    def test_reply_streamed_as_events(self):
+        """Test a message is answered with token events and a done event"""
+        async def _scenario(server):
+            session_id = await self._create_session(server)
+            status, body = await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": "Hi"})
+            return status, self._events(body)
+        
+        status, events = self._run(_scenario)
+        
+        assert status == 200
+        assert events == [("token", {"content": "Hello"}), ("token", {"content": " there"}),
+                          ("done", {"decision": SAFE})]
+    
+    def test_sessions_keep_separate_histories(self):
+        """Test each session's agent only sees its own turns"""
+        async def _scenario(server):
+            first, second = await self._create_session(server), await self._create_session(server)
+            await self._request(server, "POST", f"/sessions/{first}/messages", {"message": "one"})
+            await self._request(server, "POST", f"/sessions/{second}/messages", {"message": "two"})
+            return [server.registry.get(session_id).history[0]["content"] for session_id in (first, second)]
+        
+        assert self._run(_scenario) == ["one", "two"]
+    
+    @pytest.mark.parametrize("decision, reply", [(EXIT, GOODBYE), (UNSAFE, REFUSAL)])
+    def test_exit_and_unsafe_answered_without_agent(self, decision, reply):
+        """Test exit says goodbye and closes the session, and unsafe input is refused"""
+        async def _scenario(server):
+            server.gate.check.return_value = decision
+            session_id = await self._create_session(server)
+            _, body = await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": "x"})
+            return self._events(body), session_id in server.registry, server.registry.get(session_id)
+        
+        events, open_after, session = self._run(_scenario)
+        
+        assert events == [("message", {"content": reply}), ("done", {"decision": decision})]
+        assert open_after == (decision == UNSAFE)
+        if session:
+            assert session.history == []
+    
+    def test_failed_turn_rolled_back(self):
+        """Test an upstream failure is reported as an event and leaves no half turn in the history"""
+        async def _scenario(server):
+            session_id = await self._create_session(server)
+            server.registry.get(session_id).agent.fail = True
+            _, body = await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": "Hi"})
+            return self._events(body), server.registry.get(session_id).history, server.stats["errors"]
+        
+        events, history, errors = self._run(_scenario)
+        
+        assert events[-1] == ("error", {"message": "ConnectionError"})
+        assert history == []
+        assert errors == 1
+    
+    def test_failed_prefetch_leaves_retrieval_to_the_reply(self):
+        """Test a memory prefetch that fails does not fail the turn; the agent retrieves inline instead"""
+        async def _scenario(server):
+            session_id = await self._create_session(server)
+            server.registry.get(session_id).agent.retrieve_error = ConnectionError("embeddings down")
+            _, body = await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": "Hi"})
+            return self._events(body), server.stats["prefetch_failures"], server.stats["errors"]
+        
+        events, prefetch_failures, errors = self._run(_scenario)
+        
+        assert events[-1] == ("done", {"decision": SAFE})
+        assert (prefetch_failures, errors) == (1, 0)
+    
+    def test_store_closed_off_the_event_loop(self):
+        """Test stop() flushes the shared memory store on a worker thread rather than blocking the loop"""
+        store = MagicMock()
+        store.close.side_effect = lambda: threads.append(threading.current_thread())
+        threads = []
+        
+        async def _main():
+            server = ChatServer(MagicMock(), SessionRegistry(lambda session_id, user_id: _StubAgent()), port=0,
+                                memory_store=store)
+            await server.start()
+            await server.stop()
+        
+        asyncio.run(_main())
+        
+        assert threads and threads[0] is not threading.main_thread()
+    
+    @pytest.mark.parametrize("method, path, payload, status", [
+        ("POST", "/sessions/unknown/messages", {"message": "Hi"}, 404),
+        ("POST", "/sessions/{id}/messages", {"message": ""}, 400),
+        ("POST", "/sessions/{id}/messages", {"message": "x" * (MAX_MESSAGE_CHARS + 1)}, 413),
+        ("GET", "/sessions", None, 405),
+        ("GET", "/nowhere", None, 404),
+        ("DELETE", "/sessions/{id}", None, 204)
+    ])
+    def test_request_errors(self, method, path, payload, status):
+        """Test bad requests are refused with the matching status"""
+        async def _scenario(server):
+            session_id = await self._create_session(server)
+            return (await self._request(server, method, path.format(id=session_id), payload))[0]
+        
+        assert self._run(_scenario) == status
+    
+    @pytest.mark.parametrize("head, status", [
+        (b"POST /sessions HTTP/1.1\r\nContent-Length: abc\r\n\r\n", 400),
+        (b"POST /sessions HTTP/1.1\r\nContent-Length: -5\r\n\r\n", 400),
+        (b"POST /sessions HTTP/1.1\r\nX-Padding: " + b"x" * 70000 + b"\r\n\r\n", 431),
+        (b"POST /" + b"x" * 70000 + b" HTTP/1.1\r\n\r\n", 400)
+    ])
+    def test_malformed_heads_refused(self, head, status):
+        """Test bad Content-Length values and oversized lines are answered with a status, not a dropped connection"""
+        async def _scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(head)
+            await writer.drain()
+            response = await reader.read()
+            writer.close()
+            return int(response.split(b" ")[1]), len(server.registry)
+        
+        assert self._run(_scenario) == (status, 0)
+    
+    def test_connection_kept_alive_between_requests(self):
+        """Test JSON requests can share one connection"""
+        async def _scenario(server):
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            for _ in range(2):
+                writer.write(b"POST /sessions HTTP/1.1\r\nHost: localhost\r\nContent-Length: 2\r\n\r\n{}")
+                await writer.drain()
+                head = await reader.readuntil(b"\r\n\r\n")
+                length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+                await reader.readexactly(length)
+            writer.close()
+            return len(server.registry), server.stats["requests"]
+        
+        assert self._run(_scenario) == (2, 2)
+    
+    def test_stats(self):
+        """Test /stats reports sessions, turns and gate counters"""
+        async def _scenario(server):
+            session_id = await self._create_session(server)
+            await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": "Hi"})
+            return json.loads((await self._request(server, "GET", "/stats"))[1])
+        
+        stats = self._run(_scenario)
+        
+        assert stats["sessions"] == 1
+        assert stats["server"]["turns"] == 1
+        assert stats["server"]["mean_ttft"] > 0
+        assert stats["registry"]["created"] == 1
+    
+    def test_client_user_id_rejected_without_api_keys(self):
+        """Test an unauthenticated server refuses to take the user from the request body"""
+        async def _scenario(server):
+            return (await self._request(server, "POST", "/sessions", {"user_id": "alice"}))[0], len(server.registry)
+        
+        assert self._run(_scenario) == (400, 0)
+    
+    def test_api_key_sets_session_owner(self):
+        """Test with API keys the session belongs to the key's user and other users cannot reach it"""
+        async def _scenario(server):
+            alice, bob = {"Authorization": "Bearer alice-key"}, {"Authorization": "Bearer bob-key"}
+            anonymous = (await self._request(server, "POST", "/sessions", {}))[0]
+            wrong_key = (await self._request(server, "POST", "/sessions", {}, {"Authorization": "Bearer nope"}))[0]
+            session_id = json.loads((await self._request(server, "POST", "/sessions", {}, alice))[1])["session_id"]
+            path = f"/sessions/{session_id}/messages"
+            as_bob = (await self._request(server, "POST", path, {"message": "Hi"}, bob))[0]
+            as_alice = (await self._request(server, "POST", path, {"message": "Hi"}, alice))[0]
+            return anonymous, wrong_key, server.registry.get(session_id).user_id, as_bob, as_alice
+        
+        assert self._run(_scenario, {"alice-key": "alice", "bob-key": "bob"}) == (401, 401, "alice", 404, 200)
+    
+    def test_build_server_refuses_public_host_without_api_keys(self, monkeypatch):
+        """Test an unauthenticated server will not listen beyond the loopback interface"""
+        monkeypatch.delenv("SERVER_API_KEYS", raising=False)
+        
+        with pytest.raises(ValueError, match="SERVER_API_KEYS"):
+            build_server(host="0.0.0.0")
+    
+    def test_build_server_honours_memory_partition(self, monkeypatch, tmp_path):
+        """Test MEMORY_PARTITION gives the server per-user async stores like the REPL"""
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("MEMORY_PERSIST_DIR", str(tmp_path))
+        monkeypatch.setenv("MEMORY_PARTITION", "collection")
+        monkeypatch.setenv("SERVER_API_KEYS", "alice-key:alice")
+        
+        server = build_server(use_memory=True)
+        
+        assert type(server.memory_store).__name__ == "MemoryRouter"
+        assert type(server.memory_store.store_for("alice")).__name__ == "AsyncMemoryStore"
+        assert server.api_keys == {"alice-key": "alice"}
+    
+    def test_build_server_refuses_global_scope_with_api_keys(self, monkeypatch, tmp_path):
+        """Test authenticated users can't be configured to retrieve each other's memories"""
+        monkeypatch.setenv("OPENAI_API_KEY", "test")
+        monkeypatch.setenv("MEMORY_PERSIST_DIR", str(tmp_path))
+        monkeypatch.setenv("SERVER_API_KEYS", "alice-key:alice")
+        monkeypatch.setenv("RAG_SCOPE", "global")
+        
+        with pytest.raises(ValueError, match="RAG_SCOPE"):
+            build_server(use_memory=True)
+    
+    def test_api_key_users_share_neither_memories_nor_cached_answers(self, monkeypatch, tmp_path):
+        """Test with two API keys one user's turns are never retrieved or replayed from cache for the other"""
+        fake = FakeOpenAI(reply="Canned answer", first_token_delay=0.0, token_delay=0.0, classifier_delay=0.0,
+                          embedding_delay=0.0).start()
+        for name, value in {"OPENAI_API_KEY": "test", "OPENAI_BASE_URL": fake.base_url,
+                            "MEMORY_PERSIST_DIR": str(tmp_path), "SERVER_API_KEYS": "alice-key:alice,bob-key:bob",
+                            "RESPONSE_CACHE_SIMILARITY": "0.9", "RETRIEVAL_GATE": "0"}.items():
+            monkeypatch.setenv(name, value)
+        for name in ("RAG_SCOPE", "MEMORY_PARTITION", "MEMORY_HOT_SESSIONS"):
+            monkeypatch.delenv(name, raising=False)
+        alice, bob = {"Authorization": "Bearer alice-key"}, {"Authorization": "Bearer bob-key"}
+        
+        async def _scenario():
+            server = build_server(use_memory=True, port=0)
+            await server.start()
+            try:
+                async def _say(headers, session_id, message):
+                    await self._request(server, "POST", f"/sessions/{session_id}/messages", {"message": message},
+                                        headers)
+                
+                sessions = [json.loads((await self._request(server, "POST", "/sessions", {}, headers))[1])["session_id"]
+                            for headers in (alice, bob)]
+                await _say(alice, sessions[0], "What is my locker code?")
+                await _say(alice, sessions[0], "My locker code is 1234")
+                await _say(bob, sessions[1], "What is my locker code?")
+                agent = server.registry.get(sessions[1]).agent
+                memories = await agent.retrieve("locker code")
+            finally:
+                await server.stop()
+            return memories, agent.response_cache.stats["hits"]
+        
+        try:
+            memories, cache_hits = asyncio.run(_scenario())
+        finally:
+            fake.stop()
+        
+        assert len(memories) == 1
+        assert "1234" not in memories[0]["content"]
+        assert cache_hits == 0
+        assert fake.stats["streams"] == 3
+    
+    def test_concurrent_sessions_against_fake_openai(self, tmp_path):
+        """Test many memory sessions share one gate, store and pool against the local OpenAI stand-in"""
+        fake = FakeOpenAI(reply="Canned answer", first_token_delay=0.05, token_delay=0.0, classifier_delay=0.05,
+                          embedding_delay=0.0).start()
+        
+        async def _scenario():
+            transport = ApiTransport(api_key="test", base_url=fake.base_url, asynchronous=True)
+            classifier_client = transport.client_for(CLASSIFIER_CALL)
+            gate = AsyncClassificationGate(AsyncIntentClassifier(classifier_client, "gpt-4o", EXIT_INTENT_PROMPT),
+                                           AsyncIntentClassifier(classifier_client, "gpt-4o", SECURITY_INTENT_PROMPT))
+            store = AsyncMemoryStore(transport.client_for(EMBEDDING_CALL), str(tmp_path))
+            registry = SessionRegistry(lambda session_id, user_id: AsyncRAGChatAgent(
+                transport.client_for(STREAM_CALL), "gpt-4o", session_id, memory_store=store))
+            server = ChatServer(gate, registry, port=0, transport=transport, memory_store=store)
+            await server.start()
+            try:
+                async def _user(index):
+                    session_id = await self._create_session(server)
+                    path = f"/sessions/{session_id}/messages"
+                    return [self._events((await self._request(server, "POST", path, {"message": f"Q{index}.{turn}"}))[1])
+                            for turn in range(2)]
+                
+                replies = await asyncio.gather(*(_user(index) for index in range(8)))
+            finally:
+                await server.stop()
+            return replies, store.corpus_size
+        
+        try:
+            replies, stored = asyncio.run(_scenario())
+        finally:
+            fake.stop()
+        
+        for turns in replies:
+            for events in turns:
+                assert "".join(data["content"] for event, data in events if event == "token") == "Canned answer"
+                assert events[-1] == ("done", {"decision": SAFE})
+        assert stored == 16
+        assert fake.stats["classifier"] == 32
+        assert fake.stats["embeddings"] == 16
+    
+    def _run(self, scenario, api_keys: dict = None):
+        async def _main():
+            gate = MagicMock()
+            gate.check = AsyncMock(return_value=SAFE)
+            gate.stats = {"turns": 0}
+            server = ChatServer(gate, SessionRegistry(lambda session_id, user_id: _StubAgent()), port=0,
+                                api_keys=api_keys)
+            await server.start()
+            try:
+                return await scenario(server)
+            finally:
+                await server.stop()
+        
+        return asyncio.run(_main())
+    
+    async def _create_session(self, server) -> str:
+        return json.loads((await self._request(server, "POST", "/sessions", {}))[1])["session_id"]
+    
+    @staticmethod
+    async def _request(server, method: str, path: str, payload: dict = None, headers: dict = None) -> tuple:
+        reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+        body = json.dumps(payload).encode() if payload is not None else b""
+        extra = "".join(f"{name}: {value}\r\n" for name, value in (headers or {}).items())
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n{extra}"
+                     f"Connection: close\r\n\r\n".encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        return int(head.split(b" ")[1]), body
+    
+    @staticmethod
+    def _events(body: bytes) -> list:
+        events = []
+        for block in body.decode().strip().split("\n\n"):
+            lines = dict(line.split(": ", 1) for line in block.split("\n"))
+            events.append((lines["event"], json.loads(lines["data"])))
+        return events
+
+
+class _StubAgent:
+    
+    def __init__(self):
+        self.conversation_history = []
+        self.fail = False
+        self.retrieve_error = None
+    
+    async def retrieve(self, user_input: str) -> list:
+        if self.retrieve_error:
+            raise self.retrieve_error
+        return []
+    
+    async def respond_stream(self, user_input: str):
+        self.conversation_history.append({"role": "user", "content": user_input})
+        for chunk in ("Hello", " there"):
+            if self.fail:
+                raise ConnectionError("upstream down")
+            yield chunk
+        self.conversation_history.append({"role": "assistant", "content": "Hello there"})
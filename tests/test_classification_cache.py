@@ -0,0 +1,93 @@
+import threading
+import pytest
+from unittest.mock import patch
+import sys
+sys.path.insert(0, 'src')
+
+from classification_cache import ClassificationCache
+
+
+class TestClassificationCache:
+    
+    @pytest.mark.parametrize("first, second", [
+        ("Bye", "bye"),
+        ("  thanks  ", "thanks"),
+        ("ok!", "OK"),
+        ("see   you", "see you")
+    ])
+    def test_key_normalizes_input(self, first, second):
+        """Test trivially different phrasings share a key"""
+        assert ClassificationCache.key("m", "p", first) == ClassificationCache.key("m", "p", second)
+    
+    def test_key_separates_prompts_and_models(self):
+        """Test entries for different classifiers never collide"""
+        keys = {
+            ClassificationCache.key("m", "exit prompt", "bye"),
+            ClassificationCache.key("m", "security prompt", "bye"),
+            ClassificationCache.key("other", "exit prompt", "bye")
+        }
+        assert len(keys) == 3
+    
+    def test_hit_and_miss_counters(self):
+        """Test lookups are counted"""
+        cache = ClassificationCache()
+        
+        assert cache.get("k") is None
+        cache.put("k", "1")
+        
+        assert cache.get("k") == "1"
+        assert cache.stats["hits"] == 1
+        assert cache.stats["misses"] == 1
+        assert cache.hit_rate == 0.5
+    
+    def test_lru_eviction(self):
+        """Test the least recently used entry is evicted first"""
+        cache = ClassificationCache(max_entries=2)
+        cache.put("a", "0")
+        cache.put("b", "1")
+        cache.get("a")
+        cache.put("c", "1")
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == "0"
+        assert cache.get("c") == "1"
+        assert cache.stats["evictions"] == 1
+    
+    def test_ttl_expiry(self):
+        """Test entries older than the TTL are treated as misses"""
+        cache = ClassificationCache(ttl=60)
+        with patch('classification_cache.time.time', return_value=1000.0):
+            cache.put("k", "1")
+        
+        with patch('classification_cache.time.time', return_value=1030.0):
+            assert cache.get("k") == "1"
+        with patch('classification_cache.time.time', return_value=1061.0):
+            assert cache.get("k") is None
+    
+    def test_persisted_entries_survive_restart(self, tmp_path):
+        """Test a new cache instance reads warm entries from disk"""
+        path = str(tmp_path / "classifications.db")
+        ClassificationCache(persist_path=path).put("k", "1")
+        
+        restarted = ClassificationCache(persist_path=path)
+        
+        assert restarted.get("k") == "1"
+        assert restarted.stats["hits"] == 1
+    
+    def test_thread_safe_sharing(self):
+        """Test concurrent writers and readers keep the cache bounded"""
+        cache = ClassificationCache(max_entries=50)
+        
+        def _worker(worker_id):
+            for i in range(200):
+                cache.put(f"{worker_id}-{i}", "1")
+                cache.get(f"{worker_id}-{i // 2}")
+        
+        threads = [threading.Thread(target=_worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert len(cache._entries) == 50
+        assert cache.stats["hits"] + cache.stats["misses"] == 1600
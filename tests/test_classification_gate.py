@@ -0,0 +1,57 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from classification_gate import ClassificationGate, EXIT, UNSAFE, SAFE
+
+
+class TestClassificationGate:
+    
+    @pytest.fixture
+    def classifiers(self):
+        return MagicMock(), MagicMock()
+    
+    @pytest.mark.parametrize("exit_verdict, security_verdict, expected", [
+        (True, True, EXIT),
+        (True, False, EXIT),
+        (False, True, SAFE),
+        (False, False, UNSAFE)
+    ])
+    def test_decision(self, classifiers, exit_verdict, security_verdict, expected):
+        """Test exit takes precedence, then the security verdict decides"""
+        exit_classifier, security_classifier = classifiers
+        exit_classifier.is_positive.return_value = exit_verdict
+        security_classifier.is_positive.return_value = security_verdict
+        
+        gate = ClassificationGate(exit_classifier, security_classifier)
+        
+        assert gate.check("input") == expected
+        exit_classifier.is_positive.assert_called_once_with("input")
+    
+    def test_returns_on_exit_without_waiting_for_security(self, classifiers):
+        """Test an exit verdict does not wait for a slow security call"""
+        exit_classifier, security_classifier = classifiers
+        exit_classifier.is_positive.return_value = True
+        security_classifier.is_positive.side_effect = lambda _: time.sleep(0.5) or True
+        
+        gate = ClassificationGate(exit_classifier, security_classifier)
+        start = time.perf_counter()
+        
+        assert gate.check("bye") == EXIT
+        assert time.perf_counter() - start < 0.4
+        assert gate.stats["early_exits"] == 1
+    
+    def test_reports_time_saved(self, classifiers):
+        """Test concurrent calls save roughly one round trip per turn"""
+        exit_classifier, security_classifier = classifiers
+        exit_classifier.is_positive.side_effect = lambda _: time.sleep(0.1) or False
+        security_classifier.is_positive.side_effect = lambda _: time.sleep(0.1) or True
+        
+        gate = ClassificationGate(exit_classifier, security_classifier)
+        
+        assert gate.check("hello") == SAFE
+        assert gate.last_time_saved > 0.05
+        assert gate.stats["turns"] == 1
+        assert gate.stats["time_saved"] == gate.last_time_saved
@@ -0,0 +1,68 @@
+import pytest
+from datetime import datetime, timedelta
+import sys
+sys.path.insert(0, 'src')
+
+from context_builder import ContextBuilder, MEMORY_HEADER
+from token_counter import count_message_tokens
+
+HISTORY = [
+    {"role": "user", "content": "What is RAG?"},
+    {"role": "assistant", "content": "Retrieval augmented generation."},
+    {"role": "user", "content": "Who wrote Dune?"},
+    {"role": "assistant", "content": "Frank Herbert."}
+]
+
+
+class TestContextBuilder:
+    
+    def test_unbudgeted_context_puts_memories_after_recent_window(self):
+        """Test memories form one system message after the recent window, keeping the stable prefix first"""
+        builder = ContextBuilder(recent_turns=1)
+        
+        context = builder.build([self._memory("User: A\nAssistant: B", 0.2)], HISTORY, "Next")
+        
+        assert context[:-1] == HISTORY[-2:]
+        assert context[-1] == {"role": "system", "content": MEMORY_HEADER + "User: A\nAssistant: B\n\n"}
+    
+    def test_memories_in_recent_window_dropped(self):
+        """Test a retrieved turn already in the recent window is not sent twice"""
+        builder = ContextBuilder(recent_turns=2)
+        memories = [self._memory("User: Who wrote Dune?\nAssistant: Frank Herbert.", 0.1),
+                    self._memory("User: A\nAssistant: B", 0.5),
+                    self._memory("User: A\nAssistant: B", 0.5)]
+        
+        context = builder.build(memories, HISTORY, "Next")
+        
+        assert "Dune" not in context[-1]["content"]
+        assert context[-1]["content"].count("User: A") == 1
+        assert builder.stats["duplicates"] == 2
+        assert builder.last_tokens_saved > 0
+    
+    def test_ranked_by_distance_with_age_penalty(self):
+        """Test a slightly closer but much older memory ranks behind a fresh one"""
+        builder = ContextBuilder(recent_turns=0, recency_weight=0.01)
+        old = self._memory("User: old\nAssistant: turn", 0.40, days_ago=100)
+        fresh = self._memory("User: fresh\nAssistant: turn", 0.45)
+        
+        context = builder.build([old, fresh], [], "Next")
+        
+        assert context[0]["content"].index("fresh") < context[0]["content"].index("old")
+    
+    @pytest.mark.parametrize("max_tokens", [40, 80, 200])
+    def test_budget_enforced_newest_turns_first(self, max_tokens):
+        """Test the context never exceeds the budget, keeping recent turns before memories"""
+        builder = ContextBuilder(max_tokens=max_tokens, recent_turns=2)
+        memories = [self._memory(f"User: fact {i}\nAssistant: " + "detail " * 40, 0.1 * i) for i in range(4)]
+        
+        context = builder.build(memories, HISTORY, "Next question")
+        
+        assert count_message_tokens(context + [{"role": "user", "content": "Next question"}]) <= max_tokens
+        assert HISTORY[-1] in context
+        assert builder.last_tokens_saved > 0
+        assert builder.stats["dropped"] + builder.stats["truncated"] > 0
+    
+    @staticmethod
+    def _memory(content, distance, days_ago=0):
+        timestamp = (datetime.now() - timedelta(days=days_ago)).isoformat()
+        return {"content": content, "turn_number": 1, "timestamp": timestamp, "distance": distance}
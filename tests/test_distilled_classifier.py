@@ -0,0 +1,70 @@
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from distilled_classifier import DistilledClassifier, VerdictLog
+from intent_classifier import IntentClassifier
+
+EXIT_INPUTS = ["bye", "goodbye", "see you later", "quit", "exit now", "i have to go", "bye bye", "talk later"]
+CONTINUE_INPUTS = ["what is the weather", "tell me a joke", "how do i cook rice", "help with math",
+                   "who won the game", "explain python lists", "what time is it", "summarize this"]
+
+
+@pytest.fixture
+def records():
+    """Logged exit-classifier verdicts"""
+    return ([{"input": text, "verdict": "1"} for text in EXIT_INPUTS] +
+            [{"input": text, "verdict": "0"} for text in CONTINUE_INPUTS]) * 4
+
+
+class TestDistilledClassifier:
+    
+    def test_trained_model_reproduces_logged_verdicts(self, records):
+        """Test the distilled model agrees with the labels it was trained on"""
+        classifier = DistilledClassifier()
+        classifier.train(records)
+        
+        report = classifier.evaluate(records)
+        
+        assert report["accuracy"] == 1.0
+        assert report["call_reduction"] > 0.5
+        assert report["latency_ms"] < 5
+    
+    def test_untrained_model_defers(self):
+        """Test a model with no training data never settles an input"""
+        assert DistilledClassifier().predict("bye") is None
+    
+    def test_save_and_load_roundtrip(self, records, tmp_path):
+        """Test a saved model predicts identically after loading"""
+        classifier = DistilledClassifier(confidence=0.8)
+        classifier.train(records)
+        path = str(tmp_path / "exit.npz")
+        
+        classifier.save(path)
+        loaded = DistilledClassifier.load(path)
+        
+        assert loaded.confidence == pytest.approx(0.8)
+        assert loaded.probability("see you") == pytest.approx(classifier.probability("see you"))
+    
+    def test_verdict_log_roundtrip(self, tmp_path):
+        """Test logged verdicts are read back in order"""
+        log = VerdictLog(str(tmp_path / "exit.jsonl"))
+        log.append("bye", "1")
+        log.append("hello", "0")
+        
+        assert log.read() == [{"input": "bye", "verdict": "1"}, {"input": "hello", "verdict": "0"}]
+    
+    def test_classifier_logs_model_verdicts_only(self, mock_openai_client, mock_response, records, tmp_path):
+        """Test model verdicts are logged while locally settled inputs are not"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("0")
+        local = DistilledClassifier()
+        local.train(records)
+        log = VerdictLog(str(tmp_path / "exit.jsonl"))
+        classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Exit prompt",
+                                      pre_classifier=local, verdict_log=log)
+        
+        assert classifier.classify("goodbye") == "1"
+        classifier.classify("is the moon made of cheese")
+        
+        assert log.read() == [{"input": "is the moon made of cheese", "verdict": "0"}]
+        assert mock_openai_client.chat.completions.create.call_count == 1
@@ -0,0 +1,89 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from embedding_cache import EmbeddingCache
+from memory_store import MemoryStore
+
+
+@pytest.fixture
+def mock_openai_client():
+    """Mock OpenAI client returning a fixed embedding"""
+    client = MagicMock()
+    client.embeddings.create.return_value.data = [MagicMock(embedding=[0.25] * 1536)]
+    return client
+
+
+@pytest.fixture
+def mock_chroma_client():
+    """Mock ChromaDB client"""
+    with patch('memory_store.chromadb.PersistentClient') as mock_chroma:
+        mock_collection = MagicMock()
+        mock_chroma.return_value.get_or_create_collection.return_value = mock_collection
+        yield mock_collection
+
+
+class TestEmbeddingCache:
+    
+    def test_key_is_content_addressed(self):
+        """Test identical text shares a key per model"""
+        assert EmbeddingCache.key("m", "hello") == EmbeddingCache.key("m", "hello")
+        assert EmbeddingCache.key("m", "hello") != EmbeddingCache.key("other", "hello")
+        assert EmbeddingCache.key("m", "hello") != EmbeddingCache.key("m", "Hello")
+    
+    def test_roundtrip_in_memory(self):
+        """Test a stored vector is returned as float32 values"""
+        cache = EmbeddingCache()
+        cache.put(("m", "d"), [0.5, -1.0, 0.125])
+        
+        assert cache.get(("m", "d")) == [0.5, -1.0, 0.125]
+        assert cache.stats == {"hits": 1, "disk_hits": 0, "misses": 0}
+    
+    def test_lru_bound(self):
+        """Test the in-process tier keeps at most max_entries vectors"""
+        cache = EmbeddingCache(max_entries=2)
+        for i in range(3):
+            cache.put(("m", str(i)), [float(i)])
+        
+        assert cache.get(("m", "0")) is None
+        assert cache.get(("m", "2")) == [2.0]
+    
+    def test_persisted_vectors_survive_restart(self, tmp_path):
+        """Test vectors are read back from the SQLite blob table"""
+        path = str(tmp_path / "embeddings.db")
+        EmbeddingCache(path).put(("m", "d"), [0.1] * 1536)
+        
+        restarted = EmbeddingCache(path)
+        vector = restarted.get(("m", "d"))
+        
+        assert len(vector) == 1536
+        assert vector[0] == pytest.approx(0.1)
+        assert restarted.stats["disk_hits"] == 1
+        assert restarted.hit_rate == 1.0
+    
+    def test_put_many_commits_once(self, tmp_path):
+        """Test a batch is written with one executemany and one commit, and reads back after a restart"""
+        path = str(tmp_path / "embeddings.db")
+        cache = EmbeddingCache(path)
+        cache._db = MagicMock(wraps=cache._db)
+        
+        cache.put_many([("m", "a"), ("m", "b")], [[1.0, 0.0], [0.0, 1.0]])
+        
+        assert cache._db.executemany.call_count == 1
+        assert cache._db.commit.call_count == 1
+        assert EmbeddingCache(path).get(("m", "b")) == [0.0, 1.0]
+    
+    def test_memory_store_embeds_repeated_text_once(self, mock_openai_client, mock_chroma_client):
+        """Test repeated queries and re-ingestion reuse cached embeddings"""
+        mock_chroma_client.count.return_value = 1
+        mock_chroma_client.query.return_value = {'documents': [[]], 'metadatas': [[]]}
+        cache = EmbeddingCache()
+        store = MemoryStore(mock_openai_client, embedding_cache=cache)
+        
+        store.retrieve_relevant("What is RAG?")
+        store.retrieve_relevant("What is RAG?")
+        store.store_turn("session123", 1, "What is RAG?", "Retrieval augmented generation")
+        
+        assert mock_openai_client.embeddings.create.call_count == 1
+        assert cache.stats["hits"] == 2
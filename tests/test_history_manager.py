@@ -0,0 +1,128 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from history_manager import HistoryManager
+from chat_agent import ChatAgent
+
+
+@pytest.fixture
+def summary_client():
+    """Client whose completions answer with a fixed summary"""
+    client = MagicMock()
+    client.chat.completions.create.return_value = MagicMock(
+        choices=[MagicMock(message=MagicMock(content="Ada asked about tea"))])
+    return client
+
+
+class TestHistoryManager:
+    
+    def test_overflow_folded_into_summary(self, summary_client):
+        """Test history past the token limit keeps only the last turns plus a summary"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini", max_tokens=20, keep_last=1)
+        history = self._history(4)
+        
+        manager.compact(history)
+        manager.wait()
+        history = manager.apply(history)
+        
+        assert history == self._history(4)[-2:]
+        assert manager.summary_messages()[0]["content"].endswith("Ada asked about tea")
+        assert manager.stats["summarized_messages"] == 6
+    
+    def test_summary_applied_only_by_caller(self, summary_client):
+        """Test the worker leaves the live history alone until apply() hands back a new list"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini", max_tokens=20, keep_last=1)
+        history = self._history(4)
+        
+        manager.compact(history)
+        manager.wait()
+        
+        assert history == self._history(4)
+        assert manager.summary_messages() == []
+        assert manager.apply(history) is not history
+        assert history == self._history(4)
+    
+    def test_stale_summary_discarded(self, summary_client):
+        """Test a summary is dropped if the turns it covers are no longer at the head of history"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini", max_tokens=20, keep_last=1)
+        manager.compact(self._history(4))
+        manager.wait()
+        
+        history = self._history(1)
+        
+        assert manager.apply(history) is history
+        assert manager.summary_messages() == []
+    
+    def test_close_stops_own_executor_only(self, summary_client):
+        """Test close() shuts down the pool the manager made, but not one it was given"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini")
+        shared = MagicMock()
+        
+        manager.close()
+        HistoryManager(summary_client, "gpt-4o-mini", executor=shared).close()
+        
+        with pytest.raises(RuntimeError):
+            manager.executor.submit(print)
+        assert not shared.shutdown.called
+    
+    def test_short_history_left_alone(self, summary_client):
+        """Test nothing is summarized while history fits the limit"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini", max_tokens=10000, keep_last=1)
+        history = self._history(4)
+        
+        manager.compact(history)
+        manager.wait()
+        
+        assert len(history) == 8
+        assert manager.summary_messages() == []
+        assert not summary_client.chat.completions.create.called
+    
+    def test_previous_summary_carried_into_next(self, summary_client):
+        """Test a second roll-up folds the earlier summary in rather than losing it"""
+        manager = HistoryManager(summary_client, "gpt-4o-mini", max_tokens=20, keep_last=1)
+        history = self._history(4)
+        manager.compact(history)
+        manager.wait()
+        history = manager.apply(history)
+        
+        history.extend(self._history(3))
+        manager.compact(history)
+        manager.wait()
+        manager.apply(history)
+        
+        prompt = summary_client.chat.completions.create.call_args[1]['messages'][1]['content']
+        assert prompt.startswith("Previous summary:\nAda asked about tea")
+        assert manager.stats["summaries"] == 2
+    
+    def test_turns_do_not_wait_for_summary(self, summary_client):
+        """Test the agent keeps answering with full history while the summary is still running"""
+        release = threading.Event()
+        summary_client.chat.completions.create.side_effect = lambda **request: (
+            release.wait(), MagicMock(choices=[MagicMock(message=MagicMock(content="summary"))]))[1]
+        chat_client = MagicMock()
+        chat_client.chat.completions.create.return_value = MagicMock(
+            choices=[MagicMock(message=MagicMock(content="answer " * 20))])
+        agent = ChatAgent(chat_client, "gpt-4o-mini", HistoryManager(summary_client, "gpt-4o-mini", 20, 1))
+        
+        agent.respond("first")
+        agent.respond("second")
+        sent_before = chat_client.chat.completions.create.call_args[1]['messages']
+        release.set()
+        agent.history_manager.wait()
+        agent.respond("third")
+        sent_after = chat_client.chat.completions.create.call_args[1]['messages']
+        
+        assert [message["content"] for message in sent_before][:1] == ["first"]
+        assert sent_after[0] == {"role": "system", "content": "Summary of the earlier conversation:\nsummary"}
+        assert sent_after[-1] == {"role": "user", "content": "third"}
+    
+    @staticmethod
+    def _history(turns):
+        history = []
+        for i in range(turns):
+            history.append({"role": "user", "content": f"question {i} about tea"})
+            history.append({"role": "assistant", "content": f"answer {i} about tea"})
+        return history
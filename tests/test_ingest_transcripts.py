@@ -0,0 +1,74 @@
+import json
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from ingest_transcripts import ingest_transcripts
+from memory_router import MemoryRouter
+
+
+@pytest.fixture
+def transcript(tmp_path):
+    """JSONL transcript of five turns by one user"""
+    path = tmp_path / "transcript.jsonl"
+    path.write_text("".join(
+        json.dumps({"session_id": "s1", "turn_number": n, "user_message": f"q{n}", "assistant_message": f"a{n}",
+                    "user_id": "ada"}) + "\n"
+        for n in range(5)
+    ))
+    return path
+
+
+class TestIngestTranscripts:
+    
+    def test_ingests_in_batches_and_reports_throughput(self, transcript):
+        """Test every turn is stored in bounded batches and the run reports turns/sec"""
+        store = self._memory_store()
+        
+        report = ingest_transcripts(str(transcript), batch_size=2, memory_store=store, console=MagicMock())
+        
+        assert [len(call.args[0]) for call in store.store_turns.call_args_list] == [2, 2, 1]
+        assert report["turns"] == 5
+        assert report["turns_per_sec"] > 0
+    
+    def test_resumes_after_interruption(self, transcript):
+        """Test a rerun skips batches checkpointed before a failure"""
+        store = self._memory_store()
+        store.store_turns.side_effect = [2, RuntimeError("embeddings unavailable")]
+        
+        with pytest.raises(RuntimeError):
+            ingest_transcripts(str(transcript), batch_size=2, memory_store=store, console=MagicMock())
+        
+        store = self._memory_store()
+        report = ingest_transcripts(str(transcript), batch_size=2, memory_store=store, console=MagicMock())
+        
+        resumed = [turn["turn_number"] for call in store.store_turns.call_args_list for turn in call.args[0]]
+        assert resumed == [2, 3, 4]
+        assert report["total_turns"] == 5
+    
+    def test_store_opened_like_chat(self, transcript, tmp_path, monkeypatch):
+        """Test the default store honours MEMORY_PARTITION and MEMORY_EMBEDDING_DIMENSIONS through the transport"""
+        persist_dir = str(tmp_path / "memory")
+        monkeypatch.setenv("MEMORY_PERSIST_DIR", persist_dir)
+        monkeypatch.setenv("MEMORY_PARTITION", "collection")
+        monkeypatch.setenv("MEMORY_EMBEDDING_DIMENSIONS", "4")
+        
+        with patch('ingest_transcripts.ApiTransport') as transport:
+            client = transport.from_env.return_value.client_for.return_value
+            client.embeddings.create.side_effect = lambda model, input, dimensions: MagicMock(
+                data=[MagicMock(embedding=[0.1] * dimensions, index=i)
+                      for i in range(len(input) if isinstance(input, list) else 1)])
+            ingest_transcripts(str(transcript), batch_size=2, console=MagicMock())
+        
+        router = MemoryRouter(MagicMock(), persist_dir, "collection")
+        assert router.store_for("ada").collection.count() == 5
+        assert router.default_store.collection.count() == 0
+        assert client.embeddings.create.call_args.kwargs["dimensions"] == 4
+        assert transport.from_env.return_value.close.called
+    
+    @staticmethod
+    def _memory_store():
+        store = MagicMock()
+        store.store_turns.side_effect = lambda turns, batch_size: len(turns)
+        return store
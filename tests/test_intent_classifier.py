@@ -4,6 +4,7 @@ import sys
 sys.path.insert(0, 'src')
 
 from intent_classifier import IntentClassifier
+from classification_cache import ClassificationCache
 
 
 class TestIntentClassifier:
@@ -54,3 +55,44 @@ class TestIntentClassifier:
         assert messages[0]['role'] == 'system'
         assert messages[1]['role'] == 'user'
         assert messages[1]['content'] == 'test input'
+    
+    def test_cache_skips_repeat_calls(self, mock_openai_client, mock_response):
+        """Test repeated inputs are answered from the cache"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("1")
+        cache = ClassificationCache()
+        classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Exit prompt", cache)
+        
+        assert classifier.classify("Bye") == "1"
+        assert classifier.classify("bye!") == "1"
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert cache.stats["hits"] == 1
+    
+    def test_shared_cache_isolates_prompts(self, mock_openai_client, mock_response):
+        """Test classifiers sharing a cache keep separate verdicts"""
+        mock_openai_client.chat.completions.create.side_effect = [
+            mock_response("1"),
+            mock_response("0")
+        ]
+        cache = ClassificationCache()
+        exit_classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Exit prompt", cache)
+        security_classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Security prompt", cache)
+        
+        assert exit_classifier.classify("bye") == "1"
+        assert security_classifier.classify("bye") == "0"
+        assert exit_classifier.classify("bye") == "1"
+        assert mock_openai_client.chat.completions.create.call_count == 2
+    
+    def test_prompt_cache_hit_ratio(self, classifier, mock_openai_client, mock_response):
+        """Test cached prompt tokens reported by the API feed the classifier's hit ratio"""
+        responses = [mock_response("0"), mock_response("1")]
+        for response, cached_tokens in zip(responses, [0, 1024]):
+            response.usage.prompt_tokens = 1280
+            response.usage.prompt_tokens_details.cached_tokens = cached_tokens
+        mock_openai_client.chat.completions.create.side_effect = responses
+        
+        classifier.classify("input1")
+        classifier.classify("input2")
+        
+        assert classifier.prompt_cache.stats == {"requests": 2, "prompt_tokens": 2560, "cached_tokens": 1024}
+        assert classifier.prompt_cache.hit_ratio == 0.4
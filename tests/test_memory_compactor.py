@@ -0,0 +1,133 @@
+import pytest
+from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from memory_compactor import MemoryCompactor
+from memory_router import MemoryRouter
+from memory_store import MemoryStore
+from vector_index import VectorIndex
+from prune_memory import prune_memory
+
+
+@pytest.fixture
+def memory_store(tmp_path):
+    """Real ChromaDB store with a mocked OpenAI client for summaries and their embeddings"""
+    client = MagicMock()
+    client.chat.completions.create.return_value = MagicMock(choices=[MagicMock(message=MagicMock(content="Ada likes tea"))])
+    client.embeddings.create.return_value = MagicMock(data=[MagicMock(embedding=[0.5, 0.5, 0.0, 0.0], index=0)])
+    return MemoryStore(client, str(tmp_path), hot_index=VectorIndex())
+
+
+class TestMemoryCompactor:
+    
+    def test_expired_turns_removed(self, memory_store):
+        """Test turns older than the TTL are deleted and newer ones kept"""
+        self._store(memory_store, "s1", [(1, [1.0, 0, 0, 0], 3600), (2, [0, 1.0, 0, 0], 0)])
+        compactor = MemoryCompactor(memory_store, ttl=60)
+        
+        compactor.run()
+        
+        assert self._turn_numbers(memory_store, "s1") == [2]
+        assert compactor.stats["expired"] == 1 and compactor.reclaimed == 1
+    
+    def test_near_duplicates_keep_newest(self, memory_store):
+        """Test an older turn within the duplicate distance of a newer one is dropped"""
+        self._store(memory_store, "s1", [(1, [1.0, 0, 0, 0], 0), (2, [0.99, 0.01, 0, 0], 0), (3, [0, 1.0, 0, 0], 0)])
+        compactor = MemoryCompactor(memory_store, duplicate_distance=0.01)
+        
+        compactor.run()
+        
+        assert self._turn_numbers(memory_store, "s1") == [2, 3]
+        assert compactor.stats["duplicates"] == 1
+    
+    def test_old_ranges_rolled_up(self, memory_store):
+        """Test full ranges of old turns become one summary and partial ranges wait"""
+        self._store(memory_store, "s1", [(n, [float(n), 0, 0, 0], 7200) for n in range(1, 6)])
+        compactor = MemoryCompactor(memory_store, rollup_age=3600, rollup_size=2, model="gpt-4o-mini")
+        
+        compactor.run()
+        
+        stored = memory_store.collection.get(where={"session_id": "s1"})
+        assert sorted(stored["ids"]) == ["s1_rollup1-2", "s1_rollup3-4", "s1_turn5"]
+        assert "Ada likes tea" in stored["documents"][stored["ids"].index("s1_rollup1-2")]
+        assert compactor.stats["rolled_up"] == 4 and compactor.stats["rollups"] == 2
+        assert compactor.reclaimed == 2
+    
+    def test_sessions_capped_oldest_first(self, memory_store):
+        """Test each session keeps only its newest max_turns turns"""
+        self._store(memory_store, "s1", [(n, [float(n), 0, 0, 0], 100 - n) for n in range(1, 5)])
+        self._store(memory_store, "s2", [(1, [0, 1.0, 0, 0], 0)])
+        compactor = MemoryCompactor(memory_store, max_turns=2)
+        
+        compactor.run()
+        
+        assert self._turn_numbers(memory_store, "s1") == [3, 4]
+        assert self._turn_numbers(memory_store, "s2") == [1]
+    
+    def test_step_is_incremental_and_refreshes_hot_sessions(self, memory_store):
+        """Test each step compacts a bounded number of sessions and hot sessions reload without removed turns"""
+        for session_id in ("s1", "s2", "s3"):
+            self._store(memory_store, session_id, [(1, [1.0, 0, 0, 0], 3600), (2, [0, 1.0, 0, 0], 0)])
+        memory_store.retrieve_relevant("q", session_id="s1", query_embedding=[1.0, 0, 0, 0])
+        compactor = MemoryCompactor(memory_store, ttl=60, sessions_per_step=2)
+        
+        assert compactor.step() == 2
+        assert compactor.step() == 1
+        
+        results = memory_store.retrieve_relevant("q", top_k=5, session_id="s1", query_embedding=[1.0, 0, 0, 0])
+        assert [result["turn_number"] for result in results] == [2]
+        assert compactor.stats["sessions"] == 3 and compactor.stats["passes"] == 1
+    
+    def test_sessions_paged_with_a_cursor(self, memory_store):
+        """Test session ids are read a page at a time and every session is compacted once despite deletions"""
+        for session_id in ("s1", "s2", "s3", "s4", "s5"):
+            self._store(memory_store, session_id, [(1, [1.0, 0, 0, 0], 3600), (2, [0, 1.0, 0, 0], 0)])
+        compactor = MemoryCompactor(memory_store, ttl=60, sessions_per_step=2, page_size=3)
+        
+        with patch.object(memory_store.collection, "get", wraps=memory_store.collection.get) as get:
+            compactor.run()
+        
+        pages = [call.kwargs for call in get.call_args_list if call.kwargs.get("include") == ["metadatas"]]
+        assert all(page["limit"] == 3 for page in pages)
+        assert compactor.stats["sessions"] == 5 and compactor.stats["expired"] == 5
+        assert compactor.stats["passes"] == 1
+    
+    def test_prune_reports_reclaimed_entries_and_latency(self, memory_store):
+        """Test the CLI pass reports entry counts and query latency around compaction"""
+        self._store(memory_store, "s1", [(1, [1.0, 0, 0, 0], 3600), (2, [0, 1.0, 0, 0], 0)])
+        
+        with patch('prune_memory.Console'):
+            report = prune_memory(compactors=[MemoryCompactor(memory_store, ttl=60)])
+        
+        assert (report["before"], report["after"], report["reclaimed"]) == (2, 1, 1)
+        assert report["latency_before_ms"] > 0 and report["latency_after_ms"] > 0
+    
+    @pytest.mark.parametrize("mode", ["collection", "directory"])
+    def test_prune_covers_every_partition(self, tmp_path, monkeypatch, mode):
+        """Test the CLI pass prunes per-user collections and directories along with the shared collection"""
+        monkeypatch.setenv("MEMORY_TTL", "60")
+        monkeypatch.delenv("MEMORY_EMBEDDING_DIMENSIONS", raising=False)
+        router = MemoryRouter(MagicMock(), str(tmp_path), mode)
+        for user_id in (None, "alice"):
+            self._store(router.store_for(user_id), "s1", [(1, [1.0, 0, 0, 0], 3600), (2, [0, 1.0, 0, 0], 0)])
+        
+        with patch('prune_memory.Console'), patch('prune_memory.ApiTransport') as transport:
+            report = prune_memory(str(tmp_path))
+        
+        assert (report["partitions"], report["before"], report["after"], report["expired"]) == (2, 4, 2, 2)
+        assert transport.from_env.return_value.close.called
+    
+    @staticmethod
+    def _store(memory_store, session_id, turns):
+        memory_store.store_turns([{
+            "session_id": session_id, "turn_number": number, "user_message": f"q{number}",
+            "assistant_message": f"a{number}", "embedding": embedding,
+            "timestamp": (datetime.now() - timedelta(seconds=age)).isoformat()
+        } for number, embedding, age in turns])
+    
+    @staticmethod
+    def _turn_numbers(memory_store, session_id):
+        metadatas = memory_store.collection.get(where={"session_id": session_id})["metadatas"]
+        return sorted(metadata["turn_number"] for metadata in metadatas)
@@ -0,0 +1,82 @@
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from memory_router import MemoryRouter
+from memory_store import MemoryStore
+from migrate_memory import migrate_memory
+
+
+@pytest.fixture
+def mock_store_class():
+    """MemoryStore stand-in recording the partition each instance was opened on"""
+    store_class = MagicMock(side_effect=lambda client, persist_dir, collection_name, **options: MagicMock(
+        partition=(persist_dir, collection_name)))
+    return store_class
+
+
+class TestMemoryRouter:
+    
+    @pytest.mark.parametrize("mode,persist_dir_suffix,collection_prefix", [
+        ("collection", "", "conversations_"),
+        ("directory", "tenants", "conversations")
+    ])
+    def test_users_get_their_own_partition(self, mock_store_class, mode, persist_dir_suffix, collection_prefix):
+        """Test each user's turns and queries go to a dedicated collection or directory"""
+        router = MemoryRouter(MagicMock(), "/data", mode, store_class=mock_store_class)
+        
+        router.store_turn("s1", 1, "Hello", "Hi", embedding=[0.1], user_id="ada")
+        router.retrieve_relevant("Hello", user_id="ada", query_embedding=[0.1])
+        
+        ada = router.store_for("ada")
+        persist_dir, collection_name = ada.partition
+        assert ada is not router.default_store and ada is not router.store_for("grace")
+        assert persist_dir_suffix in persist_dir and collection_name.startswith(collection_prefix)
+        assert ada.store_turn.call_args.kwargs['user_id'] == "ada"
+        assert ada.retrieve_relevant.called
+        assert not router.default_store.retrieve_relevant.called
+    
+    def test_stores_lists_every_open_partition(self, mock_store_class):
+        """Test stores() returns the default store and each partition opened so far, for maintenance passes"""
+        router = MemoryRouter(MagicMock(), "/data", store_class=mock_store_class)
+        ada = router.store_for("ada")
+        
+        assert router.stores() == [router.default_store, ada]
+    
+    def test_bulk_load_streams_each_partition_in_batches(self, mock_store_class):
+        """Test bulk-loaded turns are written per user as each batch fills rather than collected first"""
+        router = MemoryRouter(MagicMock(), "/data", store_class=mock_store_class)
+        written = []
+        for store in (router.default_store, router.store_for("ada")):
+            store.store_turns.side_effect = lambda turns, batch_size, store=store: (
+                written.append((store, [turn["turn_number"] for turn in turns])), len(turns))[1]
+        turns = ({"turn_number": n, "user_id": "ada" if n % 3 else None} for n in range(7))
+        
+        stored = router.store_turns(turns, batch_size=2)
+        
+        ada = router.store_for("ada")
+        assert stored == 7
+        assert written == [(ada, [1, 2]), (router.default_store, [0, 3]), (ada, [4, 5]),
+                           (router.default_store, [6])]
+    
+    def test_unknown_mode_rejected(self, mock_store_class):
+        """Test a typo in the partition mode fails at startup"""
+        with pytest.raises(ValueError):
+            MemoryRouter(MagicMock(), "/data", "shard", store_class=mock_store_class)
+    
+    @pytest.mark.parametrize("mode", ["collection", "directory"])
+    def test_migration_moves_users_into_partitions(self, tmp_path, mode):
+        """Test migration copies each user's turns with their embeddings and leaves unmapped turns shared"""
+        store = MemoryStore(MagicMock(), str(tmp_path))
+        store.store_turn("sa", 1, "Hello", "Hi", embedding=[0.1] * 4)
+        store.store_turn("sa", 2, "Again", "Hi", embedding=[0.2] * 4)
+        store.store_turn("sx", 1, "Anonymous", "Hi", embedding=[0.3] * 4)
+        
+        with patch('migrate_memory.Console'):
+            report = migrate_memory(str(tmp_path), mode, {"sa": "ada"}, batch_size=1)
+        
+        ada = MemoryRouter(MagicMock(), str(tmp_path), mode).store_for("ada")
+        results = ada.retrieve_relevant("Hello", query_embedding=[0.1] * 4, user_id="ada")
+        assert report == {"moved": 2, "tagged": 0, "remaining": 1}
+        assert results[0]["turn_number"] == 1 and results[0]["distance"] == pytest.approx(0.0, abs=1e-6)
@@ -1,9 +1,12 @@
+import threading
 import pytest
 from unittest.mock import patch, MagicMock
 import sys
 sys.path.insert(0, 'src')
 
 from memory_store import MemoryStore
+from vector_index import VectorIndex
+from embedding_cache import EmbeddingCache
 
 
 @pytest.fixture
@@ -43,6 +46,19 @@ class TestMemoryStore:
         assert call_args['metadatas'][0]['session_id'] == "session123"
         assert call_args['metadatas'][0]['turn_number'] == 1
     
+    def test_precomputed_embeddings_skip_api(self, mock_openai_client, mock_chroma_client):
+        """Test supplied embeddings are used instead of embedding again"""
+        mock_chroma_client.count.return_value = 1
+        mock_chroma_client.query.return_value = {'documents': [[]], 'metadatas': [[]]}
+        store = MemoryStore(mock_openai_client)
+        
+        store.retrieve_relevant("Hello", query_embedding=[0.2] * 1536)
+        store.store_turn("session123", 1, "Hello", "Hi there!", embedding=[0.2] * 1536)
+        
+        assert not mock_openai_client.embeddings.create.called
+        assert mock_chroma_client.query.call_args[1]['query_embeddings'] == [[0.2] * 1536]
+        assert mock_chroma_client.add.call_args[1]['embeddings'] == [[0.2] * 1536]
+    
     def test_retrieve_relevant_memories(self, mock_openai_client, mock_chroma_client):
         """Test retrieving relevant conversation turns across all sessions"""
         mock_chroma_client.count.return_value = 2
@@ -101,3 +117,112 @@ class TestMemoryStore:
         assert call_args['model'] == "text-embedding-3-small"
         assert call_args['input'] == text_input
         assert len(embedding) == 1536
+    
+    def test_store_turns_batches_embeddings_and_upserts(self, mock_openai_client, mock_chroma_client):
+        """Test bulk storage embeds each batch in one request and upserts it in one call"""
+        mock_openai_client.embeddings.create.side_effect = lambda model, input: MagicMock(
+            data=[MagicMock(embedding=[0.1] * 4, index=i) for i in range(len(input))]
+        )
+        store = MemoryStore(mock_openai_client)
+        turns = [{"session_id": "s1", "turn_number": n, "user_message": f"q{n}", "assistant_message": f"a{n}",
+                  "timestamp": "2024-01-01T00:00:00"} for n in range(5)]
+        
+        stored = store.store_turns(iter(turns), batch_size=2)
+        
+        assert stored == 5
+        assert mock_openai_client.embeddings.create.call_count == 3
+        assert mock_chroma_client.upsert.call_count == 3
+        assert not mock_chroma_client.add.called
+        last_batch = mock_chroma_client.upsert.call_args[1]
+        assert last_batch['ids'] == ["s1_turn4"]
+        assert last_batch['metadatas'][0]['timestamp'] == "2024-01-01T00:00:00"
+    
+    def test_hot_session_served_without_chroma_query(self, mock_openai_client, mock_chroma_client):
+        """Test session queries warm the hot index once and then stay in process, including new turns"""
+        mock_chroma_client.get.return_value = {
+            'ids': ["s1_turn1"], 'embeddings': [[0.0] * 4], 'documents': ["User: old\nAssistant: turn"],
+            'metadatas': [{'session_id': "s1", 'turn_number': 1, 'timestamp': "t1"}]
+        }
+        store = MemoryStore(mock_openai_client, hot_index=VectorIndex())
+        
+        store.retrieve_relevant("q", session_id="s1", query_embedding=[1.0] * 4)
+        store.store_turn("s1", 2, "new", "turn", embedding=[1.0] * 4)
+        results = store.retrieve_relevant("q", top_k=2, session_id="s1", query_embedding=[1.0] * 4)
+        
+        assert mock_chroma_client.get.call_count == 1
+        assert not mock_chroma_client.query.called
+        assert [result["turn_number"] for result in results] == [2, 1]
+        assert results[0]["distance"] == 0.0
+    
+    def test_user_filter_combines_with_session(self, mock_openai_client, mock_chroma_client):
+        """Test user-scoped queries filter on user_id and stored turns carry it"""
+        mock_chroma_client.count.return_value = 1
+        mock_chroma_client.query.return_value = {'documents': [[]], 'metadatas': [[]]}
+        store = MemoryStore(mock_openai_client)
+        
+        store.store_turn("s1", 1, "Hello", "Hi", embedding=[0.1] * 4, user_id="ada")
+        store.retrieve_relevant("Hello", session_id="s1", query_embedding=[0.1] * 4, user_id="ada")
+        
+        assert mock_chroma_client.add.call_args[1]['metadatas'][0]['user_id'] == "ada"
+        assert mock_chroma_client.query.call_args[1]['where'] == {"$and": [{"session_id": "s1"}, {"user_id": "ada"}]}
+    
+    def test_corpus_size_tracked_locally(self, mock_openai_client, mock_chroma_client):
+        """Test the collection is counted once and later writes are tracked without asking ChromaDB"""
+        mock_chroma_client.count.return_value = 0
+        mock_chroma_client.query.return_value = {'documents': [[]], 'metadatas': [[]]}
+        store = MemoryStore(mock_openai_client)
+        
+        assert store.retrieve_relevant("Hello", query_embedding=[0.1] * 4) == []
+        store.store_turn("s1", 1, "Hello", "Hi", embedding=[0.1] * 4)
+        store.retrieve_relevant("Hello", query_embedding=[0.1] * 4)
+        store.retrieve_relevant("Hello", query_embedding=[0.1] * 4)
+        
+        assert store.corpus_size == 1
+        assert mock_chroma_client.count.call_count == 1
+        assert mock_chroma_client.query.call_count == 2
+    
+    def test_recount_waits_for_write_in_flight(self, mock_openai_client, mock_chroma_client):
+        """Test a recount from another thread can't land between a write and its increment and count it twice"""
+        stored = [0]
+        written, release = threading.Event(), threading.Event()
+        mock_chroma_client.count.side_effect = lambda: stored[0]
+        mock_chroma_client.add.side_effect = lambda **records: (
+            stored.__setitem__(0, stored[0] + 1), written.set(), release.wait(5))
+        store = MemoryStore(mock_openai_client)
+        writer = threading.Thread(target=store.store_turn, args=("s1", 1, "Hello", "Hi", [0.1] * 4))
+        
+        writer.start()
+        written.wait(5)
+        recount = threading.Thread(target=store.refresh_corpus_size)
+        recount.start()
+        recount.join(0.1)
+        blocked = recount.is_alive()
+        release.set()
+        writer.join()
+        recount.join()
+        
+        assert blocked
+        assert store.corpus_size == 1
+    
+    def test_shortened_embeddings_requested_and_cached_apart(self, mock_openai_client, mock_chroma_client):
+        """Test compact stores ask for fewer dimensions and never reuse full-size cached vectors"""
+        cache = EmbeddingCache()
+        MemoryStore(mock_openai_client, embedding_cache=cache).embed("Hello")
+        store = MemoryStore(mock_openai_client, embedding_cache=cache, dimensions=256)
+        
+        store.embed("Hello")
+        store.store_turn("s1", 1, "Hello", "Hi", embedding=[0.1] * 4)
+        
+        assert mock_openai_client.embeddings.create.call_count == 2
+        assert mock_openai_client.embeddings.create.call_args[1]['dimensions'] == 256
+        assert mock_chroma_client.add.call_args[1]['metadatas'][0]['user_message'] == "Hello"
+    
+    def test_user_message_metadata_dropped_only_when_asked(self, mock_openai_client, mock_chroma_client):
+        """Test new turns keep the user_message metadata unless drop_user_message is set"""
+        MemoryStore(mock_openai_client).store_turn("s1", 1, "Hello", "Hi", embedding=[0.1] * 4)
+        kept = mock_chroma_client.add.call_args[1]['metadatas'][0]
+        MemoryStore(mock_openai_client, drop_user_message=True).store_turn("s1", 2, "Hello", "Hi", embedding=[0.1] * 4)
+        dropped = mock_chroma_client.add.call_args[1]['metadatas'][0]
+        
+        assert kept['user_message'] == "Hello"
+        assert 'user_message' not in dropped
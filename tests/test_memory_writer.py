@@ -0,0 +1,203 @@
+import threading
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from memory_writer import MemoryWriter
+from memory_store import MemoryStore
+from vector_index import VectorIndex
+
+
+@pytest.fixture
+def mock_openai_client():
+    """Mock OpenAI client embedding each input as a constant vector"""
+    client = MagicMock()
+    
+    def _embed(model, input):
+        texts = input if isinstance(input, list) else [input]
+        response = MagicMock()
+        response.data = [MagicMock(embedding=[0.1] * 4, index=i) for i in range(len(texts))]
+        return response
+    
+    client.embeddings.create.side_effect = _embed
+    return client
+
+
+@pytest.fixture
+def mock_chroma_client():
+    """Mock ChromaDB client"""
+    with patch('memory_store.chromadb.PersistentClient') as mock_chroma:
+        mock_collection = MagicMock()
+        mock_collection.count.return_value = 0
+        mock_chroma.return_value.get_or_create_collection.return_value = mock_collection
+        yield mock_collection
+
+
+class TestMemoryWriter:
+    
+    def test_batches_until_flush(self):
+        """Test queued turns are written together on flush"""
+        batches = []
+        writer = MemoryWriter(batches.append, batch_size=10, flush_interval=60)
+        
+        for i in range(3):
+            writer.enqueue({"turn": i})
+        assert writer.queue_depth == 3
+        writer.flush()
+        
+        assert batches == [[{"turn": 0}, {"turn": 1}, {"turn": 2}]]
+        assert writer.queue_depth == 0
+        assert writer.stats["written"] == 3
+        writer.close()
+    
+    def test_flushes_at_batch_size(self):
+        """Test a full batch is written without waiting for the interval"""
+        written = threading.Event()
+        writer = MemoryWriter(lambda batch: written.set(), batch_size=2, flush_interval=60)
+        
+        writer.enqueue({"turn": 1})
+        writer.enqueue({"turn": 2})
+        
+        assert written.wait(timeout=5)
+        writer.close()
+    
+    def test_flushes_after_interval(self):
+        """Test a partial batch is written once the interval elapses"""
+        written = threading.Event()
+        writer = MemoryWriter(lambda batch: written.set(), batch_size=100, flush_interval=0.05)
+        
+        writer.enqueue({"turn": 1})
+        
+        assert written.wait(timeout=5)
+        assert writer.stats["last_flush_latency"] >= 0
+        writer.close()
+    
+    def test_close_writes_remaining_turns(self):
+        """Test shutdown persists everything still queued"""
+        batches = []
+        writer = MemoryWriter(batches.append, batch_size=100, flush_interval=60)
+        writer.enqueue({"turn": 1})
+        
+        writer.close()
+        
+        assert batches == [[{"turn": 1}]]
+    
+    def test_write_errors_are_counted(self):
+        """Test a failing batch does not stop the worker, and its turns stay pending instead of being dropped"""
+        writer = MemoryWriter(MagicMock(side_effect=RuntimeError("chroma down")), flush_interval=60,
+                              max_retries=2, retry_delay=0.001)
+        writer.enqueue({"turn": 1})
+        writer.flush()
+        
+        assert writer.stats["errors"] == 3
+        assert isinstance(writer.last_error, RuntimeError)
+        assert writer.pending() == [{"turn": 1}]
+        assert writer.failed() == [{"turn": 1}]
+        writer.close()
+    
+    def test_transient_error_retried(self):
+        """Test a batch that fails once is written on a retry"""
+        writer = MemoryWriter(MagicMock(side_effect=[RuntimeError("timeout"), None]), flush_interval=60,
+                              retry_delay=0.001)
+        writer.enqueue({"turn": 1})
+        writer.flush()
+        
+        assert writer.stats["written"] == 1
+        assert writer.pending() == [] and writer.failed() == []
+        writer.close()
+    
+    def test_failed_turns_requeued_with_next_batch(self):
+        """Test turns that exhausted their retries go out again with the next batch"""
+        batches = []
+        outcomes = iter([RuntimeError("down"), None])
+        
+        def _write(batch):
+            batches.append(list(batch))
+            outcome = next(outcomes)
+            if outcome:
+                raise outcome
+        
+        writer = MemoryWriter(_write, flush_interval=60, max_retries=0)
+        writer.enqueue({"turn": 1})
+        writer.flush()
+        writer.enqueue({"turn": 2})
+        writer.flush()
+        
+        assert batches == [[{"turn": 1}], [{"turn": 1}, {"turn": 2}]]
+        assert writer.pending() == []
+        writer.close()
+
+
+class TestWriteBehindMemoryStore:
+    
+    def test_store_turn_returns_before_writing(self, mock_openai_client, mock_chroma_client):
+        """Test store_turn only queues; embedding and add happen in one background batch"""
+        store = MemoryStore(mock_openai_client, write_behind=True)
+        store.writer.flush_interval = 60
+        
+        store.store_turn("session123", 1, "Hello", "Hi!")
+        store.store_turn("session123", 2, "How are you?", "Great!")
+        assert not mock_chroma_client.add.called
+        store.flush()
+        
+        assert mock_chroma_client.add.call_count == 1
+        assert mock_chroma_client.add.call_args[1]['ids'] == ["session123_turn1", "session123_turn2"]
+        assert mock_openai_client.embeddings.create.call_count == 1
+        assert mock_openai_client.embeddings.create.call_args[1]['input'] == ["Hello", "How are you?"]
+        store.close()
+    
+    def test_read_your_writes(self, mock_openai_client, mock_chroma_client):
+        """Test queued turns are retrievable before they reach Chroma"""
+        store = MemoryStore(mock_openai_client, write_behind=True)
+        store.writer.flush_interval = 60
+        
+        store.store_turn("session123", 1, "My name is Ada", "Nice to meet you, Ada!", embedding=[0.1] * 4)
+        results = store.retrieve_relevant("What's my name?", query_embedding=[0.1] * 4)
+        
+        assert results[0]['content'] == "User: My name is Ada\nAssistant: Nice to meet you, Ada!"
+        assert results[0]['distance'] == pytest.approx(0.0)
+        assert not mock_chroma_client.query.called
+        store.close()
+    
+    def test_pending_turns_respect_session_filter(self, mock_openai_client, mock_chroma_client):
+        """Test queued turns from other sessions stay hidden from session-scoped retrieval"""
+        store = MemoryStore(mock_openai_client, write_behind=True)
+        store.writer.flush_interval = 60
+        
+        store.store_turn("other", 1, "Secret", "Noted", embedding=[0.1] * 4)
+        
+        assert store.retrieve_relevant("query", session_id="session123", query_embedding=[0.1] * 4) == []
+        store.close()
+    
+    def test_hot_index_turn_embedded_by_writer(self, mock_openai_client, mock_chroma_client):
+        """Test a turn stored without an embedding is embedded on the writer thread, then indexed if hot"""
+        threads = []
+        embed = mock_openai_client.embeddings.create.side_effect
+        mock_openai_client.embeddings.create.side_effect = lambda **request: (
+            threads.append(threading.current_thread().name), embed(**request))[1]
+        mock_chroma_client.get.return_value = {'ids': [], 'embeddings': [], 'documents': [], 'metadatas': []}
+        store = MemoryStore(mock_openai_client, write_behind=True, hot_index=VectorIndex())
+        store.retrieve_relevant("q", session_id="session123", query_embedding=[0.1] * 4)
+        
+        store.store_turn("session123", 1, "Hello", "Hi!")
+        store.flush()
+        results = store.retrieve_relevant("q", session_id="session123", query_embedding=[0.1] * 4)
+        
+        assert threads == ["memory-writer"]
+        assert [result["turn_number"] for result in results] == [1]
+        store.close()
+    
+    def test_written_turns_embedded_with_background_client(self, mock_openai_client, mock_chroma_client):
+        """Test write-behind embeddings go through the lower-priority client, not the one queries use"""
+        background_client = MagicMock()
+        background_client.embeddings.create.side_effect = mock_openai_client.embeddings.create.side_effect
+        store = MemoryStore(mock_openai_client, write_behind=True, background_client=background_client)
+        
+        store.store_turn("session123", 1, "Hello", "Hi!")
+        store.flush()
+        store.embed("What did I say?")
+        
+        assert background_client.embeddings.create.call_args[1]['input'] == "Hello"
+        assert mock_openai_client.embeddings.create.call_args[1]['input'] == "What did I say?"
+        store.close()
@@ -0,0 +1,66 @@
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from pre_classifier import KeywordPreClassifier, PreClassifier
+from intent_classifier import IntentClassifier
+
+PATTERNS = {"1": [r"bye", r"quit", r"see (?:you|ya)"], "0": [r"hi", r"hello", r"thanks"]}
+
+
+class TestKeywordPreClassifier:
+    
+    @pytest.mark.parametrize("user_input, expected", [
+        ("bye", "1"),
+        ("  Bye!! ", "1"),
+        ("see ya", "1"),
+        ("Hello", "0"),
+        ("thanks.", "0"),
+        ("bye, but first tell me a joke", None),
+        ("how do I quit smoking?", None),
+        ("", None)
+    ])
+    def test_predict_only_full_matches(self, user_input, expected):
+        """Test only inputs fully matching one verdict are settled"""
+        assert KeywordPreClassifier(PATTERNS).predict(user_input) == expected
+    
+    def test_base_needs_predict(self):
+        """Test a pre-classifier without predict() cannot be built"""
+        with pytest.raises(TypeError):
+            PreClassifier()
+    
+    def test_ambiguous_patterns_defer(self):
+        """Test an input matching several verdicts defers to the model"""
+        pre = KeywordPreClassifier({"1": [r"ok"], "0": [r"ok"]})
+        
+        assert pre.predict("ok") is None
+    
+    def test_settled_inputs_skip_the_model(self, mock_openai_client, mock_response):
+        """Test confident inputs avoid the API call and are counted"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("0")
+        pre = KeywordPreClassifier(PATTERNS)
+        classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Exit prompt", pre_classifier=pre)
+        
+        assert classifier.is_positive("bye") is True
+        assert classifier.is_positive("What's the weather?") is False
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert pre.stats["avoided"] == 1
+    
+    def test_shadow_mode_measures_agreement(self, mock_openai_client, mock_response):
+        """Test shadow mode always calls the model and records agreement"""
+        mock_openai_client.chat.completions.create.side_effect = [
+            mock_response("1"),
+            mock_response("1"),
+            mock_response("0")
+        ]
+        pre = KeywordPreClassifier(PATTERNS, shadow=True)
+        classifier = IntentClassifier(mock_openai_client, "gpt-4o", "Exit prompt", pre_classifier=pre)
+        
+        classifier.classify("bye")
+        classifier.classify("hello")
+        classifier.classify("Tell me a joke")
+        
+        assert mock_openai_client.chat.completions.create.call_count == 3
+        assert pre.stats == {"avoided": 0, "shadowed": 2, "agreed": 1}
+        assert pre.agreement_rate == 0.5
@@ -15,6 +15,7 @@ def mock_dependencies():
         mock_client = MagicMock()
         mock_chat_agent = MagicMock()
         mock_chat_agent.conversation_history = []
+        mock_chat_agent.summary_messages.return_value = []
         mock_chat_agent_class.return_value = mock_chat_agent
         
         mock_memory_store = MagicMock()
@@ -136,3 +137,79 @@ class TestRAGChatAgent:
         assert calls[0][0][1] == 1
         assert calls[1][0][1] == 2
         assert calls[2][0][1] == 3
+    
+    @pytest.mark.parametrize("streaming", [False, True])
+    def test_user_message_embedded_once_per_turn(self, mock_dependencies, streaming):
+        """Test the retrieval embedding is reused when storing the turn"""
+        mock_dependencies['memory_store'].embed.return_value = [0.3] * 1536
+        mock_dependencies['memory_store'].retrieve_relevant.return_value = []
+        mock_dependencies['chat_agent'].respond.return_value = "Response"
+        mock_dependencies['chat_agent'].respond_stream.return_value = iter(["Response"])
+        
+        agent = RAGChatAgent(
+            mock_dependencies['client'],
+            "gpt-4o-mini",
+            "session123",
+            memory_store=mock_dependencies['memory_store']
+        )
+        
+        if streaming:
+            list(agent.respond_stream("Hello"))
+        else:
+            agent.respond("Hello")
+        
+        store = mock_dependencies['memory_store']
+        assert store.embed.call_count == 1
+        assert store.retrieve_relevant.call_args.kwargs['query_embedding'] == [0.3] * 1536
+        assert store.store_turn.call_args.kwargs['embedding'] == [0.3] * 1536
+    
+    @pytest.mark.parametrize("scope,user_id,expected", [
+        ("global", None, {}),
+        ("session", None, {"session_id": "session123", "user_id": None}),
+        ("user", "ada", {"user_id": "ada"})
+    ])
+    def test_retrieval_scope_filters(self, mock_dependencies, scope, user_id, expected):
+        """Test the configured scope decides which turns retrieval may return"""
+        mock_dependencies['memory_store'].retrieve_relevant.return_value = []
+        mock_dependencies['chat_agent'].respond.return_value = "Response"
+        
+        agent = RAGChatAgent(
+            mock_dependencies['client'],
+            "gpt-4o-mini",
+            "session123",
+            memory_store=mock_dependencies['memory_store'],
+            scope=scope,
+            user_id=user_id
+        )
+        agent.respond("Hello")
+        
+        retrieval_kwargs = mock_dependencies['memory_store'].retrieve_relevant.call_args.kwargs
+        assert {key: retrieval_kwargs[key] for key in ("session_id", "user_id") if key in retrieval_kwargs} == expected
+        assert mock_dependencies['memory_store'].store_turn.call_args.kwargs['user_id'] == user_id
+    
+    @pytest.mark.parametrize("scope,user_id", [("tenant", None), ("user", None)])
+    def test_invalid_scope_rejected(self, mock_dependencies, scope, user_id):
+        """Test unknown scopes and user scope without a user are refused up front"""
+        with pytest.raises(ValueError):
+            RAGChatAgent(mock_dependencies['client'], "gpt-4o-mini", "session123",
+                         memory_store=mock_dependencies['memory_store'], scope=scope, user_id=user_id)
+    
+    def test_prefetched_retrieval_reused_by_stream(self, mock_dependencies):
+        """Test embed_query()/retrieve() run ahead of the turn are not repeated when it streams"""
+        store = mock_dependencies['memory_store']
+        store.embed.return_value = [0.3] * 1536
+        store.retrieve_relevant.return_value = [{"content": "User: X\nAssistant: about X"}]
+        mock_dependencies['chat_agent'].respond_stream.return_value = iter(["Response"])
+        
+        agent = RAGChatAgent(mock_dependencies['client'], "gpt-4o-mini", "session123", memory_store=store)
+        agent.embed_query("Tell me about X")
+        memories = agent.retrieve("Tell me about X")
+        list(agent.respond_stream("Tell me about X"))
+        
+        assert memories == store.retrieve_relevant.return_value
+        assert store.embed.call_count == 1
+        assert store.retrieve_relevant.call_count == 1
+        assert store.store_turn.call_args.kwargs['embedding'] == [0.3] * 1536
+        
+        list(agent.respond_stream("Something else"))
+        assert store.embed.call_count == 2
@@ -0,0 +1,96 @@
+import asyncio
+import time
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from request_hedger import RequestHedger
+
+
+class TestRequestHedger:
+    
+    def test_fast_call_not_hedged(self):
+        """Test a call answering within the delay is sent once"""
+        hedger = RequestHedger(initial_delay=1.0)
+        calls = []
+        
+        assert hedger.call(lambda value: calls.append(value) or value, "ok") == "ok"
+        assert calls == ["ok"]
+        assert hedger.stats == {"calls": 1, "hedged": 0, "hedge_wins": 0, "errors": 0}
+    
+    def test_slow_call_hedged(self):
+        """Test a stalled call gets a duplicate whose answer is returned first"""
+        hedger = RequestHedger(initial_delay=0.05)
+        delays = iter([1.0, 0.0])
+        
+        start = time.perf_counter()
+        assert hedger.call(self._sleep_then_return, delays) == "done"
+        
+        assert time.perf_counter() - start < 0.5
+        assert hedger.stats["hedged"] == 1
+        assert hedger.stats["hedge_wins"] == 1
+    
+    def test_failed_primary_falls_back_to_hedge(self):
+        """Test an error from one copy is ignored while the other can still answer"""
+        hedger = RequestHedger(initial_delay=0.05)
+        outcomes = iter([0.2, 0.3])
+        
+        def _call():
+            delay = next(outcomes)
+            time.sleep(delay)
+            if delay == 0.2:
+                raise TimeoutError("primary")
+            return "hedge"
+        
+        assert hedger.call(_call) == "hedge"
+    
+    def test_all_copies_failing_raises(self):
+        """Test the error surfaces when no copy succeeds"""
+        hedger = RequestHedger(initial_delay=0.01)
+        
+        def _call():
+            time.sleep(0.05)
+            raise TimeoutError("down")
+        
+        with pytest.raises(TimeoutError):
+            hedger.call(_call)
+        assert hedger.stats["errors"] == 1
+    
+    def test_delay_follows_recent_p95(self):
+        """Test the hedge delay switches from the initial guess to the observed p95"""
+        hedger = RequestHedger(initial_delay=2.0, min_samples=20)
+        assert hedger.delay == 2.0
+        
+        hedger.latencies.extend([0.01] * 19 + [0.5])
+        
+        assert hedger.delay == 0.5
+        hedger.latencies.extend([0.01] * 80)
+        assert hedger.delay == 0.01
+    
+    def test_async_loser_cancelled(self):
+        """Test the async variant cancels the slower copy"""
+        hedger = RequestHedger(initial_delay=0.05)
+        delays = iter([1.0, 0.0])
+        cancelled = []
+        
+        async def _call():
+            try:
+                await asyncio.sleep(next(delays))
+                return "done"
+            except asyncio.CancelledError:
+                cancelled.append(True)
+                raise
+        
+        async def _run():
+            result = await hedger.call_async(_call)
+            await asyncio.sleep(0)
+            return result
+        
+        assert asyncio.run(_run()) == "done"
+        assert cancelled == [True]
+        assert hedger.stats["hedge_wins"] == 1
+    
+    @staticmethod
+    def _sleep_then_return(delays):
+        time.sleep(next(delays))
+        return "done"
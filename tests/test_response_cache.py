@@ -0,0 +1,129 @@
+import time
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from response_cache import ResponseCache
+from rag_chat_agent import RAGChatAgent, SESSION_SCOPE
+
+
+class TestResponseCache:
+    
+    def test_near_duplicate_question_hits(self):
+        """Test a question within the similarity threshold returns the cached answer"""
+        cache = ResponseCache(min_similarity=0.95)
+        cache.put("global", [1.0, 0.0, 0.0], "What is RAG?", "Retrieval augmented generation.", latency=1.5)
+        
+        entry = cache.get("global", [0.99, 0.05, 0.0])
+        
+        assert entry["answer"] == "Retrieval augmented generation."
+        assert entry["similarity"] > 0.95
+        assert cache.get("global", [0.0, 1.0, 0.0]) is None
+        assert cache.hit_rate == 0.5
+        assert cache.stats["latency_saved"] == 1.5
+    
+    def test_scopes_isolated(self):
+        """Test answers cached in one scope are not served in another"""
+        cache = ResponseCache()
+        cache.put("session:a", [1.0, 0.0], "Q", "A")
+        
+        assert cache.get("session:b", [1.0, 0.0]) is None
+        assert cache.get("session:a", [1.0, 0.0])["answer"] == "A"
+    
+    def test_ttl_expires_entries(self):
+        """Test entries older than the TTL are dropped"""
+        cache = ResponseCache(ttl=0.01)
+        cache.put("global", [1.0, 0.0], "Q", "A")
+        time.sleep(0.02)
+        
+        assert cache.get("global", [1.0, 0.0]) is None
+        assert cache.stats["expired"] == 1
+    
+    def test_least_recently_used_evicted(self):
+        """Test the cache keeps max_entries, evicting the entry unused longest"""
+        cache = ResponseCache(max_entries=2)
+        cache.put("global", [1.0, 0.0, 0.0], "Q1", "A1")
+        cache.put("global", [0.0, 1.0, 0.0], "Q2", "A2")
+        cache.get("global", [1.0, 0.0, 0.0])
+        cache.put("global", [0.0, 0.0, 1.0], "Q3", "A3")
+        
+        assert cache.get("global", [0.0, 1.0, 0.0]) is None
+        assert cache.get("global", [1.0, 0.0, 0.0])["answer"] == "A1"
+        assert cache.stats["evictions"] == 1
+
+
+class TestRAGResponseCache:
+    
+    @pytest.fixture
+    def memory_store(self):
+        store = MagicMock()
+        store.embed.side_effect = lambda text: [1.0, 0.0] if "RAG" in text else [0.0, 1.0]
+        store.retrieve_relevant.return_value = []
+        return store
+    
+    def test_opening_question_served_across_sessions(self, mock_openai_client, mock_response, memory_store):
+        """Test a second session asking the same opening question skips generation and retrieval"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("Retrieval augmented generation.")
+        cache = ResponseCache()
+        first, second = (RAGChatAgent(mock_openai_client, "gpt-4o", session_id, memory_store=memory_store,
+                                      response_cache=cache) for session_id in ("a", "b"))
+        
+        assert first.respond("What is RAG?") == "Retrieval augmented generation."
+        assert second.respond("what is RAG") == "Retrieval augmented generation."
+        
+        assert mock_openai_client.chat.completions.create.call_count == 1
+        assert memory_store.retrieve_relevant.call_count == 1
+        assert memory_store.store_turn.call_count == 2
+        assert second.chat_agent.conversation_history[-1]["content"] == "Retrieval augmented generation."
+        assert cache.stats["hits"] == 1
+    
+    def test_streamed_reply_cached_and_replayed(self, mock_openai_client, memory_store):
+        """Test a streamed opening reply is cached and replayed as a stream"""
+        chunk = MagicMock()
+        chunk.choices[0].delta.content = "Cached answer"
+        mock_openai_client.chat.completions.create.return_value = iter([chunk])
+        cache = ResponseCache()
+        first, second = (RAGChatAgent(mock_openai_client, "gpt-4o", session_id, memory_store=memory_store,
+                                      response_cache=cache) for session_id in ("a", "b"))
+        
+        assert list(first.respond_stream("What is RAG?")) == ["Cached answer"]
+        assert list(second.respond_stream("What is RAG?")) == ["Cached answer"]
+        assert mock_openai_client.chat.completions.create.call_count == 1
+    
+    def test_later_turns_not_cached(self, mock_openai_client, mock_response, memory_store):
+        """Test questions asked with history in the session always go to the model"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("Answer")
+        cache = ResponseCache()
+        agent = RAGChatAgent(mock_openai_client, "gpt-4o", "a", memory_store=memory_store, response_cache=cache)
+        
+        agent.respond("Hello")
+        agent.respond("What is RAG?")
+        agent.respond("What is RAG?")
+        
+        assert mock_openai_client.chat.completions.create.call_count == 3
+        assert cache.stats["stores"] == 1
+    
+    def test_session_scope_not_shared(self, mock_openai_client, mock_response, memory_store):
+        """Test session-scoped agents never serve each other's cached answers"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("Answer")
+        cache = ResponseCache()
+        first, second = (RAGChatAgent(mock_openai_client, "gpt-4o", session_id, memory_store=memory_store,
+                                      scope=SESSION_SCOPE, response_cache=cache) for session_id in ("a", "b"))
+        
+        first.respond("What is RAG?")
+        second.respond("What is RAG?")
+        
+        assert mock_openai_client.chat.completions.create.call_count == 2
+    
+    def test_users_not_shared_under_global_scope(self, mock_openai_client, mock_response, memory_store):
+        """Test agents of different users keep their cached answers apart even when retrieval is global"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("Answer")
+        cache = ResponseCache()
+        first, second = (RAGChatAgent(mock_openai_client, "gpt-4o", "a", memory_store=memory_store, user_id=user_id,
+                                      response_cache=cache) for user_id in ("alice", "bob"))
+        
+        first.respond("What is RAG?")
+        second.respond("What is RAG?")
+        
+        assert mock_openai_client.chat.completions.create.call_count == 2
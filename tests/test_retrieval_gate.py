@@ -0,0 +1,74 @@
+import json
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from retrieval_gate import RetrievalGate, CHITCHAT, COVERED
+from rag_chat_agent import RAGChatAgent
+from replay_retrieval_gate import replay_retrieval_gate
+
+RECENT = [
+    {"role": "user", "content": "Who wrote Dune?"},
+    {"role": "assistant", "content": "Frank Herbert wrote Dune in 1965."}
+]
+
+
+class TestRetrievalGate:
+    
+    @pytest.mark.parametrize("message", ["hi", "ok thanks!", "Sure, go ahead", "Yes please"])
+    def test_chitchat_skipped(self, message):
+        """Test messages without content words skip retrieval"""
+        gate = RetrievalGate()
+        
+        assert not gate.should_retrieve(message, RECENT)
+        assert gate.last_reason == CHITCHAT
+    
+    def test_followup_covered_by_recent_window(self):
+        """Test a short follow-up about terms already in the window skips retrieval"""
+        gate = RetrievalGate()
+        
+        assert not gate.should_retrieve("Tell me more about Dune", RECENT)
+        assert gate.last_reason == COVERED
+        assert gate.should_retrieve("Tell me more about Dune", [])
+    
+    @pytest.mark.parametrize("message", ["What did I say about my sister's wedding?", "What is RAG?",
+                                         "Did Herbert write other books besides Dune?"])
+    def test_new_topics_retrieved(self, message):
+        """Test questions with content beyond the recent window still retrieve"""
+        gate = RetrievalGate()
+        
+        assert gate.should_retrieve(message, RECENT)
+        assert gate.skip_rate == 0.0
+    
+    def test_gated_turn_skips_embedding_and_search(self, mock_openai_client, mock_response):
+        """Test a gated turn neither embeds nor searches, leaving the embedding to the store"""
+        mock_openai_client.chat.completions.create.return_value = mock_response("Hello!")
+        memory_store = MagicMock()
+        gate = RetrievalGate()
+        agent = RAGChatAgent(mock_openai_client, "gpt-4o", "s1", memory_store=memory_store, retrieval_gate=gate)
+        
+        assert agent.respond("hi") == "Hello!"
+        
+        assert not memory_store.embed.called
+        assert not memory_store.retrieve_relevant.called
+        assert memory_store.store_turn.call_args.kwargs["embedding"] is None
+        assert gate.stats == {"checks": 1, "skipped": 1, CHITCHAT: 1, COVERED: 0}
+    
+    def test_replay_reports_skips_and_recall(self, tmp_path):
+        """Test the replay counts skipped turns and the useful memories they would have missed"""
+        path = tmp_path / "replay.jsonl"
+        path.write_text("".join(json.dumps({"session_id": "s1", "turn_number": n, "user_message": question,
+                                            "assistant_message": "answer"}) + "\n"
+                                for n, question in enumerate(["What is RAG?", "ok thanks", "Who wrote Dune?"])))
+        memory_store = MagicMock()
+        memory_store.retrieve_relevant.return_value = [
+            {"content": "User: earlier\nAssistant: x", "turn_number": 0, "timestamp": "", "distance": 0.3}
+        ]
+        
+        report = replay_retrieval_gate(str(path), memory_store=memory_store, console=MagicMock())
+        
+        assert report["turns"] == 3
+        assert report["skipped"] == 1
+        assert report["missed_turns"] == 1
+        assert report["context_recall"] == pytest.approx(2 / 3)
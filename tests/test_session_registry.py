@@ -0,0 +1,114 @@
+import asyncio
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from session_registry import SessionRegistry
+
+
+class TestSessionRegistry:
+    
+    def test_sessions_get_their_own_agent(self):
+        """Test each session is built by the factory with its id and user"""
+        factory = MagicMock(side_effect=lambda session_id, user_id: MagicMock(conversation_history=[]))
+        registry = SessionRegistry(factory)
+        
+        first, second = registry.create("ada"), registry.create()
+        
+        assert first.agent is not second.agent
+        assert factory.call_args_list[0].args == (first.session_id, "ada")
+        assert registry.get(first.session_id) is first
+        assert len(registry) == 2
+    
+    def test_least_recently_used_session_evicted(self):
+        """Test going past max_sessions evicts the session used longest ago"""
+        registry = SessionRegistry(self._factory, max_sessions=2)
+        oldest, recent = registry.create(), registry.create()
+        registry.get(oldest.session_id)
+        
+        newest = registry.create()
+        
+        assert oldest.session_id in registry
+        assert recent.session_id not in registry
+        assert newest.session_id in registry
+        assert registry.stats["evicted_lru"] == 1
+    
+    def test_idle_sessions_swept(self):
+        """Test sweep() drops sessions idle past the timeout and keeps recently used ones"""
+        now = [0.0]
+        registry = SessionRegistry(self._factory, idle_timeout=60, clock=lambda: now[0])
+        idle, active = registry.create(), registry.create()
+        now[0] = 50.0
+        registry.get(active.session_id)
+        now[0] = 100.0
+        
+        assert registry.sweep() == 1
+        assert idle.session_id not in registry
+        assert active.session_id in registry
+        assert registry.stats["evicted_idle"] == 1
+    
+    def test_session_mid_turn_not_evicted(self):
+        """Test a session holding its turn lock survives both eviction paths"""
+        now = [0.0]
+        registry = SessionRegistry(self._factory, max_sessions=1, idle_timeout=1, clock=lambda: now[0])
+        
+        async def _scenario():
+            busy = registry.create()
+            async with busy.lock:
+                now[0] = 10.0
+                assert registry.sweep() == 0
+                registry.create()
+                assert busy.session_id in registry
+        
+        asyncio.run(_scenario())
+    
+    def test_new_session_kept_when_all_others_mid_turn(self):
+        """Test a full registry whose sessions are all mid-turn still keeps the session it just created"""
+        registry = SessionRegistry(self._factory, max_sessions=2)
+        
+        async def _scenario():
+            first, second = registry.create(), registry.create()
+            async with first.lock, second.lock:
+                newest = registry.create()
+                assert registry.get(newest.session_id) is newest
+                assert first.session_id in registry and second.session_id in registry
+                assert registry.stats["evicted_lru"] == 0
+        
+        asyncio.run(_scenario())
+    
+    def test_history_bounded_per_session(self):
+        """Test trim() keeps only the newest max_history_turns turns"""
+        registry = SessionRegistry(self._factory, max_history_turns=2)
+        session = registry.create()
+        for turn in range(5):
+            session.history.extend([{"role": "user", "content": f"q{turn}"},
+                                    {"role": "assistant", "content": f"a{turn}"}])
+            session.trim()
+        
+        assert [message["content"] for message in session.history] == ["q3", "a3", "q4", "a4"]
+        assert session.turns == 5
+    
+    def test_rag_agent_history_bounded(self):
+        """Test a RAG agent's history lives on its inner chat agent"""
+        agent = MagicMock()
+        agent.chat_agent.conversation_history = [{"role": "user", "content": "q"}] * 6
+        session = SessionRegistry(lambda session_id, user_id: agent, max_history_turns=1).create()
+        
+        session.trim()
+        
+        assert len(agent.chat_agent.conversation_history) == 2
+    
+    def test_close(self):
+        """Test closing removes a session once"""
+        registry = SessionRegistry(self._factory)
+        session = registry.create()
+        
+        assert registry.close(session.session_id)
+        assert not registry.close(session.session_id)
+        assert registry.get(session.session_id) is None
+    
+    @staticmethod
+    def _factory(session_id, user_id):
+        agent = MagicMock(spec=["conversation_history"])
+        agent.conversation_history = []
+        return agent
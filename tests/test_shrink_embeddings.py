@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+from unittest.mock import patch, MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from shrink_embeddings import shrink_embeddings
+from memory_router import MemoryRouter
+from memory_store import MemoryStore
+
+
+@pytest.fixture
+def stored_turns(tmp_path):
+    """Persist dir holding full-size embeddings with the legacy user_message metadata"""
+    _add_turns(MemoryStore(MagicMock(), str(tmp_path)), 30)
+    return tmp_path
+
+
+def _add_turns(store, count: int):
+    vectors = np.random.default_rng(count).standard_normal((count, 64)).astype(np.float32)
+    store.collection.add(
+        ids=[f"s1_turn{i}" for i in range(count)],
+        embeddings=vectors / np.linalg.norm(vectors, axis=1, keepdims=True),
+        documents=[f"User: q{i}\nAssistant: a{i}" for i in range(count)],
+        metadatas=[{"session_id": "s1", "turn_number": i, "timestamp": "", "user_message": f"q{i}"}
+                   for i in range(count)]
+    )
+
+
+class TestShrinkEmbeddings:
+    
+    def test_rewrites_store_and_reports_savings(self, stored_turns):
+        """Test embeddings are shortened, redundant metadata dropped, and size and recall reported"""
+        with patch('shrink_embeddings.Console'):
+            report = shrink_embeddings(str(stored_turns), dimensions=16, quantize=True, top_k=3, batch_size=7,
+                                       drop_user_message=True)
+        
+        stored = MemoryStore(MagicMock(), str(stored_turns)).collection.get(include=["embeddings", "metadatas"])
+        assert len(stored["ids"]) == 30
+        assert len(stored["embeddings"][0]) == 16
+        assert "user_message" not in stored["metadatas"][0]
+        assert report["dimensions"] == (64, 16)
+        assert report["bytes_per_turn"][1] < report["bytes_per_turn"][0]
+        assert 0 < report["recall"] <= 1
+    
+    def test_already_short_store_left_alone(self, stored_turns):
+        """Test a store at or below the target size is not rewritten"""
+        with patch('shrink_embeddings.Console'):
+            report = shrink_embeddings(str(stored_turns), dimensions=64)
+        
+        assert report == {}
+        assert MemoryStore(MagicMock(), str(stored_turns)).collection.count() == 30
+    
+    def test_user_message_kept_unless_asked(self, stored_turns):
+        """Test the legacy metadata is only dropped when explicitly requested"""
+        with patch('shrink_embeddings.Console'):
+            shrink_embeddings(str(stored_turns), dimensions=16, drop_user_message=False)
+        
+        stored = MemoryStore(MagicMock(), str(stored_turns)).collection.get(include=["metadatas"])
+        assert stored["metadatas"][0]["user_message"] == "q0"
+    
+    @pytest.mark.parametrize("mode", ["collection", "directory"])
+    def test_every_partition_shrunk(self, stored_turns, mode):
+        """Test per-user collections and directories are rewritten along with the shared collection"""
+        router = MemoryRouter(MagicMock(), str(stored_turns), mode)
+        _add_turns(router.store_for("alice"), 10)
+        
+        with patch('shrink_embeddings.Console'):
+            report = shrink_embeddings(str(stored_turns), dimensions=16, top_k=3)
+        
+        alice = MemoryRouter(MagicMock(), str(stored_turns), mode).store_for("alice")
+        assert report["partitions"] == 2
+        assert report["turns"] == 40
+        assert len(alice.collection.get(include=["embeddings"])["embeddings"][0]) == 16
+    
+    def test_interrupted_swap_recovered(self, stored_turns):
+        """Test an original renamed aside before its copy took over is restored and shrunk on the next run"""
+        store = MemoryStore(MagicMock(), str(stored_turns))
+        store.collection.modify(name="conversations__old")
+        store.chroma_client.get_or_create_collection("conversations__shrink")
+        
+        with patch('shrink_embeddings.Console'):
+            report = shrink_embeddings(str(stored_turns), dimensions=16, top_k=3)
+        
+        names = {collection.name for collection in store.chroma_client.list_collections()}
+        assert report["turns"] == 30
+        assert names == {"conversations"}
@@ -0,0 +1,92 @@
+import threading
+import pytest
+from unittest.mock import MagicMock
+import sys
+sys.path.insert(0, 'src')
+
+from stream_renderer import StreamRenderer
+
+
+class TestStreamRenderer:
+    
+    def test_chunks_within_a_frame_printed_together(self):
+        """Test tokens arriving inside one frame interval share a single print"""
+        console, clock = MagicMock(), self._clock([0.0, 0.01, 0.02, 0.03, 0.07, 0.08, 0.09])
+        renderer = StreamRenderer(console, max_fps=20, clock=clock)
+        
+        reply = renderer.render(["Hel", "lo", " th", "ere", "!"])
+        
+        printed = [call.args[0] for call in console.print.call_args_list]
+        assert printed == ["Hel", "lo there", "!"]
+        assert reply == "Hello there!"
+        assert renderer.stats["frames"] == 3
+    
+    def test_ttft_and_tokens_per_second(self):
+        """Test time to first token counts from the turn start and throughput from the first token"""
+        renderer = StreamRenderer(MagicMock(), clock=self._clock([1.5, 1.6, 1.7, 2.0]))
+        
+        renderer.render(["a", "b", "c"], started=1.2)
+        
+        assert renderer.last_ttft == pytest.approx(0.3)
+        assert renderer.last_tokens_per_second == pytest.approx(3 / 0.5)
+        assert renderer.tokens_per_second == pytest.approx(6.0)
+        assert renderer.mean_ttft == pytest.approx(0.3)
+    
+    def test_model_text_not_parsed_as_markup(self):
+        """Test brackets in a reply are printed verbatim"""
+        console = MagicMock()
+        StreamRenderer(console).render(["use [bold]x[/bold]"])
+        
+        assert console.print.call_args.kwargs["markup"] is False
+    
+    def test_empty_stream(self):
+        """Test a stream without content prints nothing and reports no first token"""
+        console = MagicMock()
+        renderer = StreamRenderer(console)
+        
+        assert renderer.render(iter(["", ""])) == ""
+        assert not console.print.called
+        assert renderer.last_ttft is None
+        assert renderer.last_tokens_per_second == 0.0
+    
+    def test_long_reply_joined_once(self):
+        """Test a multi-kilobyte reply comes back whole with the frame count capped by the frame rate"""
+        console = MagicMock()
+        ticks = iter(range(10 ** 6))
+        renderer = StreamRenderer(console, max_fps=10, clock=lambda: next(ticks) * 0.001)
+        
+        reply = renderer.render(["token "] * 2000)
+        
+        assert reply == "token " * 2000
+        assert renderer.stats["frames"] <= 21
+        assert "".join(call.args[0] for call in console.print.call_args_list) == reply
+    
+    def test_held_text_printed_while_stream_stalls(self):
+        """Test text held back by the frame rate is printed after a frame even if no further chunk arrives"""
+        console, flushed = MagicMock(), threading.Event()
+        printed = []
+        
+        def _print(text, **kwargs):
+            printed.append(text)
+            if printed == ["Hel", "lo"]:
+                flushed.set()
+        
+        console.print.side_effect = _print
+        renderer = StreamRenderer(console, max_fps=100)
+        
+        def _chunks():
+            yield "Hel"
+            yield "lo"
+            flushed.wait(2)
+            yield "!"
+        
+        reply = renderer.render(_chunks())
+        
+        assert flushed.is_set()
+        assert reply == "Hello!"
+        assert printed == ["Hel", "lo", "!"]
+    
+    @staticmethod
+    def _clock(times):
+        ticks = iter(times)
+        return lambda: next(ticks)
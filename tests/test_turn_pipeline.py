@@ -0,0 +1,110 @@
+import time
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from turn_pipeline import TurnPipeline
+
+
+class TestTurnPipeline:
+    
+    def test_background_stages_overlap_inline_stage(self):
+        """Test submitted stages run while the caller works on an inline stage"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        
+        start = time.perf_counter()
+        pipeline.submit("embed", self._sleep_then_return, 0.1, "vector")
+        assert pipeline.run("classify", self._sleep_then_return, 0.1, "SAFE") == "SAFE"
+        assert pipeline.result("embed") == "vector"
+        
+        assert time.perf_counter() - start < 0.18
+    
+    def test_dependent_stage_waits_for_its_inputs(self):
+        """Test a stage starts only after the stages it runs after, and receives nothing it didn't ask for"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        order = []
+        
+        pipeline.submit("embed", lambda: time.sleep(0.05) or order.append("embed"))
+        pipeline.submit("retrieve", lambda: order.append("retrieve") or "memories", after=("embed",))
+        
+        assert pipeline.result("retrieve") == "memories"
+        assert order == ["embed", "retrieve"]
+        timings = pipeline.last_timings
+        assert timings["retrieve"][0] >= timings["embed"][1]
+    
+    def test_critical_path_follows_slowest_dependency(self):
+        """Test the critical path walks back from the last stage through whichever input finished last"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        
+        pipeline.submit("embed", time.sleep, 0.02)
+        pipeline.submit("retrieve", time.sleep, 0.1, after=("embed",))
+        pipeline.run("classify", time.sleep, 0.02)
+        with pipeline.timed("generate", after=("classify", "retrieve")):
+            pass
+        
+        assert pipeline.finish() == ["embed", "retrieve", "generate"]
+        assert pipeline.last_duration >= 0.12
+        assert pipeline.stats["turns"] == 1
+        assert pipeline.critical_path_counts == {"embed": 1, "retrieve": 1, "generate": 1}
+        assert set(pipeline.stage_totals) == {"embed", "retrieve", "classify", "generate"}
+    
+    def test_fast_retrieval_leaves_classification_on_critical_path(self):
+        """Test classification is reported as the bottleneck when retrieval finishes first"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        
+        pipeline.submit("retrieve", lambda: None)
+        pipeline.run("classify", time.sleep, 0.05)
+        with pipeline.timed("generate", after=("classify", "retrieve")):
+            pass
+        
+        assert pipeline.finish() == ["classify", "generate"]
+    
+    def test_failure_propagates_to_dependents(self):
+        """Test a failed stage fails the stages after it instead of running them"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        ran = []
+        
+        pipeline.submit("embed", self._fail)
+        pipeline.submit("retrieve", ran.append, "retrieve", after=("embed",))
+        
+        with pytest.raises(ConnectionError):
+            pipeline.result("retrieve")
+        assert ran == []
+    
+    def test_failures_recorded_without_a_waiter(self):
+        """Test a failed background stage is kept and counted even if no stage waits for it"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        
+        pipeline.submit("embed", self._fail)
+        error = pipeline.exception("embed")
+        
+        assert isinstance(error, ConnectionError)
+        assert pipeline.last_errors == {"embed": error}
+        assert pipeline.stats["failures"] == 1
+    
+    def test_begin_waits_for_stages_left_running(self):
+        """Test a new turn does not start while the last turn's background stages still run"""
+        pipeline = TurnPipeline()
+        pipeline.begin()
+        done = []
+        pipeline.submit("retrieve", lambda: time.sleep(0.05) or done.append(True))
+        
+        pipeline.begin()
+        
+        assert done == [True]
+        assert pipeline.last_timings == {}
+    
+    @staticmethod
+    def _sleep_then_return(delay, value):
+        time.sleep(delay)
+        return value
+    
+    @staticmethod
+    def _fail():
+        raise ConnectionError("embedding endpoint down")
@@ -0,0 +1,106 @@
+import numpy as np
+import pytest
+import sys
+sys.path.insert(0, 'src')
+
+from vector_index import VectorIndex
+
+
+@pytest.fixture
+def vectors():
+    """Random session embeddings"""
+    return np.random.default_rng(0).standard_normal((50, 8)).astype(np.float32)
+
+
+class TestVectorIndex:
+    
+    def test_search_matches_brute_force_ranking(self, vectors):
+        """Test top-k equals a full sort by squared L2 distance"""
+        index = VectorIndex()
+        index.warm("s1", self._entries(vectors))
+        query = vectors[7] + 0.01
+        
+        results = index.search("s1", query, 5)
+        
+        expected = np.argsort(((vectors - query) ** 2).sum(axis=1))[:5]
+        assert [result["turn_number"] for result in results] == expected.tolist()
+        assert results[0]["distance"] == pytest.approx(float(((vectors[7] - query) ** 2).sum()), abs=1e-4)
+    
+    def test_cold_session_returns_none(self, vectors):
+        """Test a session that was never warmed is left to the cold tier"""
+        index = VectorIndex()
+        index.add("s1", "s1_turn0", vectors[0], {"content": "c", "turn_number": 0, "timestamp": ""})
+        
+        assert "s1" not in index
+        assert index.search("s1", vectors[0], 3) is None
+    
+    def test_added_turns_grow_and_replace_rows(self, vectors):
+        """Test new turns are searchable past the initial capacity and re-added ids replace their row"""
+        index = VectorIndex()
+        index.warm("s1", [])
+        for entry in self._entries(vectors):
+            index.add("s1", *entry)
+        index.add("s1", "s1_turn0", vectors[0], {"content": "edited", "turn_number": 0, "timestamp": ""})
+        
+        assert len(index) == 50
+        assert index.search("s1", vectors[0], 1)[0]["content"] == "edited"
+    
+    def test_session_published_only_when_fully_loaded(self, vectors):
+        """Test a warming session stays cold until all entries are in, and turns added meanwhile are kept"""
+        index = VectorIndex()
+        seen = []
+        
+        def _entries():
+            for entry in self._entries(vectors[:3]):
+                seen.append(index.search("s1", vectors[0], 3))
+                yield entry
+            index.add("s1", "s1_new", vectors[9], {"content": "new", "turn_number": 9, "timestamp": ""})
+        
+        index.warm("s1", _entries())
+        
+        assert seen == [None, None, None]
+        assert len(index) == 4
+        assert index.search("s1", vectors[9], 1)[0]["content"] == "new"
+    
+    def test_discard_while_warming_leaves_session_cold(self, vectors):
+        """Test a session discarded during its load is not published with stale entries"""
+        index = VectorIndex()
+        
+        def _entries():
+            yield from self._entries(vectors[:3])
+            index.discard("s1")
+        
+        index.warm("s1", _entries())
+        
+        assert "s1" not in index
+    
+    def test_least_recently_used_session_is_evicted(self, vectors):
+        """Test warming past max_sessions evicts the session searched longest ago"""
+        index = VectorIndex(max_sessions=2)
+        index.warm("s1", self._entries(vectors[:3]))
+        index.warm("s2", self._entries(vectors[3:6]))
+        index.search("s1", vectors[0], 1)
+        
+        index.warm("s3", self._entries(vectors[6:9]))
+        
+        assert "s1" in index and "s3" in index
+        assert "s2" not in index
+        assert index.stats["evictions"] == 1
+    
+    def test_quantized_index_keeps_ranking_in_a_quarter_of_the_memory(self, vectors):
+        """Test int8 codes rank like float32 vectors while holding far fewer bytes"""
+        exact, quantized = VectorIndex(), VectorIndex(quantize=True)
+        exact.warm("s1", self._entries(vectors))
+        quantized.warm("s1", self._entries(vectors))
+        query = vectors[3] + 0.1
+        
+        expected = [result["turn_number"] for result in exact.search("s1", query, 5)]
+        results = quantized.search("s1", query, 5)
+        
+        assert [result["turn_number"] for result in results] == expected
+        assert quantized.nbytes < exact.nbytes / 2
+    
+    @staticmethod
+    def _entries(vectors):
+        return [(f"s1_turn{i}", vector, {"content": f"turn {i}", "turn_number": i, "timestamp": ""})
+                for i, vector in enumerate(vectors)]